@@ -0,0 +1,107 @@
+import argparse
+import sys
+from datetime import datetime
+
+from db_connector import create_connection, close_connection, fetch_all, run_transaction
+
+CHUNK_SIZE = 500 # Incidents moved per transaction; keeps row locks and undo log small
+ARCHIVE_STATUS = "Resolved" # Only incidents in this status are ever archived
+
+# Uses idx_incidents_status (status, date_reported) from migration 001
+SELECT_CHUNK = """
+    SELECT incident_id FROM ResponseIncidents
+    WHERE status = %s AND date_reported < %s
+    ORDER BY date_reported, incident_id
+    LIMIT %s
+    FOR UPDATE
+"""
+
+COUNT_ARCHIVABLE = "SELECT COUNT(*) FROM ResponseIncidents WHERE status = %s AND date_reported < %s"
+
+
+def copy_statements(id_marks):
+    """INSERT ... SELECT statements that copy a chunk of incidents and their children to the archive."""
+    return [
+        f"""INSERT INTO ResponseIncidentsArchive
+                (incident_id, incident_type, incident_location, date_reported, status, commander_id, archived_at)
+            SELECT incident_id, incident_type, incident_location, date_reported, status, commander_id, NOW()
+            FROM ResponseIncidents WHERE incident_id IN ({id_marks})""",
+        f"""INSERT INTO DeploymentArchive
+                (deployment_id, incident_id, personnel_id, deployment_time, role_during_incident, incident_date)
+            SELECT D.deployment_id, D.incident_id, D.personnel_id, D.deployment_time, D.role_during_incident, I.date_reported
+            FROM Deployment AS D JOIN ResponseIncidents AS I ON I.incident_id = D.incident_id
+            WHERE D.incident_id IN ({id_marks})""",
+        f"""INSERT INTO ResourceUsageArchive
+                (usage_id, incident_id, resource_id, quantity_used, date_used, incident_date)
+            SELECT RU.usage_id, RU.incident_id, RU.resource_id, RU.quantity_used, RU.date_used, I.date_reported
+            FROM ResourceUsage AS RU JOIN ResponseIncidents AS I ON I.incident_id = RU.incident_id
+            WHERE RU.incident_id IN ({id_marks})""",
+    ]
+
+
+def archive_chunk(conn, cutoff, chunk_size=CHUNK_SIZE, status=ARCHIVE_STATUS):
+    """Moves one chunk of old incidents (with their deployments and usage) to the archive tables.
+
+    Copy and delete happen in the same transaction; the DELETE cascades to the
+    bridge tables (migration 002). Returns the number of incidents moved.
+    """
+    def work(cursor):
+        cursor.execute(SELECT_CHUNK, (status, cutoff, chunk_size))
+        ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return 0
+        id_marks = ", ".join(["%s"] * len(ids))
+        for statement in copy_statements(id_marks):
+            cursor.execute(statement, ids)
+        cursor.execute(f"DELETE FROM ResponseIncidents WHERE incident_id IN ({id_marks})", ids)
+        return len(ids)
+
+    return run_transaction(conn, work)
+
+
+def archive_incidents(conn, cutoff, chunk_size=CHUNK_SIZE, status=ARCHIVE_STATUS, progress=None):
+    """Archives every ``status`` incident reported before ``cutoff``, one chunk per transaction.
+
+    ``progress(total_moved)`` is called after each chunk. Returns the total moved.
+    """
+    total = 0
+    while True:
+        moved = archive_chunk(conn, cutoff, chunk_size, status)
+        total += moved
+        if progress and moved:
+            progress(total)
+        if moved < chunk_size:
+            return total
+
+
+def count_archivable(conn, cutoff, status=ARCHIVE_STATUS):
+    return fetch_all(conn, COUNT_ARCHIVABLE, (status, cutoff))[0][0]
+
+
+def main(argv=None):
+    """Command line archiving, e.g. ``python archive.py --before 2024-01-01``."""
+    parser = argparse.ArgumentParser(description="Move old resolved incidents into the archive tables.")
+    parser.add_argument("--before", required=True, type=lambda text: datetime.strptime(text, "%Y-%m-%d"),
+                        help="Archive incidents reported before this date (YYYY-MM-DD)")
+    parser.add_argument("--status", default=ARCHIVE_STATUS, help=f"Incident status to archive (default {ARCHIVE_STATUS})")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help=f"Incidents per transaction (default {CHUNK_SIZE})")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many incidents would be archived")
+    args = parser.parse_args(argv)
+
+    connection = create_connection()
+    if connection is None:
+        return 1
+    try:
+        if args.dry_run:
+            print(f"{count_archivable(connection, args.before, args.status)} incidents would be archived.")
+            return 0
+        total = archive_incidents(connection, args.before, args.chunk_size, args.status,
+                                  progress=lambda moved: print(f"  {moved} incidents archived ..."))
+        print(f"Archived {total} incidents reported before {args.before:%Y-%m-%d}.")
+        return 0
+    finally:
+        close_connection(connection)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+from db_connector import DB_CONFIG, execute_write, fetch_all, fetch_prepared, statement_cache_stats
+from forecast import refresh_forecasts
+from grid_definitions import INCIDENT_GRID, INCIDENT_GRID_YTD, LOOKUPS, PERSONNEL_GRID, RESOURCE_GRID
+from migrate import load_migrations, migrate, split_statements
+from report_definitions import REPORTS, period_start, report_pager, report_params
+from repositories import SELECT_INCIDENT, IncidentRepo, PersonnelRepo, ReportRepo, ResourceRepo
+
+# Benchmarks run against their own database so production data is never touched
+BENCH_DATABASE = "MDRRMO_DREAMS_BENCH"
+SCHEMA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database")
+SCHEMA_SCRIPTS = ["01_schema_creation.sql", "04_summary_tables.sql"] # Migrations are applied after these
+
+PAGE_SIZE = 100
+INSERT_CHUNK = 5000 # Generated rows per executemany / commit
+ITERATIONS = 50
+HISTORY_YEARS = 5   # Generated incidents are spread over this many years up to today
+
+INCIDENT_TYPES = ["Flood", "Fire", "Road Accident", "Medical Emergency", "Landslide", "Storm Surge", "Earthquake"]
+ROLES = ["Rescuer", "Logistics", "Commander", "Medic", "Driver"]
+SPECIALTIES = ["Medical", "Search & Rescue", "Communications", "Water Rescue", None]
+CATEGORIES = ["Medical Supplies", "Vehicle", "Equipment", "Food", "Shelter"]
+UNITS = ["pcs", "box", "unit", "pack", "liters"]
+
+
+def connect(database=BENCH_DATABASE):
+    return mysql.connector.connect(**dict(DB_CONFIG, database=database))
+
+
+# --- Schema / Data Generation ---
+
+def create_schema(database=BENCH_DATABASE):
+    """(Re)creates the benchmark database from the schema scripts plus all migrations."""
+    server = mysql.connector.connect(**{key: value for key, value in DB_CONFIG.items() if key != 'database'})
+    try:
+        cursor = server.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+        cursor.execute(f"CREATE DATABASE `{database}`")
+        cursor.close()
+    finally:
+        server.close()
+
+    conn = connect(database)
+    try:
+        cursor = conn.cursor()
+        for script in SCHEMA_SCRIPTS:
+            with open(os.path.join(SCHEMA_DIR, script), encoding="utf-8") as handle:
+                for statement in split_statements(handle.read()):
+                    if statement.upper().startswith(("CREATE DATABASE", "USE ")):
+                        continue # The scripts target MDRRMO_DREAMS_DB; stay in the benchmark database
+                    cursor.execute(statement)
+        conn.commit()
+        cursor.close()
+        migrate(conn, load_migrations())
+    finally:
+        conn.close()
+
+
+def insert_chunked(conn, query, rows):
+    cursor = conn.cursor()
+    try:
+        for start in range(0, len(rows), INSERT_CHUNK):
+            cursor.executemany(query, rows[start:start + INSERT_CHUNK])
+            conn.commit()
+    finally:
+        cursor.close()
+
+
+def generate(conn, incidents, seed=1):
+    """Fills an empty benchmark database with a realistic synthetic dataset; returns the row counts.
+
+    Personnel and resources scale with the number of incidents; every incident
+    gets 1-5 deployments and 0-4 usage lines (so some lack resource logs).
+    Incidents are generated in chunks to keep memory flat at millions of rows.
+    """
+    rng = random.Random(seed)
+    personnel = max(50, incidents // 20)
+    resources = max(20, min(5000, incidents // 100))
+    now = datetime.now().replace(microsecond=0)
+    span = int(timedelta(days=365 * HISTORY_YEARS).total_seconds())
+
+    insert_chunked(conn, "INSERT INTO Personnel (personnel_id, name, role, specialty, contact_number, assigned_unit) "
+                         "VALUES (%s, %s, %s, %s, %s, %s)",
+                   [(pk, f"Responder {pk:07d}", rng.choice(ROLES), rng.choice(SPECIALTIES),
+                     f"09{rng.randrange(10**9):09d}", f"Unit {rng.randrange(1, 40)}") for pk in range(1, personnel + 1)])
+    insert_chunked(conn, "INSERT INTO Resources (resource_id, item_name, category, stock_level, unit_of_measure) "
+                         "VALUES (%s, %s, %s, %s, %s)",
+                   [(pk, f"Item {pk:05d}", rng.choice(CATEGORIES), 10**7, rng.choice(UNITS)) for pk in range(1, resources + 1)])
+
+    counts = {"personnel": personnel, "resources": resources, "incidents": 0, "deployments": 0, "usages": 0}
+    for first in range(1, incidents + 1, INSERT_CHUNK):
+        incident_rows, deployment_rows, usage_rows = [], [], []
+        for pk in range(first, min(first + INSERT_CHUNK, incidents + 1)):
+            reported = now - timedelta(seconds=rng.randrange(span))
+            status = "Resolved" if reported < now - timedelta(days=30) else rng.choice(["Active", "Resolved", "Standby"])
+            incident_rows.append((pk, rng.choice(INCIDENT_TYPES), f"Barangay {rng.randrange(1, 80)}", reported, status,
+                                  rng.randrange(1, personnel + 1)))
+            for responder in rng.sample(range(1, personnel + 1), rng.randint(1, 5)):
+                deployment_rows.append((pk, responder, reported + timedelta(minutes=rng.randrange(5, 120)), rng.choice(ROLES)))
+            for resource in rng.sample(range(1, resources + 1), rng.randint(0, 4)):
+                usage_rows.append((pk, resource, rng.randint(1, 20), reported + timedelta(hours=rng.randrange(1, 48))))
+        insert_chunked(conn, "INSERT INTO ResponseIncidents (incident_id, incident_type, incident_location, date_reported, "
+                             "status, commander_id) VALUES (%s, %s, %s, %s, %s, %s)", incident_rows)
+        insert_chunked(conn, "INSERT INTO Deployment (incident_id, personnel_id, deployment_time, role_during_incident) "
+                             "VALUES (%s, %s, %s, %s)", deployment_rows)
+        insert_chunked(conn, "INSERT INTO ResourceUsage (incident_id, resource_id, quantity_used, date_used) "
+                             "VALUES (%s, %s, %s, %s)", usage_rows)
+        counts["incidents"] += len(incident_rows)
+        counts["deployments"] += len(deployment_rows)
+        counts["usages"] += len(usage_rows)
+        print(f"  {counts['incidents']} / {incidents} incidents generated", file=sys.stderr)
+    refresh_forecasts(conn)
+    execute_write(conn, "TRUNCATE TABLE ChangeLog") # Generated history is not a change any window is waiting for
+    return counts
+
+
+# --- Scenarios ---
+
+def dataset_counts(conn):
+    tables = {"personnel": "Personnel", "resources": "Resources", "incidents": "ResponseIncidents",
+              "deployments": "Deployment", "usages": "ResourceUsage"}
+    return {name: fetch_all(conn, f"SELECT COUNT(*) FROM {table}")[0][0] for name, table in tables.items()}
+
+
+def sample_keys(conn, pager, id_column, table, samples=100, seed=1):
+    """Keyset positions of random existing rows, used as realistic deep-scroll starting points."""
+    rng = random.Random(seed)
+    low, high = fetch_all(conn, f"SELECT MIN({id_column}), MAX({id_column}) FROM {table}")[0]
+    if low is None:
+        return []
+    keys = []
+    for _ in range(samples):
+        pk = rng.randint(low, high)
+        row = fetch_all(conn, pager.render([f"{pager.key[-1][0]} >= %s"]) + " LIMIT 1", (pk,))
+        if row:
+            keys.append(pager.row_key(row[0]))
+    return keys
+
+
+def fetch_changes(conn, pager, version_columns, since):
+    """The change-sync query of treeview_sync.fetch_changes, without pulling in its Tk imports."""
+    condition = "(" + " OR ".join(f"{column} >= %s" for column in version_columns) + ")"
+    return fetch_all(conn, pager.render([condition]), [since] * len(version_columns))
+
+
+def rewrite(repo, pk):
+    """Reads a row and writes it back unchanged: the full update path, without drifting the dataset."""
+    return repo.update(repo.get(pk))
+
+
+def build_scenarios(conn, include_exports=False, seed=1):
+    """Returns (name, callable(conn)) pairs covering every module's read and write path without Tk."""
+    rng = random.Random(seed)
+    year_start = period_start("Year to Date")
+    recent = datetime.now() - timedelta(seconds=5)
+    incident_keys = sample_keys(conn, INCIDENT_GRID, "incident_id", "ResponseIncidents", seed=seed)
+    incident_ids = [key[1] for key in incident_keys] or [1]
+    resource_count = fetch_all(conn, "SELECT MAX(resource_id) FROM Resources")[0][0] or 1
+    personnel_count = fetch_all(conn, "SELECT MAX(personnel_id) FROM Personnel")[0][0] or 1
+
+    scenarios = [
+        ("incident_grid.first_page", lambda c: INCIDENT_GRID.fetch_page(c, PAGE_SIZE)),
+        ("incident_grid.seek_page", lambda c: INCIDENT_GRID.fetch_page(c, PAGE_SIZE, after=rng.choice(incident_keys))
+            if incident_keys else None),
+        ("incident_grid.ytd_first_page", lambda c: INCIDENT_GRID_YTD.fetch_page(c, PAGE_SIZE, params=(year_start,))),
+        ("incident_grid.changes", lambda c: fetch_changes(c, INCIDENT_GRID, ["I.updated_at", "P.updated_at"], recent)),
+        ("personnel_grid.changes", lambda c: fetch_changes(c, PERSONNEL_GRID, ["updated_at"], recent)),
+        ("inventory_grid.changes", lambda c: fetch_changes(c, RESOURCE_GRID, ["updated_at"], recent)),
+    ]
+    # The same point lookup sent as plain text (parsed every time) and as a cached prepared statement
+    scenarios.append(("read.incident_by_id.text", lambda c: fetch_all(c, SELECT_INCIDENT, (rng.choice(incident_ids),))))
+    scenarios.append(("read.incident_by_id.prepared", lambda c: IncidentRepo(c).get(rng.choice(incident_ids))))
+    for name, (query, _) in LOOKUPS.items():
+        scenarios.append((f"lookup.{name}", lambda c, query=query: fetch_prepared(c, query)))
+    for name, report in REPORTS.items():
+        slug = name.lower().replace(" ", "_").replace("-", "_")
+        pager = report_pager(report)
+        scenarios.append((f"report.{slug}.first_page", lambda c, pager=pager: pager.fetch_page(c, PAGE_SIZE)))
+        scenarios.append((f"report.{slug}.version_probe", lambda c, name=name: ReportRepo(c).version(name)))
+        if report.get('date_column'):
+            ytd_pager, params = report_pager(report, year_start), report_params(report, year_start)
+            scenarios.append((f"report.{slug}.ytd_first_page",
+                              lambda c, pager=ytd_pager, params=params: pager.fetch_page(c, PAGE_SIZE, params=params)))
+        if include_exports:
+            scenarios.append((f"export.{slug}.csv", lambda c, name=name: ReportRepo(c).export(name, os.devnull, "csv")))
+
+    scenarios.append(("write.personnel_update", lambda c: rewrite(PersonnelRepo(c), rng.randint(1, personnel_count))))
+    scenarios.append(("write.incident_update", lambda c: rewrite(IncidentRepo(c), rng.choice(incident_ids))))
+    # Every resource's burn rate and reorder point, as the main window's daily refresh computes them
+    scenarios.append(("forecast.refresh_all", refresh_forecasts))
+    scenarios.append(("write.log_usage", lambda c: ResourceRepo(c).log_usage(
+        rng.choice(incident_ids), rng.randint(1, resource_count), 1)))
+    scenarios.append(("write.log_usage_batch_40", lambda c: ResourceRepo(c).log_usage_batch(
+        rng.choice(incident_ids), [(pk, 1) for pk in rng.sample(range(1, resource_count + 1), min(40, resource_count))])))
+    return scenarios
+
+
+# --- Measurement ---
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def measure(conn, fn, iterations=ITERATIONS, warmup=2):
+    for _ in range(warmup):
+        fn(conn)
+    timings = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        begin = time.perf_counter()
+        fn(conn)
+        timings.append((time.perf_counter() - begin) * 1000)
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return {
+        "runs": iterations,
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "max_ms": round(timings[-1], 3),
+        "ops_per_sec": round(iterations / elapsed, 2) if elapsed else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmarks(conn, iterations=ITERATIONS, include_exports=False, only=None):
+    results = {}
+    for name, fn in build_scenarios(conn, include_exports):
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        print(f"  {name} ...", file=sys.stderr)
+        results[name] = measure(conn, fn, iterations if not name.startswith("export.") else max(1, iterations // 10))
+    return {
+        "commit": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "dataset": dataset_counts(conn),
+        "iterations": iterations,
+        "statement_cache": statement_cache_stats(),
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    """Prints p95 latency changes against an earlier JSON report."""
+    print(f"p95 vs baseline ({baseline.get('commit')} -> {report.get('commit')}):", file=sys.stderr)
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        print(f"  {name:<55} {before['p95_ms']:>10.2f} -> {result['p95_ms']:>10.2f} ms ({change:+.1f}%)", file=sys.stderr)
+
+
+# --- Command Line ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic DREAMS data and benchmark every query/write path.")
+    parser.add_argument("--database", default=BENCH_DATABASE, help=f"Benchmark database (default {BENCH_DATABASE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_cmd = commands.add_parser("generate", help="Recreate the benchmark database and fill it with synthetic data")
+    generate_cmd.add_argument("--incidents", type=int, default=10000, help="Number of incidents (10k to 10M)")
+    generate_cmd.add_argument("--seed", type=int, default=1)
+
+    run_cmd = commands.add_parser("run", help="Run the benchmark scenarios and print JSON results")
+    run_cmd.add_argument("--iterations", type=int, default=ITERATIONS)
+    run_cmd.add_argument("--exports", action="store_true", help="Also time full CSV exports of every report")
+    run_cmd.add_argument("--only", nargs="*", help="Only run scenarios whose names start with these prefixes")
+    run_cmd.add_argument("--output", help="Write the JSON here instead of stdout")
+    run_cmd.add_argument("--compare", help="Earlier JSON results to compare p95 latencies against")
+    args = parser.parse_args(argv)
+
+    if args.database == DB_CONFIG['database']:
+        parser.error("Refusing to benchmark against the production database; choose another --database.")
+
+    if args.command == "generate":
+        create_schema(args.database)
+        conn = connect(args.database)
+        try:
+            started = time.perf_counter()
+            counts = generate(conn, args.incidents, args.seed)
+            counts["seconds"] = round(time.perf_counter() - started, 1)
+        finally:
+            conn.close()
+        print(json.dumps(counts, indent=2))
+        return 0
+
+    conn = connect(args.database)
+    try:
+        report = run_benchmarks(conn, args.iterations, args.exports, args.only)
+    finally:
+        conn.close()
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            compare(report, json.load(handle))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
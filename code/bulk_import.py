@@ -0,0 +1,158 @@
+import csv
+import os
+
+try:
+    import openpyxl # Optional: only needed for .xlsx files
+except ImportError:
+    openpyxl = None
+
+CHUNK_SIZE = 1000 # Rows validated and inserted per executemany / commit
+
+
+class Field:
+    """One importable column, with the limits declared in 01_schema_creation.sql."""
+
+    def __init__(self, name, max_length=None, required=False, kind=str, minimum=None):
+        self.name = name
+        self.max_length = max_length
+        self.required = required
+        self.kind = kind
+        self.minimum = minimum
+
+    def clean(self, raw):
+        """Returns the value to insert, or raises ValueError with a reason for the reject file."""
+        value = "" if raw is None else str(raw).strip()
+        if not value:
+            if self.required:
+                raise ValueError(f"{self.name} is required")
+            return None
+        if self.kind is int:
+            try:
+                number = float(value) # Excel hands whole numbers back as 12.0
+            except ValueError:
+                number = None
+            if number is None or not number.is_integer():
+                raise ValueError(f"{self.name} must be a whole number")
+            value = int(number)
+            if self.minimum is not None and value < self.minimum:
+                raise ValueError(f"{self.name} must be at least {self.minimum}")
+        elif self.max_length is not None and len(value) > self.max_length:
+            raise ValueError(f"{self.name} is longer than {self.max_length} characters")
+        return value
+
+
+# Tables that can be bulk loaded, with their columns in insert order
+IMPORT_SPECS = {
+    "personnel": ("Personnel", [
+        Field("name", 100, required=True),
+        Field("role", 50, required=True),
+        Field("specialty", 50),
+        Field("contact_number", 15, required=True), # Required by the Personnel form as well
+        Field("assigned_unit", 50, required=True),
+    ]),
+    "resources": ("Resources", [
+        Field("item_name", 100, required=True),
+        Field("category", 50),
+        Field("stock_level", required=True, kind=int, minimum=0),
+        Field("unit_of_measure", 20),
+    ]),
+}
+
+# Header spellings used by the on-screen forms / exported sheets, mapped to column names
+HEADER_ALIASES = {
+    "contact_no.": "contact_number",
+    "contact_no": "contact_number",
+    "unit": "unit_of_measure",
+    "stock": "stock_level",
+}
+
+
+class ImportResult:
+    def __init__(self):
+        self.inserted = 0
+        self.rejected = 0
+        self.reject_path = None
+
+
+def normalize_header(header):
+    key = str(header or "").strip().lower().replace(" ", "_")
+    return HEADER_ALIASES.get(key, key)
+
+
+def read_rows(path):
+    """Yields each data row of a CSV or XLSX file as a dict keyed by its header, without loading the whole file."""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        if openpyxl is None:
+            raise RuntimeError("Reading Excel files requires the 'openpyxl' package (pip install openpyxl).")
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = next(rows, None) or ()
+            for values in rows:
+                if any(value not in (None, "") for value in values):
+                    yield dict(zip(headers, values))
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as handle:
+            yield from csv.DictReader(handle)
+
+
+def validate(fields, row):
+    """Maps a file row onto the table's columns; returns the insert tuple or raises ValueError."""
+    row = {normalize_header(header): value for header, value in row.items()}
+    return tuple(field.clean(row.get(field.name)) for field in fields)
+
+
+def reject_path_for(path):
+    base, _ = os.path.splitext(path)
+    return base + ".rejected.csv"
+
+
+def import_file(conn, kind, path, chunk_size=CHUNK_SIZE):
+    """Streams ``path`` into the table for ``kind`` ("personnel" or "resources").
+
+    Rows are validated and inserted ``chunk_size`` at a time with executemany
+    (sent as one multi-row INSERT per chunk) and committed per chunk, so memory
+    use stays flat for any file size.  Rows that fail validation are written,
+    with the reason, to ``<file>.rejected.csv`` next to the source file.
+    """
+    table, fields = IMPORT_SPECS[kind]
+    query = (f"INSERT INTO {table} ({', '.join(field.name for field in fields)}) "
+             f"VALUES ({', '.join(['%s'] * len(fields))})")
+    result = ImportResult()
+    reject_file = writer = None
+    cursor = conn.cursor()
+
+    def flush(chunk):
+        cursor.executemany(query, chunk)
+        conn.commit()
+        result.inserted += len(chunk)
+
+    try:
+        chunk = []
+        for line_number, row in enumerate(read_rows(path), start=2): # Line 1 is the header
+            try:
+                chunk.append(validate(fields, row))
+            except ValueError as e:
+                if writer is None:
+                    result.reject_path = reject_path_for(path)
+                    reject_file = open(result.reject_path, "w", newline="", encoding="utf-8")
+                    writer = csv.writer(reject_file)
+                    writer.writerow(["line", "error"] + list(row.keys()))
+                writer.writerow([line_number, str(e)] + list(row.values()))
+                result.rejected += 1
+                continue
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+    except Exception:
+        conn.rollback() # Only the failing chunk is undone; earlier chunks stay committed
+        raise
+    finally:
+        cursor.close()
+        if reject_file is not None:
+            reject_file.close()
+    return result
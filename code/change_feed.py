@@ -0,0 +1,238 @@
+import argparse
+import queue
+import sys
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import mysql.connector
+from mysql.connector import Error
+
+from db_connector import DB_CONFIG
+
+# Tails the ChangeLog table (database/migrations/004_change_log.sql, filled by triggers) and
+# hands each batch of row changes to the open windows on the Tk thread, so they refresh only
+# the rows that changed - including changes made from other workstations.
+
+POLL_SECONDS = 0.5         # Between reads of the log; each is a primary key range scan
+DISPATCH_MS = 250          # How often the Tk thread delivers queued changes to subscribers
+CONNECT_TIMEOUT = 5        # Seconds
+RETRY_SECONDS = 10         # Before reconnecting after the server or the ChangeLog table was unavailable
+FETCH_BATCH = 1000         # Changes read per round trip; a backlog is drained batch by batch
+GAP_SECONDS = 30           # How long a skipped change_id is re-checked (its transaction may still commit)
+MAX_GAP = 1000             # Most skipped ids tracked; wider jumps are auto-increment gaps, not pending commits
+PRUNE_EVERY_SECONDS = 3600 # Each workstation trims the shared log this often
+KEEP_HOURS = 24            # Changes older than this are pruned
+PRUNE_BATCH = 5000         # Rows deleted per statement, so pruning never holds long locks
+
+CHANGE_COLUMNS = "change_id, table_name, row_id, incident_id, related_id, operation"
+TAIL_QUERY = f"SELECT {CHANGE_COLUMNS} FROM ChangeLog WHERE change_id > %s ORDER BY change_id LIMIT %s"
+
+
+class Change(NamedTuple):
+    change_id: int
+    table: str
+    row_id: int
+    incident_id: Optional[int]  # Incident the row belongs to, if any
+    related_id: Optional[int]   # personnel_id of a Deployment row, resource_id of a ResourceUsage row
+    operation: str              # 'I', 'U' or 'D'
+
+
+def latest_change_id(cursor):
+    cursor.execute("SELECT COALESCE(MAX(change_id), 0) FROM ChangeLog")
+    return cursor.fetchone()[0]
+
+
+def fetch_changes(cursor, after, limit=FETCH_BATCH):
+    cursor.execute(TAIL_QUERY, (after, limit))
+    return [Change(*row) for row in cursor.fetchall()]
+
+
+def fetch_gaps(cursor, change_ids):
+    marks = ", ".join(["%s"] * len(change_ids))
+    cursor.execute(f"SELECT {CHANGE_COLUMNS} FROM ChangeLog WHERE change_id IN ({marks})", list(change_ids))
+    return [Change(*row) for row in cursor.fetchall()]
+
+
+def prune(cursor, keep_hours=KEEP_HOURS):
+    """Deletes changes older than ``keep_hours`` in small batches; returns how many were removed."""
+    removed = 0
+    while True:
+        cursor.execute("DELETE FROM ChangeLog WHERE changed_at < NOW() - INTERVAL %s HOUR LIMIT %s",
+                       (keep_hours, PRUNE_BATCH))
+        removed += cursor.rowcount
+        if cursor.rowcount < PRUNE_BATCH:
+            return removed
+
+
+class ChangeTail:
+    """Reads the log forward from a high-water mark (the last change_id delivered).
+
+    change_ids are handed out when a row is written but become visible when its
+    transaction commits, so a later id can show up before an earlier one.  Ids
+    skipped over are remembered and re-checked for GAP_SECONDS; if they never
+    appear their transaction rolled back.
+    """
+
+    def __init__(self, high_water=None):
+        self.high_water = high_water # None: start from the current end of the log
+        self._gaps = {}              # Maps skipped change_id -> monotonic time it was first skipped
+
+    def read(self, cursor):
+        """Returns the changes committed since the last read, oldest first."""
+        if self.high_water is None:
+            self.high_water = latest_change_id(cursor)
+            return []
+        changes = []
+        if self._gaps:
+            found = fetch_gaps(cursor, sorted(self._gaps))
+            for change in found:
+                del self._gaps[change.change_id]
+            changes.extend(found)
+            expired = time.monotonic() - GAP_SECONDS
+            self._gaps = {change_id: seen for change_id, seen in self._gaps.items() if seen > expired}
+        while True:
+            batch = fetch_changes(cursor, self.high_water)
+            now = time.monotonic()
+            for change in batch:
+                if change.change_id - self.high_water - 1 + len(self._gaps) <= MAX_GAP:
+                    for missing in range(self.high_water + 1, change.change_id):
+                        self._gaps[missing] = now
+                self.high_water = change.change_id
+            changes.extend(batch)
+            if len(batch) < FETCH_BATCH:
+                return sorted(changes)
+
+
+class ChangeFeed:
+    """Delivers ChangeLog changes to subscribed windows.
+
+    A daemon thread with its own connection reads the log every ``interval``
+    seconds; the Tk thread picks the changes up with an ``after()`` loop and
+    calls each subscriber once per batch with the changes to its tables.
+    Without the server (or before migration 004) the feed just retries, and
+    windows keep their own refreshes after local writes.
+    ``online`` / ``last_error`` describe the last attempt, as on SyncEngine.
+    """
+
+    def __init__(self, root, config=None, interval=POLL_SECONDS):
+        self.root = root
+        self.config = dict(config or DB_CONFIG, connection_timeout=CONNECT_TIMEOUT,
+                           autocommit=True) # Every read must see the latest commits, not a snapshot
+        self.interval = interval
+        self.online = None
+        self.last_error = None
+        self.tail = ChangeTail()
+        self._subscribers = [] # List of (owner, tables, callback)
+        self._changes = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._after_id = None
+
+    def subscribe(self, tables, callback, owner):
+        """Calls ``callback(changes)`` on the Tk thread whenever rows of ``tables`` change."""
+        self._subscribers.append((owner, frozenset(tables), callback))
+
+    def unsubscribe(self, owner):
+        """Removes every subscription made by ``owner`` (call when a window closes)."""
+        self._subscribers = [entry for entry in self._subscribers if entry[0] is not owner]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="dreams-change-feed", daemon=True)
+        self._thread.start()
+        self._after_id = self.root.after(DISPATCH_MS, self._dispatch)
+
+    def stop(self):
+        self._stop.set()
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self._thread is not None:
+            self._thread.join(timeout=CONNECT_TIMEOUT + 1)
+
+    # --- Listener Thread ---
+
+    def _run(self):
+        # Not instrumented by query_stats: a read every second would drown out the app's own statements
+        while not self._stop.is_set():
+            try:
+                server = mysql.connector.connect(**self.config)
+            except Error as e:
+                self.online, self.last_error = False, str(e)
+                self._stop.wait(RETRY_SECONDS)
+                continue
+            try:
+                self._listen(server)
+            except Error as e:
+                self.online, self.last_error = False, str(e) # e.g. link dropped, or ChangeLog missing (run migrate.py)
+                self._stop.wait(RETRY_SECONDS)
+            finally:
+                try:
+                    server.close()
+                except Error:
+                    pass
+
+    def _listen(self, server):
+        cursor = server.cursor()
+        next_prune = time.monotonic()
+        while not self._stop.is_set():
+            changes = self.tail.read(cursor)
+            self.online, self.last_error = True, None
+            if changes:
+                self._changes.put(changes)
+            if time.monotonic() >= next_prune:
+                prune(cursor)
+                next_prune = time.monotonic() + PRUNE_EVERY_SECONDS
+            self._stop.wait(self.interval)
+
+    # --- Tk Side ---
+
+    def _dispatch(self):
+        changes = []
+        while True:
+            try:
+                changes.extend(self._changes.get_nowait())
+            except queue.Empty:
+                break
+        if changes:
+            for owner, tables, callback in list(self._subscribers):
+                relevant = [change for change in changes if change.table in tables]
+                if not relevant:
+                    continue
+                try:
+                    callback(relevant)
+                except Exception as e:
+                    self.root.report_callback_exception(type(e), e, e.__traceback__)
+        self._after_id = self.root.after(DISPATCH_MS, self._dispatch)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print changes from the ChangeLog as they are committed.")
+    parser.add_argument("--since", type=int, help="Start after this change_id (default: only new changes)")
+    parser.add_argument("--prune", action="store_true", help=f"Delete changes older than {KEEP_HOURS} hours and exit")
+    args = parser.parse_args(argv)
+
+    try:
+        server = mysql.connector.connect(**dict(DB_CONFIG, connection_timeout=CONNECT_TIMEOUT, autocommit=True))
+    except Error as e:
+        print(f"Cannot reach the database: {e}")
+        return 1
+    try:
+        cursor = server.cursor()
+        if args.prune:
+            print(f"{prune(cursor)} change(s) pruned.")
+            return 0
+        tail = ChangeTail(args.since)
+        while True:
+            for change in tail.read(cursor):
+                print(f"{change.change_id:>10} {change.operation} {change.table:<18} ID {change.row_id}"
+                      + (f" (incident {change.incident_id})" if change.incident_id is not None else ""))
+            time.sleep(POLL_SECONDS)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
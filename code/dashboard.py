@@ -0,0 +1,176 @@
+from collections import Counter
+from typing import NamedTuple
+
+from db_connector import fetch_all
+from dispatch import ACTIVE_DEPLOYMENTS, ACTIVE_STATUSES
+from forecast import MAX_REORDER_AT, REORDER_AT
+
+# Counters behind the operations dashboard. They are loaded once and then kept current from
+# ChangeLog changes (change_feed.py): each batch only re-reads the changed rows by primary key,
+# so the dashboard never re-runs the report queries. No Tk imports, like dispatch.py.
+
+_ACTIVE_MARKS = ", ".join(["%s"] * len(ACTIVE_STATUSES))
+
+OPEN_INCIDENTS = f"SELECT incident_id, incident_type FROM ResponseIncidents WHERE status IN ({_ACTIVE_MARKS})"
+# Each item against its own threshold (manual reorder level or forecast reorder point, see forecast.py)
+STOCK_COLUMNS = f"""
+    SELECT R.resource_id, R.item_name, R.stock_level, R.unit_of_measure, {REORDER_AT}
+    FROM Resources AS R
+    LEFT JOIN StockForecast AS F ON F.resource_id = R.resource_id
+"""
+LOW_STOCK = STOCK_COLUMNS + f"WHERE R.stock_level <= ({MAX_REORDER_AT}) AND R.stock_level <= {REORDER_AT}"
+
+
+class LowStockItem(NamedTuple):
+    item_name: str
+    stock_level: int
+    unit_of_measure: str
+    reorder_at: int
+
+
+class BoardDelta(NamedTuple):
+    """Current state of the rows a batch of changes touched, read on a worker thread."""
+    incidents: dict  # Maps changed incident_id -> (incident_type, status), or None if deleted
+    teams: dict      # Maps changed incident_id that is open now -> set of deployed personnel_ids
+    resources: dict  # Maps changed resource_id -> LowStockItem, or None if deleted
+
+
+def _by_ids(conn, query, ids):
+    marks = ", ".join(["%s"] * len(ids))
+    return fetch_all(conn, query.format(ids=marks), list(ids))
+
+
+class OperationsBoard:
+    """Open incidents by type, personnel deployed and low-stock items, maintained incrementally.
+
+    ``load()`` reads the starting state; afterwards ``fetch(conn, changes)``
+    (worker thread) reads just the changed rows and ``apply(changes, delta)``
+    (Tk thread) adjusts the counters.  Applying the same changes twice is
+    harmless, since every step sets state rather than adding to it.
+    """
+
+    def __init__(self):
+        self.open_incidents = {}     # Maps open incident_id -> incident_type
+        self.by_type = Counter()     # Maps incident_type -> number of open incidents
+        self.teams = {}              # Maps open incident_id -> set of deployed personnel_ids
+        self.assignments = Counter() # Maps personnel_id -> number of open incidents they are deployed to
+        self.low_stock = {}          # Maps resource_id -> LowStockItem at or below its reorder level
+
+    @classmethod
+    def load(cls, conn):
+        board = cls()
+        for incident_id, incident_type in fetch_all(conn, OPEN_INCIDENTS, list(ACTIVE_STATUSES)):
+            board._set_incident(incident_id, incident_type)
+        for personnel_id, incident_id in fetch_all(conn, ACTIVE_DEPLOYMENTS, list(ACTIVE_STATUSES)):
+            board._deploy(incident_id, personnel_id)
+        for resource_id, *item in fetch_all(conn, LOW_STOCK):
+            board.low_stock[resource_id] = LowStockItem(*item)
+        return board
+
+    # --- Totals ---
+
+    @property
+    def active_incidents(self):
+        return len(self.open_incidents)
+
+    @property
+    def personnel_deployed(self):
+        """Distinct responders on at least one open incident."""
+        return len(self.assignments)
+
+    def incidents_by_type(self):
+        """``[(incident_type, count)]``, busiest first."""
+        return sorted(self.by_type.items(), key=lambda item: (-item[1], item[0]))
+
+    def low_stock_items(self):
+        """``[LowStockItem]``, lowest stock first."""
+        return sorted(self.low_stock.values(), key=lambda item: (item.stock_level, item.item_name))
+
+    # --- Incremental Updates ---
+
+    def fetch(self, conn, changes):
+        """Reads the current state of every incident, team and resource the changes touched."""
+        incident_ids = {change.row_id for change in changes if change.table == "ResponseIncidents"}
+        # A StockForecast change moves the item's threshold; its row_id is the resource_id
+        resource_ids = {change.row_id for change in changes if change.table in ("Resources", "StockForecast")}
+
+        incidents = dict.fromkeys(incident_ids)
+        if incident_ids:
+            for incident_id, incident_type, status in _by_ids(
+                    conn, "SELECT incident_id, incident_type, status FROM ResponseIncidents WHERE incident_id IN ({ids})",
+                    incident_ids):
+                incidents[incident_id] = (incident_type, status)
+
+        # An incident that (re)opened brings its whole team back onto the board (unique_deployment index)
+        reopened = [pk for pk, row in incidents.items() if row is not None and row[1] in ACTIVE_STATUSES]
+        teams = {pk: set() for pk in reopened}
+        if reopened:
+            for incident_id, personnel_id in _by_ids(
+                    conn, "SELECT incident_id, personnel_id FROM Deployment WHERE incident_id IN ({ids})", reopened):
+                teams[incident_id].add(personnel_id)
+
+        resources = dict.fromkeys(resource_ids)
+        if resource_ids:
+            for resource_id, *item in _by_ids(conn, STOCK_COLUMNS + "WHERE R.resource_id IN ({ids})", resource_ids):
+                resources[resource_id] = LowStockItem(*item)
+        return BoardDelta(incidents, teams, resources)
+
+    def apply(self, changes, delta):
+        """Moves the counters to the state in ``delta`` plus the Deployment changes in ``changes``."""
+        for incident_id, row in delta.incidents.items():
+            if row is not None and row[1] in ACTIVE_STATUSES:
+                self._set_incident(incident_id, row[0])
+            else:
+                self._set_incident(incident_id, None) # Resolved or deleted: its team is released
+        for incident_id, personnel_ids in delta.teams.items():
+            self._set_team(incident_id, personnel_ids)
+
+        for change in changes:
+            # Teams re-read above are already current; other deployments change one responder at a time
+            if change.table != "Deployment" or change.incident_id in delta.teams:
+                continue
+            if change.operation == 'D':
+                self._release(change.incident_id, change.related_id)
+            elif change.incident_id in self.open_incidents:
+                self._deploy(change.incident_id, change.related_id)
+
+        for resource_id, item in delta.resources.items():
+            if item is not None and item.stock_level <= item.reorder_at:
+                self.low_stock[resource_id] = item
+            else:
+                self.low_stock.pop(resource_id, None)
+
+    def _set_incident(self, incident_id, incident_type):
+        previous = self.open_incidents.pop(incident_id, None)
+        if previous is not None:
+            self.by_type[previous] -= 1
+            if not self.by_type[previous]:
+                del self.by_type[previous]
+        if incident_type is None:
+            self._set_team(incident_id, set())
+            return
+        self.open_incidents[incident_id] = incident_type
+        self.by_type[incident_type] += 1
+
+    def _set_team(self, incident_id, personnel_ids):
+        for personnel_id in self.teams.get(incident_id, set()) - personnel_ids:
+            self._release(incident_id, personnel_id)
+        for personnel_id in personnel_ids:
+            self._deploy(incident_id, personnel_id)
+
+    def _deploy(self, incident_id, personnel_id):
+        team = self.teams.setdefault(incident_id, set())
+        if personnel_id not in team:
+            team.add(personnel_id)
+            self.assignments[personnel_id] += 1
+
+    def _release(self, incident_id, personnel_id):
+        team = self.teams.get(incident_id)
+        if team is None or personnel_id not in team:
+            return
+        team.discard(personnel_id)
+        if not team:
+            del self.teams[incident_id]
+        self.assignments[personnel_id] -= 1
+        if not self.assignments[personnel_id]:
+            del self.assignments[personnel_id]
@@ -0,0 +1,172 @@
+import tkinter as tk
+from datetime import datetime
+from tkinter import ttk
+from dashboard import OperationsBoard
+
+FEED_TABLES = ("ResponseIncidents", "Deployment", "Resources", "StockForecast")
+STATUS_MS = 1000 # How often the feed status line is re-checked (in-memory only)
+RETRY_MS = 15000 # Wait before retrying a failed first load (e.g. the server was briefly unreachable)
+
+class DashboardModule(tk.Toplevel):
+    """Live operations board: open incidents by type, responders deployed and low-stock items.
+
+    The counters load once and then move with each change the ChangeFeed
+    reports, re-reading only the changed rows, so it can stay open all day.
+    """
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.executor = master.executor # Runs queries off the Tk thread
+        self.feed = master.feed # Row changes from every workstation
+        self.title("Operations Dashboard")
+        self.geometry("1000x650")
+        # Not modal: it is meant to stay open (e.g. on the EOC wall display) next to the other windows
+
+        self.board = None      # OperationsBoard once loaded
+        self.updated_at = None # When the counters last moved
+        self.error = None      # Why the last load/update failed, shown until the next success
+        self._queued = []      # Changes that arrived while the board was loading or applying a batch
+        self._busy = False
+        self._status_job = None
+        self._retry_job = None
+
+        # --- Headline Counters ---
+        totals_frame = tk.Frame(self)
+        totals_frame.pack(fill='x', padx=10, pady=10)
+        self.active_var = tk.StringVar(value="-")
+        self.deployed_var = tk.StringVar(value="-")
+        self.low_stock_var = tk.StringVar(value="-")
+        for title, variable, colour in (("Active Incidents", self.active_var, 'red'),
+                                        ("Personnel Deployed", self.deployed_var, 'blue'),
+                                        ("Low-Stock Items", self.low_stock_var, 'dark orange')):
+            box = tk.LabelFrame(totals_frame, text=title, font=('Arial', 12, 'bold'))
+            box.pack(side='left', fill='x', expand=True, padx=5)
+            tk.Label(box, textvariable=variable, font=('Arial', 40, 'bold'), fg=colour).pack(pady=5)
+
+        lists_frame = tk.Frame(self)
+        lists_frame.pack(fill='both', expand=True, padx=10)
+
+        # --- Active Incidents by Type ---
+        types_frame = tk.LabelFrame(lists_frame, text="Active Incidents by Type")
+        types_frame.pack(side='left', fill='both', expand=True, padx=5)
+        self.types_tree = ttk.Treeview(types_frame, columns=("Type", "Active"), show='headings')
+        self.types_tree.heading("Type", text="Incident Type")
+        self.types_tree.heading("Active", text="Active")
+        self.types_tree.column("Active", width=80, anchor='center')
+        self.types_tree.pack(fill='both', expand=True)
+
+        # --- Low Stock ---
+        stock_frame = tk.LabelFrame(lists_frame, text="Low-Stock Items")
+        stock_frame.pack(side='right', fill='both', expand=True, padx=5)
+        self.stock_tree = ttk.Treeview(stock_frame, columns=("Item", "Stock", "Reorder", "Unit"), show='headings')
+        self.stock_tree.heading("Item", text="Item Name")
+        self.stock_tree.heading("Stock", text="Stock Level")
+        self.stock_tree.heading("Reorder", text="Reorder At")
+        self.stock_tree.heading("Unit", text="Unit")
+        self.stock_tree.column("Stock", width=90, anchor='center')
+        self.stock_tree.column("Reorder", width=90, anchor='center')
+        self.stock_tree.column("Unit", width=90)
+        self.stock_tree.pack(fill='both', expand=True)
+
+        # --- Status Line ---
+        status_frame = tk.Frame(self)
+        status_frame.pack(fill='x', padx=10, pady=5)
+        self.status_var = tk.StringVar(value="Loading...")
+        tk.Label(status_frame, textvariable=self.status_var, anchor='w').pack(side='left', fill='x', expand=True)
+        tk.Button(status_frame, text="Reload", command=self.load_board).pack(side='right')
+
+        self.feed.subscribe(FEED_TABLES, self.on_changes, owner=self)
+        self.load_board()
+        self.show_status()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    # --- Data Load Methods ---
+
+    def load_board(self):
+        """Reads the starting counters (open incidents, their teams, low-stock items)."""
+        if self._retry_job is not None:
+            self.after_cancel(self._retry_job)
+            self._retry_job = None
+        self._busy = True
+        self._queued = [] # The fresh load already includes them
+
+        def on_success(board):
+            self.board = board
+            self.updated_at, self.error = datetime.now(), None
+            self.show_board()
+            self._finish()
+
+        def on_error(e):
+            self._busy = False
+            self.error = f"Failed to load the dashboard (retrying shortly): {e}"
+            self._retry_job = self.after(RETRY_MS, self.load_board)
+
+        self.executor.submit(OperationsBoard.load, on_success, on_error, owner=self)
+
+    def on_changes(self, changes):
+        """ChangeFeed subscriber: re-reads only the changed rows and moves the counters."""
+        if self.board is None:
+            return # Nothing to move yet; the first (or retried) load reads the current counters
+        self._queued.extend(changes)
+        if not self._busy:
+            self._apply_queued()
+
+    def _apply_queued(self):
+        changes, self._queued = self._queued, []
+        self._busy = True
+        board = self.board
+
+        def on_success(delta):
+            if board is not self.board:
+                return # Reloaded meanwhile; the new board already reflects these changes
+            board.apply(changes, delta)
+            self.updated_at, self.error = datetime.now(), None
+            self.show_board()
+            self._finish()
+
+        def on_error(e):
+            self._busy = False
+            self._queued = changes + self._queued # Retried with the next batch
+            self.error = f"Failed to update the dashboard: {e}"
+
+        self.executor.submit(lambda conn: board.fetch(conn, changes), on_success, on_error, owner=self)
+
+    def _finish(self):
+        self._busy = False
+        if self._queued:
+            self._apply_queued() # Changes that arrived during the last round trip
+
+    # --- Display ---
+
+    def show_board(self):
+        board = self.board
+        self.active_var.set(board.active_incidents)
+        self.deployed_var.set(board.personnel_deployed)
+        self.low_stock_var.set(len(board.low_stock))
+
+        self.types_tree.delete(*self.types_tree.get_children())
+        for incident_type, count in board.incidents_by_type():
+            self.types_tree.insert('', tk.END, values=(incident_type, count))
+        self.stock_tree.delete(*self.stock_tree.get_children())
+        for item in board.low_stock_items():
+            self.stock_tree.insert('', tk.END, values=(item.item_name, item.stock_level, item.reorder_at,
+                                                           item.unit_of_measure))
+
+    def show_status(self):
+        """Shows when the counters last moved and whether live updates are flowing."""
+        if self.error:
+            self.status_var.set(self.error)
+        elif self.board is not None:
+            live = "Live updates paused - use Reload" if self.feed.online is False else "Live"
+            self.status_var.set(f"{live} - last change {self.updated_at:%H:%M:%S}")
+        self._status_job = self.after(STATUS_MS, self.show_status)
+
+    def on_close(self):
+        """Handles closing the Toplevel window."""
+        if self._status_job is not None:
+            self.after_cancel(self._status_job)
+        if self._retry_job is not None:
+            self.after_cancel(self._retry_job)
+        self.executor.cancel(self) # Drop any queries still running for this window
+        self.feed.unsubscribe(self)
+        self.destroy()
@@ -1,5 +1,14 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
+
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errorcode
+from mysql.connector.errors import PoolError
+
+from query_stats import instrument
 
 # Configuration for local XAMPP/MariaDB server
 # NOTE: The default XAMPP user is 'root' with no password.
@@ -11,11 +20,25 @@ DB_CONFIG = {
     'password': ''   # Default XAMPP password (usually empty)
 }
 
+# Connection pool settings
+POOL_SIZE = 5           # Maximum number of open connections shared by all modules
+CHECKOUT_TIMEOUT = 10   # Seconds to wait for a free connection before giving up
+RECONNECT_ATTEMPTS = 3  # Ping/reconnect attempts when a pooled connection has dropped
+RECONNECT_DELAY = 1     # Seconds between reconnect attempts
+
+# Transactions that hit a deadlock / lock wait timeout are retried this many times
+DEADLOCK_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.05 # Doubled after every failed attempt
+RETRYABLE_ERRORS = (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT)
+
+# Server-side prepared statements kept open per connection (least recently used are closed first)
+STATEMENT_CACHE_SIZE = 32
+
 def create_connection():
     """Attempts to create and return a connection to the database."""
     connection = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        connection = instrument(mysql.connector.connect(**DB_CONFIG)) # Every statement is timed (query_stats)
         if connection.is_connected():
             print(f"Successfully connected to MySQL Database: {DB_CONFIG['database']}")
         return connection
@@ -29,8 +52,274 @@ def close_connection(connection):
         connection.close()
         print("MySQL connection closed.")
 
+def fetch_all(connection, query, params=None):
+    """Runs a SELECT on the given connection and returns every row."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, params or ())
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+def execute_write(connection, query, params=None):
+    """Runs a single INSERT/UPDATE/DELETE, commits it and returns the affected row count."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, params or ())
+        connection.commit()
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+def run_transaction(connection, work, retries=DEADLOCK_RETRIES):
+    """Runs ``work(cursor)`` as one transaction and commits it, retrying when InnoDB reports a deadlock."""
+    delay = RETRY_BACKOFF_SECONDS
+    for attempt in range(retries + 1):
+        cursor = connection.cursor()
+        try:
+            result = work(cursor)
+            connection.commit()
+            return result
+        except Error as e:
+            connection.rollback()
+            if e.errno in RETRYABLE_ERRORS and attempt < retries:
+                time.sleep(delay)
+                delay *= 2
+                continue
+            raise
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+
+# --- Prepared Statement Cache ---
+
+class StatementStats:
+    """Hit/miss counters shared by every connection's statement cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def evicted(self):
+        with self._lock:
+            self.evictions += 1
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": round(self.hits / lookups, 4) if lookups else None}
+
+
+STATEMENT_STATS = StatementStats()
+
+
+class StatementCache:
+    """Prepared cursors for one connection, one per fixed SQL statement.
+
+    mysql-connector only re-prepares when a prepared cursor is handed a
+    different statement object, so keeping a cursor per statement (and always
+    executing the string it was first prepared with) means the server parses
+    each hot query once per connection instead of on every call.  Only use it
+    for fixed query text; statements built per call would just churn the cache.
+    """
+
+    def __init__(self, connection, size=STATEMENT_CACHE_SIZE):
+        self.connection = connection
+        self.size = size
+        self._cursors = OrderedDict() # query -> (query object it was prepared with, cursor)
+
+    def execute(self, query, params=()):
+        """Executes ``query`` on its prepared cursor and returns the cursor (for fetchall / rowcount / lastrowid)."""
+        entry = self._cursors.get(query)
+        hit = entry is not None
+        STATEMENT_STATS.record(hit)
+        if not hit:
+            entry = (query, self.connection.cursor(prepared=True))
+            self._cursors[query] = entry
+            if len(self._cursors) > self.size:
+                _, (_, oldest) = self._cursors.popitem(last=False)
+                STATEMENT_STATS.evicted()
+                self._close(oldest)
+        else:
+            self._cursors.move_to_end(query)
+        prepared_query, cursor = entry
+        try:
+            cursor.execute(prepared_query, params)
+        except Error:
+            if not hit: # May have failed to prepare; don't keep a cursor that never worked
+                self._cursors.pop(query, None)
+                self._close(cursor)
+            raise
+        return cursor
+
+    @staticmethod
+    def _close(cursor):
+        try:
+            cursor.close()
+        except Error:
+            pass
+
+    def clear(self, close=True):
+        """Drops every cached statement; ``close=False`` when the server session is already gone."""
+        cursors, self._cursors = self._cursors, OrderedDict()
+        if close:
+            for _, cursor in cursors.values():
+                self._close(cursor)
+
+
+def statement_cache(connection):
+    """Returns the connection's prepared statement cache, creating it on first use."""
+    cache = getattr(connection, "statement_cache", None)
+    if cache is None:
+        cache = connection.statement_cache = StatementCache(connection)
+    return cache
+
+
+def forget_statements(connection):
+    """Forgets cached statements after a reconnect (the new session has none of them)."""
+    cache = getattr(connection, "statement_cache", None)
+    if cache is not None:
+        cache.clear(close=False)
+
+
+def fetch_prepared(connection, query, params=()):
+    """Like fetch_all, but through a cached server-side prepared statement (fixed queries only)."""
+    return statement_cache(connection).execute(query, params).fetchall()
+
+
+def statement_cache_stats():
+    return STATEMENT_STATS.snapshot()
+
+
+class ConnectionPool:
+    """A bounded pool of database connections shared by all DREAMS modules.
+
+    Each module checks out a connection for a single operation using
+    ``with pool.connection() as conn:`` and hands it back when the block ends,
+    so a slow report no longer holds up CRUD work in another window.
+    Connections are opened lazily (up to ``size``), pinged on checkout and
+    reconnected automatically if the server dropped them.
+    """
+
+    def __init__(self, config=None, size=POOL_SIZE, timeout=CHECKOUT_TIMEOUT):
+        self.config = dict(config or DB_CONFIG)
+        self.size = size
+        self.timeout = timeout
+        self._idle = LifoQueue()  # Most recently used first (likeliest to still be alive)
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._connections = []
+        self._closed = False
+
+    def _open(self):
+        """Opens a brand new connection and registers it with the pool."""
+        connection = instrument(mysql.connector.connect(**self.config)) # Every statement is timed (query_stats)
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+    def _discard(self, connection):
+        """Drops a broken connection from the pool."""
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        forget_statements(connection)
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def _health_check(self, connection):
+        """Returns a live connection, reconnecting or replacing it if needed."""
+        if connection is None:
+            return self._open()
+        try:
+            session = connection.connection_id
+            connection.ping(reconnect=True, attempts=RECONNECT_ATTEMPTS, delay=RECONNECT_DELAY)
+            if connection.connection_id != session:
+                forget_statements(connection) # Reconnected: prepared statements died with the old session
+            return connection
+        except Error:
+            self._discard(connection)
+            return self._open()
+
+    def acquire(self):
+        """Checks out a healthy connection, waiting up to ``timeout`` seconds for a free slot."""
+        if self._closed:
+            raise PoolError("The connection pool has been closed.")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(f"No database connection became available within {self.timeout} seconds.")
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except Empty:
+                connection = None
+            return self._health_check(connection)
+        except BaseException: # Any failure (not just a MySQL error) must give the slot back
+            self._slots.release()
+            raise
+
+    def release(self, connection):
+        """Returns a connection to the pool, rolling back any uncommitted work."""
+        try:
+            if self._closed:
+                self._discard(connection)
+                return
+            try:
+                if connection.is_connected() and connection.in_transaction:
+                    connection.rollback()
+                self._idle.put(connection)
+            except Error:
+                self._discard(connection)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection for one operation."""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close_all(self):
+        """Closes every connection owned by the pool (called on application shutdown)."""
+        self._closed = True
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            close_connection(connection)
+
+
+def create_pool(size=POOL_SIZE):
+    """Creates the shared connection pool, verifying the server is reachable first."""
+    pool = ConnectionPool(size=size)
+    try:
+        with pool.connection() as connection:
+            if connection.is_connected():
+                print(f"Successfully connected to MySQL Database: {DB_CONFIG['database']} (pool size {size})")
+        return pool
+    except Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        pool.close_all()
+        return None
+
 # --- Test Connection ---
 if __name__ == "__main__":
-    conn = create_connection()
-    if conn:
-        close_connection(conn)
\ No newline at end of file
+    pool = create_pool()
+    if pool:
+        pool.close_all()
@@ -0,0 +1,301 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from search_picker import SearchPicker
+from repositories import DeploymentRepo
+
+MAX_LISTED = 500 # Available responders shown at once; narrow by unit or name to see the rest
+ALL_UNITS = "All units"
+
+class DeploymentModule(tk.Toplevel):
+    """Dispatches responders (picked one by one or as a whole unit) to an incident and recalls them."""
+
+    def __init__(self, master, incident_id=None):
+        super().__init__(master)
+        self.executor = master.executor # Runs queries off the Tk thread
+        self.cache = master.cache # Shared incident lookup for the picker
+        self.feed = master.feed # Dispatches and recalls made elsewhere (other windows/workstations)
+        self.title("Deployment & Dispatch")
+        self.geometry("1200x700")
+
+        self.transient(master)
+        self.grab_set()
+
+        self.index = None # AvailabilityIndex; filtering and unit expansion happen in memory
+        self.initial_incident_id = incident_id
+
+        # --- Incident Selection ---
+        top_frame = tk.Frame(self)
+        top_frame.pack(fill='x', padx=10, pady=10)
+        tk.Label(top_frame, text="Incident:", font=('Arial', 12, 'bold')).pack(side='left')
+        self.incident_picker = SearchPicker(top_frame, width=60)
+        self.incident_picker.pack(side='left', padx=10)
+        self.incident_picker.bind('<<ComboboxSelected>>', lambda event: self.load_team())
+        self.incident_picker.bind('<Return>', lambda event: self.load_team())
+        tk.Button(top_frame, text="Refresh", command=self.refresh).pack(side='right')
+
+        main_pane = ttk.Panedwindow(self, orient=tk.HORIZONTAL)
+        main_pane.pack(fill='both', expand=True, padx=10, pady=(0, 10))
+
+        # 1. Left Frame: Available responders
+        available_frame = tk.LabelFrame(main_pane, text="Available Responders")
+        main_pane.add(available_frame, weight=3)
+        self.create_available_widgets(available_frame)
+
+        # 2. Right Frame: Team already deployed to the incident
+        team_frame = tk.LabelFrame(main_pane, text="Deployed to Incident")
+        main_pane.add(team_frame, weight=2)
+        self.create_team_widgets(team_frame)
+
+        self.cache.subscribe("incidents", self.on_incidents_loaded, owner=self)
+        # A changed roster (added/renamed/deleted personnel) rebuilds the availability index
+        self.cache.subscribe("personnel", lambda _: self.load_availability(), owner=self)
+        # ...and so does a responder moved to another unit, which leaves the names lookup alone
+        self.feed.subscribe(("Deployment", "ResponseIncidents", "Personnel"), self.on_changes, owner=self)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+
+    # --- Available Responders Panel (Left Side) ---
+
+    def create_available_widgets(self, frame):
+        filter_frame = tk.Frame(frame)
+        filter_frame.pack(fill='x', padx=5, pady=5)
+        tk.Label(filter_frame, text="Unit:").pack(side='left')
+        self.unit_var = tk.StringVar(value=ALL_UNITS)
+        self.unit_combo = ttk.Combobox(filter_frame, textvariable=self.unit_var, state='readonly', width=30)
+        self.unit_combo.pack(side='left', padx=5)
+        self.unit_combo.bind('<<ComboboxSelected>>', lambda event: self.show_available())
+        tk.Label(filter_frame, text="Name:").pack(side='left', padx=(10, 0))
+        self.search_entry = tk.Entry(filter_frame, width=25)
+        self.search_entry.pack(side='left', padx=5)
+        self.search_entry.bind('<KeyRelease>', lambda event: self.show_available())
+
+        columns = ("ID", "Name", "Role", "Specialty", "Unit")
+        self.available_tree = ttk.Treeview(frame, columns=columns, show='headings', selectmode='extended')
+        for col in columns:
+            self.available_tree.heading(col, text=col)
+        self.available_tree.column("ID", width=50, anchor='center')
+        vsb = ttk.Scrollbar(frame, orient="vertical", command=self.available_tree.yview)
+        vsb.pack(side='right', fill='y')
+        self.available_tree.configure(yscrollcommand=vsb.set)
+        self.available_tree.pack(fill='both', expand=True, padx=5)
+
+        self.available_var = tk.StringVar(value="Loading roster...")
+        tk.Label(frame, textvariable=self.available_var, anchor='w').pack(fill='x', padx=5)
+
+        dispatch_frame = tk.Frame(frame)
+        dispatch_frame.pack(fill='x', padx=5, pady=5)
+        tk.Label(dispatch_frame, text="Role on site:").pack(side='left')
+        self.role_entry = tk.Entry(dispatch_frame, width=20)
+        self.role_entry.pack(side='left', padx=5)
+        tk.Button(dispatch_frame, text="DISPATCH WHOLE UNIT", command=self.dispatch_unit, bg='blue', fg='white').pack(side='right', padx=5)
+        tk.Button(dispatch_frame, text="DISPATCH SELECTED", command=self.dispatch_selected, bg='blue', fg='white').pack(side='right', padx=5)
+
+
+    # --- Deployed Team Panel (Right Side) ---
+
+    def create_team_widgets(self, frame):
+        columns = ("ID", "Name", "Unit", "Role on Site", "Deployed At")
+        self.team_tree = ttk.Treeview(frame, columns=columns, show='headings', selectmode='extended')
+        for col in columns:
+            self.team_tree.heading(col, text=col)
+        self.team_tree.column("ID", width=50, anchor='center')
+        self.team_tree.column("Deployed At", width=130)
+        vsb = ttk.Scrollbar(frame, orient="vertical", command=self.team_tree.yview)
+        vsb.pack(side='right', fill='y')
+        self.team_tree.configure(yscrollcommand=vsb.set)
+        self.team_tree.pack(fill='both', expand=True, padx=5, pady=5)
+
+        self.team_var = tk.StringVar(value="Select an incident.")
+        tk.Label(frame, textvariable=self.team_var, anchor='w').pack(fill='x', padx=5)
+        tk.Button(frame, text="Recall Selected", command=self.recall_selected, bg='red', fg='white').pack(pady=5)
+
+
+    # --- Utility/Data Load Methods ---
+
+    def on_incidents_loaded(self, incidents):
+        """Receives the cached incident lookup (shown as "ID X: Type")."""
+        self.incident_picker.set_lookup(incidents)
+        if self.initial_incident_id is not None:
+            self.incident_picker.set_id(self.initial_incident_id)
+            self.initial_incident_id = None
+            self.load_team()
+
+    def on_changes(self, changes):
+        """ChangeFeed subscriber: applies deployment deltas to the availability index in memory.
+
+        Deployment changes carry the responder's id, so they update the index directly; an
+        incident status change (e.g. resolved, freeing its team) or an edited responder
+        needs the index rebuilt.
+        """
+        incident_id = self.incident_picker.get_id()
+        team_changed = rebuild = False
+        for change in changes:
+            if change.table == "Deployment":
+                if self.index is not None and change.operation == 'I':
+                    self.index.mark_deployed(change.incident_id, [change.related_id])
+                elif self.index is not None and change.operation == 'D':
+                    self.index.mark_released(change.incident_id, [change.related_id])
+                team_changed = team_changed or change.incident_id == incident_id
+            elif change.operation != 'I':
+                rebuild = True
+                if change.operation == 'D': # The incident itself, or a responder who may have been on its team
+                    team_changed = team_changed or change.table == "Personnel" or change.row_id == incident_id
+        if rebuild:
+            self.load_availability()
+        elif self.index is not None:
+            self.show_units()
+            self.show_available()
+        if team_changed:
+            self.load_team()
+
+    def refresh(self):
+        self.load_availability()
+        self.load_team()
+
+    def load_availability(self):
+        """Reads the roster and every open deployment once; filtering afterwards is in memory."""
+        def on_success(index):
+            self.index = index
+            self.show_units()
+            self.show_available()
+
+        self.executor.submit(
+            lambda conn: DeploymentRepo(conn).availability(),
+            on_success,
+            lambda e: messagebox.showerror("Database Error", f"Failed to load the roster: {e}"),
+            owner=self,
+        )
+
+    def show_units(self):
+        """Fills the unit filter with each unit's free / total headcount."""
+        self.unit_labels = {ALL_UNITS: None}
+        for unit, free, total in self.index.units():
+            self.unit_labels[f"{unit or '(No unit)'} - {free}/{total} free"] = unit
+        current = self.selected_unit()
+        self.unit_combo['values'] = list(self.unit_labels)
+        self.unit_var.set(next((label for label, unit in self.unit_labels.items() if unit == current), ALL_UNITS))
+
+    def selected_unit(self):
+        """The unit chosen in the filter, or None for all units."""
+        return getattr(self, 'unit_labels', {}).get(self.unit_var.get())
+
+    def show_available(self):
+        """Re-lists available responders for the current unit / name filter (no database access)."""
+        if self.index is None:
+            return
+        responders = self.index.available(self.selected_unit(), self.search_entry.get())
+        self.available_tree.delete(*self.available_tree.get_children())
+        for responder in responders[:MAX_LISTED]:
+            self.available_tree.insert('', tk.END, iid=str(responder.personnel_id), values=(
+                responder.personnel_id, responder.name, responder.role, responder.specialty or "", responder.assigned_unit or ""))
+        shown = f"{len(responders)} available"
+        if len(responders) > MAX_LISTED:
+            shown += f" (first {MAX_LISTED} shown; filter by unit or name to narrow the list)"
+        self.available_var.set(shown)
+
+    def load_team(self):
+        """Loads the responders currently deployed to the selected incident."""
+        incident_id = self.incident_picker.get_id()
+        if incident_id is None:
+            return
+
+        def on_success(team):
+            if incident_id != self.incident_picker.get_id():
+                return # Another incident was picked while this one loaded
+            self.team_tree.delete(*self.team_tree.get_children())
+            for member in team:
+                self.team_tree.insert('', tk.END, iid=str(member.personnel_id), values=(
+                    member.personnel_id, member.name, member.assigned_unit or "", member.role_during_incident or "",
+                    member.deployment_time.strftime('%Y-%m-%d %H:%M')))
+            self.team_var.set(f"{len(team)} responders deployed to Incident ID {incident_id}.")
+
+        self.executor.submit(
+            lambda conn: DeploymentRepo(conn).team(incident_id),
+            on_success,
+            lambda e: messagebox.showerror("Database Error", f"Failed to load the deployed team: {e}"),
+            owner=self,
+        )
+
+
+    # --- Dispatch / Recall ---
+
+    def dispatch(self, personnel_ids):
+        """Sends every id in one batched statement; the server skips anyone deployed meanwhile."""
+        incident_id = self.incident_picker.get_id()
+        if incident_id is None:
+            messagebox.showwarning("Input Error", "Please select an incident first.")
+            return
+        role = self.role_entry.get().strip()
+
+        def on_success(count):
+            # Everyone requested is now busy: deployed here, or (if skipped) already deployed elsewhere
+            if self.index is not None:
+                self.index.mark_deployed(incident_id, personnel_ids)
+                self.show_units()
+                self.show_available()
+            self.load_team()
+            message = f"{count} responders dispatched to Incident ID {incident_id}."
+            if count < len(personnel_ids):
+                message += f"\n{len(personnel_ids) - count} were skipped: already deployed to an open incident."
+            messagebox.showinfo("Dispatched", message)
+
+        self.executor.submit(
+            lambda conn: DeploymentRepo(conn).dispatch(incident_id, personnel_ids, role),
+            on_success,
+            lambda e: messagebox.showerror("Database Error", f"Failed to dispatch responders: {e}"),
+            owner=self,
+        )
+
+    def dispatch_selected(self):
+        personnel_ids = [int(iid) for iid in self.available_tree.selection()]
+        if not personnel_ids:
+            messagebox.showwarning("Selection Error", "Select one or more responders (Ctrl/Shift-click) to dispatch.")
+            return
+        self.dispatch(personnel_ids)
+
+    def dispatch_unit(self):
+        unit = self.selected_unit()
+        if self.index is None or unit is None:
+            messagebox.showwarning("Selection Error", "Choose a unit in the Unit filter first.")
+            return
+        personnel_ids = self.index.unit_members(unit)
+        if not personnel_ids:
+            messagebox.showinfo("Nobody Available", f"Every member of {unit or '(No unit)'} is already deployed.")
+            return
+        if messagebox.askyesno("Confirm Dispatch", f"Dispatch all {len(personnel_ids)} available members of "
+                                                   f"{unit or '(No unit)'} to {self.incident_picker.get()}?"):
+            self.dispatch(personnel_ids)
+
+    def recall_selected(self):
+        """Removes the selected responders from the incident's team."""
+        incident_id = self.incident_picker.get_id()
+        personnel_ids = [int(iid) for iid in self.team_tree.selection()]
+        if incident_id is None or not personnel_ids:
+            messagebox.showwarning("Selection Error", "Select the deployed responders to recall.")
+            return
+        if not messagebox.askyesno("Confirm Recall", f"Recall {len(personnel_ids)} responders from Incident ID {incident_id}?"):
+            return
+
+        def on_success(count):
+            if self.index is not None:
+                self.index.mark_released(incident_id, personnel_ids)
+                self.show_units()
+                self.show_available()
+            self.load_team()
+
+        self.executor.submit(
+            lambda conn: DeploymentRepo(conn).recall(incident_id, personnel_ids),
+            on_success,
+            lambda e: messagebox.showerror("Database Error", f"Failed to recall responders: {e}"),
+            owner=self,
+        )
+
+    def on_close(self):
+        """Handles closing the Toplevel window."""
+        self.executor.cancel(self) # Drop any queries still running for this window
+        self.cache.unsubscribe(self)
+        self.feed.unsubscribe(self)
+        self.grab_release()
+        if isinstance(self.master, tk.Toplevel):
+            self.master.grab_set() # Hand the grab back to the Incident window that opened this one
+        self.destroy()
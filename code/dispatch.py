@@ -0,0 +1,164 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from db_connector import run_transaction
+
+# Dispatching responders to incidents (Deployment rows). Kept free of Tk like repositories.py,
+# so the same statements run from the Deployment window, the sync engine and scripts.
+
+# Incidents in these states tie their deployed responders up; Resolved ones release them
+ACTIVE_STATUSES = ("Active", "Standby")
+_ACTIVE_MARKS = ", ".join(["%s"] * len(ACTIVE_STATUSES))
+
+
+class Responder(NamedTuple):
+    personnel_id: int
+    name: str
+    role: str
+    specialty: Optional[str]
+    assigned_unit: Optional[str]
+
+
+class TeamMember(NamedTuple):
+    deployment_id: int
+    personnel_id: int
+    name: str
+    assigned_unit: Optional[str]
+    role_during_incident: Optional[str]
+    deployment_time: datetime
+
+
+# --- Statements ---
+
+# Everyone who could be dispatched, grouped the way the Deployment window lists them
+ROSTER = "SELECT personnel_id, name, role, specialty, assigned_unit FROM Personnel ORDER BY assigned_unit, name"
+
+# Who is tied up right now: one row per deployment on a still-open incident (idx_incidents_status)
+ACTIVE_DEPLOYMENTS = f"""
+    SELECT
+        D.personnel_id, D.incident_id
+    FROM
+        Deployment AS D
+    JOIN
+        ResponseIncidents AS I ON D.incident_id = I.incident_id
+    WHERE
+        I.status IN ({_ACTIVE_MARKS})
+"""
+
+# The team on one incident (unique_deployment serves the incident_id lookup)
+INCIDENT_TEAM = """
+    SELECT
+        D.deployment_id, D.personnel_id, P.name, P.assigned_unit, D.role_during_incident, D.deployment_time
+    FROM
+        Deployment AS D
+    JOIN
+        Personnel AS P ON D.personnel_id = P.personnel_id
+    WHERE
+        D.incident_id = %s
+    ORDER BY
+        P.assigned_unit, P.name
+"""
+
+
+def dispatch_statement(count):
+    """One INSERT ... SELECT for ``count`` responders.
+
+    The server re-checks availability (nobody already on an open incident) and
+    the no-op ON DUPLICATE KEY UPDATE skips anyone already on this incident
+    (unique_deployment), so rowcount is exactly the number of people dispatched.
+    """
+    id_marks = ", ".join(["%s"] * count)
+    return f"""
+        INSERT INTO Deployment (incident_id, personnel_id, deployment_time, role_during_incident)
+        SELECT %s, P.personnel_id, NOW(), %s
+        FROM Personnel AS P
+        WHERE P.personnel_id IN ({id_marks})
+          AND NOT EXISTS (
+              SELECT 1 FROM Deployment AS D
+              JOIN ResponseIncidents AS I ON D.incident_id = I.incident_id
+              WHERE D.personnel_id = P.personnel_id AND I.status IN ({_ACTIVE_MARKS})
+          )
+        ON DUPLICATE KEY UPDATE incident_id = Deployment.incident_id
+    """
+
+
+def apply_dispatch(cursor, incident_id, personnel_ids, role=None):
+    """The dispatch statement inside the caller's transaction; returns how many were dispatched."""
+    ids = sorted(set(personnel_ids))
+    if not ids:
+        return 0
+    cursor.execute(dispatch_statement(len(ids)), [incident_id, role or None, *ids, *ACTIVE_STATUSES])
+    return cursor.rowcount
+
+
+def dispatch(conn, incident_id, personnel_ids, role=None):
+    """Deploys every available responder in ``personnel_ids`` to the incident in one round trip.
+
+    Responders already on this incident or on another open one are skipped;
+    returns the number actually dispatched.
+    """
+    return run_transaction(conn, lambda cursor: apply_dispatch(cursor, incident_id, personnel_ids, role))
+
+
+def apply_recall(cursor, incident_id, personnel_ids):
+    ids = sorted(set(personnel_ids))
+    if not ids:
+        return 0
+    cursor.execute(f"DELETE FROM Deployment WHERE incident_id = %s AND personnel_id IN ({', '.join(['%s'] * len(ids))})",
+                   [incident_id, *ids])
+    return cursor.rowcount
+
+
+def recall(conn, incident_id, personnel_ids):
+    """Removes responders from an incident's team in one statement; returns how many were removed."""
+    return run_transaction(conn, lambda cursor: apply_recall(cursor, incident_id, personnel_ids))
+
+
+# --- Availability Index ---
+
+class AvailabilityIndex:
+    """The roster and who is currently deployed, held in memory by the Deployment window.
+
+    Filtering by unit or name and expanding "whole unit" into ids happen here,
+    so they are instant and never touch the database.  After a dispatch or
+    recall the window updates the index directly (``mark_deployed`` /
+    ``mark_released``) instead of reloading it.
+    """
+
+    def __init__(self, roster, active_deployments):
+        self.people = {}   # Maps personnel_id -> Responder
+        self.by_unit = {}  # Maps unit -> personnel_ids in name order
+        for row in roster:
+            responder = Responder(*row)
+            self.people[responder.personnel_id] = responder
+            self.by_unit.setdefault(responder.assigned_unit or "", []).append(responder.personnel_id)
+        self.busy = {}     # Maps personnel_id -> incident_id they are deployed to
+        for personnel_id, incident_id in active_deployments:
+            self.busy[personnel_id] = incident_id
+
+    def is_available(self, personnel_id):
+        return personnel_id in self.people and personnel_id not in self.busy
+
+    def units(self):
+        """``[(unit, available, total)]`` in unit order ("" is unassigned)."""
+        return [(unit, sum(1 for pk in ids if pk not in self.busy), len(ids)) for unit, ids in sorted(self.by_unit.items())]
+
+    def available(self, unit=None, text=""):
+        """Available responders, optionally only one unit's and only names containing every typed word."""
+        ids = self.by_unit.get(unit, []) if unit is not None else [pk for ids in self.by_unit.values() for pk in ids]
+        words = text.lower().split()
+        return [self.people[pk] for pk in ids
+                if pk not in self.busy and all(word in self.people[pk].name.lower() for word in words)]
+
+    def unit_members(self, unit):
+        """Ids of everyone in ``unit`` who is free to go."""
+        return [pk for pk in self.by_unit.get(unit, []) if pk not in self.busy]
+
+    def mark_deployed(self, incident_id, personnel_ids):
+        for personnel_id in personnel_ids:
+            self.busy.setdefault(personnel_id, incident_id) # Skipped ones stay with their own incident
+
+    def mark_released(self, incident_id, personnel_ids):
+        for personnel_id in personnel_ids:
+            if self.busy.get(personnel_id) == incident_id:
+                del self.busy[personnel_id]
@@ -0,0 +1,233 @@
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+from db_connector import POOL_SIZE, create_pool
+from report_definitions import PERIODS, REPORTS, period_start
+from report_export import WRITERS, export_query, export_report
+
+# Headless entry point for cron / scheduled tasks: runs Reports-window reports and the queries
+# saved in 03_reporting_queries.sql straight to files, several at once over a connection pool.
+# Nothing imported here (directly or through the modules above) pulls in tkinter, so it starts
+# quickly on a server without a display.
+
+SAVED_QUERIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database",
+                                  "03_reporting_queries.sql")
+SAVED_PREFIX = "sql:" # Saved queries are selected as sql:<number>, e.g. sql:3
+DEFAULT_JOBS = 3      # Reports exported at the same time; each holds one pooled connection
+
+_TITLE = re.compile(r"^--\s*(\d+)\.\s*(.+)$")
+_ORDER_BY = re.compile(r"\bORDER\s+BY\b", re.IGNORECASE)
+_ORDER_TERM = re.compile(r"^(?:\w+\.)?(\w+)(\s+(?:ASC|DESC))?$", re.IGNORECASE)
+
+
+class SavedQuery(NamedTuple):
+    number: int
+    title: str
+    sql: str
+
+
+class Job(NamedTuple):
+    """One report or saved query to export."""
+    name: str        # Report name, or sql:<number>
+    title: str
+    path: str
+
+
+def load_saved_queries(path=SAVED_QUERIES_PATH):
+    """The numbered SELECTs of 03_reporting_queries.sql, each under its "-- N. Title" comment."""
+    with open(path, encoding="utf-8") as handle:
+        lines = handle.read().splitlines()
+    queries, title, current = {}, None, []
+    for line in lines:
+        stripped = line.strip()
+        match = _TITLE.match(stripped)
+        if match and not current:
+            title = (int(match.group(1)), match.group(2).strip())
+            continue
+        if not current and (not stripped or stripped.startswith("--")):
+            continue
+        current.append(line)
+        if stripped.endswith(";"):
+            sql = "\n".join(current).strip()[:-1].strip()
+            if title is not None and sql.upper().startswith(("SELECT", "WITH")):
+                queries[title[0]] = SavedQuery(title[0], title[1], sql)
+            title, current = None, []
+    return queries
+
+
+def split_order_by(sql):
+    """Splits a query into ``(body, outer ORDER BY)``; the order names the result columns of ``saved``.
+
+    MariaDB ignores an ORDER BY inside a derived table without LIMIT, so a
+    wrapped query has to be sorted again outside. Each term must name a
+    selected column (``I.date_reported DESC`` becomes ``saved.date_reported DESC``).
+    """
+    matches = list(_ORDER_BY.finditer(sql))
+    if not matches or sql[matches[-1].end():].count("(") != sql[matches[-1].end():].count(")"):
+        return sql, ""
+    body, order = sql[:matches[-1].start()].rstrip(), sql[matches[-1].end():].strip()
+    terms = []
+    for term in order.split(","):
+        match = _ORDER_TERM.match(term.strip())
+        if match is None:
+            raise ValueError(f"Cannot re-apply ORDER BY {order} to a date-limited query.")
+        terms.append(f"saved.{match.group(1)}{match.group(2) or ''}")
+    return body, " ORDER BY " + ", ".join(terms)
+
+
+def date_range(sql, column, since=None, until=None):
+    """Wraps a saved query so only rows with ``column`` from ``since`` and before ``until`` are returned.
+
+    Returns ``(query, params)``; the saved query's row order is kept.
+    """
+    if not re.fullmatch(r"\w+", column):
+        raise ValueError(f"Invalid date column '{column}'.")
+    bounds = [(f"saved.{column} >= %s", since), (f"saved.{column} < %s", until)]
+    bounds = [(condition, value) for condition, value in bounds if value is not None]
+    if not bounds:
+        return sql, ()
+    body, order = split_order_by(sql)
+    where = " AND ".join(condition for condition, _ in bounds)
+    return f"SELECT * FROM ({body}) AS saved WHERE {where}{order}", tuple(value for _, value in bounds)
+
+
+def slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+def parse_date(text):
+    try:
+        return datetime.strptime(text, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a date (use YYYY-MM-DD)")
+
+
+# --- Running ---
+
+def run_job(pool, job, saved, fmt, since, until, date_column):
+    """Exports one report or saved query on its own pooled connection; returns the row count.
+
+    The file is written under a temporary name and renamed when complete, so
+    whatever picks the files up never sees a half-written or failed export.
+    """
+    root, extension = os.path.splitext(job.path)
+    partial = f"{root}.part{extension}"
+    try:
+        with pool.connection() as conn:
+            if job.name in REPORTS:
+                count = export_report(conn, job.name, partial, fmt, since=since, until=until)
+            else:
+                query = saved[int(job.name[len(SAVED_PREFIX):])]
+                sql, params = date_range(query.sql, date_column, since, until) if date_column else (query.sql, ())
+                count = export_query(conn, job.title, sql, partial, fmt, params)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    os.replace(partial, job.path)
+    return count
+
+
+def run_jobs(jobs, saved, fmt, since=None, until=None, date_column=None, workers=DEFAULT_JOBS):
+    """Runs ``jobs`` in parallel (``workers`` at a time); returns ``{job: row count or exception}``."""
+    pool = create_pool(size=min(workers, POOL_SIZE))
+    if pool is None:
+        return None
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dreams-cli") as executor:
+            started = {executor.submit(run_job, pool, job, saved, fmt, since, until, date_column):
+                       (job, time.perf_counter()) for job in jobs}
+            for future in as_completed(started):
+                job, began = started[future]
+                try:
+                    results[job] = future.result()
+                    print(f"{job.title}: {results[job]} rows -> {job.path} ({time.perf_counter() - began:.1f}s)")
+                except Exception as e:
+                    results[job] = e
+                    print(f"{job.title}: FAILED - {e}", file=sys.stderr)
+    finally:
+        pool.close_all()
+    return results
+
+
+# --- Command Line ---
+
+def list_sources(saved):
+    print("Reports (Reports window):")
+    for name, report in REPORTS.items():
+        print(f"  {name}" + ("" if report.get('date_column') else "  [no date range: always covers all data]"))
+    print("Saved queries (03_reporting_queries.sql):")
+    for number, query in sorted(saved.items()):
+        print(f"  {SAVED_PREFIX}{number}  {query.title}")
+
+
+def main(argv=None):
+    """e.g. ``python dreams_cli.py run --all --from 2025-01-01 --to 2025-12-31 --format xlsx -o reports``."""
+    parser = argparse.ArgumentParser(description="Run DREAMS reports and saved queries without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List the reports and saved queries that can be run")
+
+    run_cmd = commands.add_parser("run", help="Export reports / saved queries to files")
+    run_cmd.add_argument("names", nargs="*", help=f"Report names as shown on their tabs, or {SAVED_PREFIX}<number>")
+    run_cmd.add_argument("--all", action="store_true", help="Every report in the Reports window")
+    run_cmd.add_argument("--format", choices=list(WRITERS), default="csv", help="Output format (default csv)")
+    run_cmd.add_argument("-o", "--output-dir", default=".", help="Directory for the files (default: current)")
+    run_cmd.add_argument("--stamp", action="store_true", help="Add today's date to each file name")
+    run_cmd.add_argument("--from", dest="since", type=parse_date, help="First date to include (YYYY-MM-DD)")
+    run_cmd.add_argument("--to", dest="until", type=parse_date, help="Last date to include (YYYY-MM-DD)")
+    run_cmd.add_argument("--period", choices=PERIODS, help="Shortcut for --from (e.g. \"Year to Date\")")
+    run_cmd.add_argument("--date-column", help="Result column the date range applies to, for saved queries")
+    run_cmd.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                         help=f"Exports run at the same time (default {DEFAULT_JOBS}, at most {POOL_SIZE})")
+    args = parser.parse_args(argv)
+
+    saved = load_saved_queries()
+    if args.command == "list":
+        list_sources(saved)
+        return 0
+
+    names = list(REPORTS) if args.all else []
+    names += [name for name in args.names if name not in names]
+    for name in names:
+        if name not in REPORTS and not (name.startswith(SAVED_PREFIX) and name[len(SAVED_PREFIX):].isdigit()
+                                        and int(name[len(SAVED_PREFIX):]) in saved):
+            parser.error(f"Unknown report or saved query '{name}' (see 'python dreams_cli.py list').")
+    if not names:
+        parser.error("Name at least one report or saved query, or use --all.")
+    if not 1 <= args.jobs <= POOL_SIZE:
+        parser.error(f"--jobs must be between 1 and {POOL_SIZE}.")
+
+    since = args.since or (period_start(args.period) if args.period else None)
+    until = args.until + timedelta(days=1) if args.until else None # --to is inclusive
+    if since and until and since >= until:
+        parser.error("--from must not be after --to.")
+    if since or until:
+        for name in names:
+            if name in REPORTS and not REPORTS[name].get('date_column'):
+                print(f"Note: '{name}' has no date column and covers all data.", file=sys.stderr)
+            elif name not in REPORTS and not args.date_column:
+                print(f"Note: {name} covers all data (give --date-column to limit it).", file=sys.stderr)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stamp = f"_{date.today():%Y-%m-%d}" if args.stamp else ""
+    jobs = []
+    for name in names:
+        title = name if name in REPORTS else saved[int(name[len(SAVED_PREFIX):])].title
+        file_name = slug(name if name in REPORTS else f"query_{name[len(SAVED_PREFIX):]}_{title}")[:80]
+        jobs.append(Job(name, title, os.path.join(args.output_dir, f"{file_name}{stamp}.{args.format}")))
+
+    results = run_jobs(jobs, saved, args.format, since, until, args.date_column, args.jobs)
+    if results is None:
+        return 1
+    return 1 if any(isinstance(result, Exception) for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import argparse
+import sys
+
+from db_connector import create_connection, close_connection, fetch_all
+from change_feed import FETCH_BATCH, TAIL_QUERY
+from dashboard import LOW_STOCK, OPEN_INCIDENTS
+from dispatch import ACTIVE_DEPLOYMENTS, ACTIVE_STATUSES, INCIDENT_TEAM, ROSTER
+from forecast import LONG_WINDOW, STALE_RESOURCES, STOCK_OUTLOOK, WINDOW_USAGE
+from grid_definitions import INCIDENT_GRID, INCIDENT_GRID_YTD, LOOKUPS, PERSONNEL_GRID, RESOURCE_GRID
+from report_definitions import REPORTS, period_start, report_pager, report_params
+
+PAGE_SIZE = 100  # Same page size the grids use
+MIN_ROWS = 1000  # Plan steps estimated below this many rows are not flagged (tiny tables are cheap to scan)
+
+YEAR_START = period_start("Year to Date")
+
+# Grids: pager, the updated_at columns their incremental refresh filters on, and plan problems
+# that are accepted for a documented reason.
+GRIDS = {
+    "Personnel grid": (PERSONNEL_GRID, ["updated_at"], {}),
+    "Incident grid": (INCIDENT_GRID, ["I.updated_at", "P.updated_at"], {
+        # The change filter ORs over two joined tables, so it cannot use either updated_at index
+        "changes": {"ALL"},
+    }),
+    "Inventory grid": (RESOURCE_GRID, ["updated_at"], {
+        # TreeviewSync loads the whole inventory once per window by design
+        "full": {"ALL", "filesort"},
+    }),
+}
+
+
+def plan_problems(plan_rows, min_rows):
+    """Returns the plan steps that read a whole table or sort without an index."""
+    problems = []
+    for step in plan_rows:
+        estimated = int(step.get("rows") or 0)
+        if estimated < min_rows:
+            continue
+        if step.get("type") == "ALL":
+            problems.append(("ALL", f"full scan of {step.get('table')} (~{estimated} rows)"))
+        if "filesort" in (step.get("Extra") or ""):
+            problems.append(("filesort", f"filesort on {step.get('table')} (~{estimated} rows)"))
+    return problems
+
+
+def explain(conn, query, params):
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("EXPLAIN " + query, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def pager_queries(conn, name, pager, version_columns=(), params=()):
+    """The queries a paged/synced grid issues: first page, a continuation page, full load and change sync."""
+    queries = [(f"{name} [first page]", "page") + pager.page_query(PAGE_SIZE, params=params)]
+    first = pager.fetch_page(conn, 1, params=params)
+    if first:
+        # Use a real row's key so the optimizer sees a realistic seek position
+        after = pager.row_key(first[0])
+        queries.append((f"{name} [next page]", "page") + pager.page_query(PAGE_SIZE, after=after, params=params))
+    if version_columns:
+        queries.append((f"{name} [full load]", "full", pager.full_query(), []))
+        condition = "(" + " OR ".join(f"{column} >= %s" for column in version_columns) + ")"
+        since = fetch_all(conn, "SELECT CURRENT_TIMESTAMP(6) - INTERVAL 5 SECOND")[0][0]
+        queries.append((f"{name} [changes]", "changes", pager.render([condition]), [since] * len(version_columns)))
+    return queries
+
+
+def collect_queries(conn):
+    """Every query shape the modules issue, as (label, sql, params, allowed plan problems)."""
+    catalogue = []
+    for name, (pager, version_columns, allowed) in GRIDS.items():
+        for label, kind, query, params in pager_queries(conn, name, pager, version_columns):
+            catalogue.append((label, query, params, allowed.get(kind, set())))
+    for label, _, query, params in pager_queries(conn, "Incident grid (year to date)", INCIDENT_GRID_YTD,
+                                                 params=(YEAR_START,)):
+        catalogue.append((label, query, params, set()))
+    for name, report in REPORTS.items():
+        for label, _, query, params in pager_queries(conn, f"Report: {name}", report_pager(report)):
+            catalogue.append((label, query, params, set()))
+        if report.get('date_column'):
+            pager, params = report_pager(report, YEAR_START), report_params(report, YEAR_START)
+            for label, _, query, params in pager_queries(conn, f"Report: {name} (year to date)", pager, params=params):
+                catalogue.append((label, query, params, set()))
+    for name, (query, _) in LOOKUPS.items():
+        catalogue.append((f"Lookup: {name}", query, [], set()))
+    # The Deployment window reads the whole roster once into its availability index by design
+    catalogue.append(("Deployment: roster", ROSTER, [], {"ALL", "filesort"}))
+    catalogue.append(("Deployment: active deployments", ACTIVE_DEPLOYMENTS, list(ACTIVE_STATUSES), set()))
+    # One incident's team is small; sorting it by unit and name needs no index
+    catalogue.append(("Deployment: incident team", INCIDENT_TEAM, [1], {"filesort"}))
+    catalogue.append(("Change feed: tail", TAIL_QUERY, [0, FETCH_BATCH], set()))
+    catalogue.append(("Dashboard: open incidents", OPEN_INCIDENTS, list(ACTIVE_STATUSES), set()))
+    catalogue.append(("Dashboard: low stock", LOW_STOCK, [], set()))
+    catalogue.append(("Forecast: usage window", WINDOW_USAGE, [LONG_WINDOW], set()))
+    # The daily refresh checks every resource's forecast by design
+    catalogue.append(("Forecast: stale resources", STALE_RESOURCES, [], {"ALL"}))
+    catalogue.append(("Forecast: stock outlook", STOCK_OUTLOOK, [1], set()))
+    return catalogue
+
+
+def run_check(conn, min_rows=MIN_ROWS, verbose=False):
+    """EXPLAINs every catalogued query; returns the number of queries whose plan regressed."""
+    failures = 0
+    for label, query, params, allowed in collect_queries(conn):
+        plan = explain(conn, query, params)
+        problems = [message for kind, message in plan_problems(plan, min_rows) if kind not in allowed]
+        status = "FAIL" if problems else "ok"
+        print(f"{status:<5} {label}")
+        for message in problems:
+            print(f"      - {message}")
+        if verbose:
+            for step in plan:
+                print(f"        {step.get('table')}: type={step.get('type')} key={step.get('key')} "
+                      f"rows={step.get('rows')} extra={step.get('Extra')}")
+        failures += bool(problems)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail if any application query plans a full scan or filesort.")
+    parser.add_argument("--min-rows", type=int, default=MIN_ROWS,
+                        help=f"Ignore plan steps estimated below this many rows (default {MIN_ROWS}; use 0 to flag everything)")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan step")
+    args = parser.parse_args(argv)
+
+    connection = create_connection()
+    if connection is None:
+        return 2
+    try:
+        failures = run_check(connection, args.min_rows, args.verbose)
+    finally:
+        close_connection(connection)
+    print(f"{failures} query plan(s) regressed." if failures else "All query plans use indexes.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+import argparse
+import math
+import sys
+import time
+from typing import NamedTuple, Optional
+
+from db_connector import create_connection, close_connection, run_transaction
+
+try:
+    import numpy # Optional: vectorizes the full refresh; a plain loop is used without it
+except ImportError:
+    numpy = None
+
+# Per-resource burn rates and reorder points for the low-stock alerts. Usage is read from
+# DailyResourceUsage (database/migrations/005_stock_forecast.sql), which triggers keep at one
+# row per resource and day, so a refresh reads LONG_WINDOW days however long the history is.
+# Results are cached in StockForecast: usage writes refresh their own resources in the same
+# transaction (inventory.py) and the main window refreshes the rest once a day.
+
+SHORT_WINDOW = 7       # Days; recent use, so a sudden surge raises the burn rate quickly
+LONG_WINDOW = 28       # Days; steady use, so one quiet week does not drop it
+LEAD_TIME_DAYS = 7     # Days from reordering to the stock arriving
+SERVICE_FACTOR = 1.65  # Standard deviations of safety stock (about a 95% chance of not running out)
+LOW_STOCK_LEVEL = 5    # Floor: items at or below this are always low, whatever their forecast
+IN_LIMIT = 500         # Above this many resources a refresh reads the whole window instead of an IN list
+
+# Alert threshold and days of cover for Resources R LEFT JOIN StockForecast F. A manual reorder
+# level wins; otherwise the forecast reorder point, but never below the floor.
+REORDER_AT = f"COALESCE(F.reorder_level, GREATEST(COALESCE(F.reorder_point, 0), {LOW_STOCK_LEVEL}))"
+DAYS_OF_COVER = "ROUND(R.stock_level / NULLIF(F.daily_burn, 0), 1)"
+# No item's threshold is above this, so "R.stock_level <= (MAX_REORDER_AT)" narrows a low-stock
+# search to a range of idx_resources_stock (migration 001) before each item's own threshold is applied
+MAX_REORDER_AT = (f"SELECT GREATEST(COALESCE(MAX(COALESCE(reorder_level, reorder_point)), 0), {LOW_STOCK_LEVEL}) "
+                  "FROM StockForecast")
+
+# days_ago is 0 for today; the range is on idx_daily_usage_date (or the primary key with ids)
+WINDOW_USAGE = """
+    SELECT resource_id, DATEDIFF(CURDATE(), usage_date) AS days_ago, quantity_used
+    FROM DailyResourceUsage
+    WHERE usage_date > CURDATE() - INTERVAL %s DAY
+"""
+
+# Rows never computed, or computed before today (the window has moved on since)
+STALE_RESOURCES = """
+    SELECT R.resource_id
+    FROM Resources AS R
+    LEFT JOIN StockForecast AS F ON F.resource_id = R.resource_id
+    WHERE F.computed_at IS NULL OR F.computed_at < CURDATE()
+"""
+
+# reorder_level is left alone: it belongs to whoever set it
+UPSERT_FORECAST = """
+    INSERT INTO StockForecast (resource_id, daily_burn, burn_stddev, reorder_point, computed_at)
+    VALUES (%s, %s, %s, %s, NOW(6))
+    ON DUPLICATE KEY UPDATE
+        daily_burn = VALUES(daily_burn),
+        burn_stddev = VALUES(burn_stddev),
+        reorder_point = VALUES(reorder_point),
+        computed_at = VALUES(computed_at)
+"""
+
+SET_REORDER_LEVEL = """
+    INSERT INTO StockForecast (resource_id, reorder_level) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE reorder_level = VALUES(reorder_level)
+"""
+
+STOCK_OUTLOOK = f"""
+    SELECT F.reorder_level, F.daily_burn, F.reorder_point, {REORDER_AT} AS reorder_at, {DAYS_OF_COVER} AS days_of_cover
+    FROM Resources AS R
+    LEFT JOIN StockForecast AS F ON F.resource_id = R.resource_id
+    WHERE R.resource_id = %s
+"""
+
+
+class Forecast(NamedTuple):
+    resource_id: int
+    daily_burn: float
+    burn_stddev: float
+    reorder_point: int
+
+
+class StockOutlook(NamedTuple):
+    """One resource's forecast as shown in the Resources window (fields are None before the first refresh)."""
+    reorder_level: Optional[int]
+    daily_burn: Optional[float]
+    reorder_point: Optional[int]
+    reorder_at: int
+    days_of_cover: Optional[float]
+
+
+# --- Computation ---
+
+def reorder_point(daily_burn, burn_stddev):
+    """Expected use over the lead time plus safety stock for its variability."""
+    return math.ceil(round(daily_burn * LEAD_TIME_DAYS + SERVICE_FACTOR * burn_stddev * math.sqrt(LEAD_TIME_DAYS), 6))
+
+
+def compute_forecasts(resource_ids, rows):
+    """Forecasts for ``resource_ids`` from ``(resource_id, days_ago, quantity)`` rows of the window.
+
+    Each resource gets a LONG_WINDOW-day series (days without use are zero);
+    its burn rate is the higher of the short and long window means.
+    """
+    index = {resource_id: position for position, resource_id in enumerate(resource_ids)}
+    cells = [(index[resource_id], LONG_WINDOW - 1 - days_ago, quantity)
+             for resource_id, days_ago, quantity in rows
+             if resource_id in index and 0 <= days_ago < LONG_WINDOW]
+
+    if numpy is None:
+        usage = [[0] * LONG_WINDOW for _ in resource_ids]
+        for row, day, quantity in cells:
+            usage[row][day] = max(quantity, 0) # Rollups from before migration 007 could go below zero
+        forecasts = []
+        for resource_id, days in zip(resource_ids, usage):
+            mean = sum(days) / LONG_WINDOW
+            burn = max(sum(days[-SHORT_WINDOW:]) / SHORT_WINDOW, mean)
+            spread = math.sqrt(sum((day - mean) ** 2 for day in days) / LONG_WINDOW)
+            forecasts.append(Forecast(resource_id, round(burn, 3), round(spread, 3), reorder_point(burn, spread)))
+        return forecasts
+
+    usage = numpy.zeros((len(resource_ids), LONG_WINDOW))
+    if cells:
+        row, day, quantity = (numpy.array(column) for column in zip(*cells))
+        usage[row, day] = quantity
+    numpy.maximum(usage, 0, out=usage)
+    mean = usage.mean(axis=1)
+    burn = numpy.maximum(usage[:, -SHORT_WINDOW:].mean(axis=1), mean)
+    spread = usage.std(axis=1)
+    points = numpy.ceil(numpy.round(burn * LEAD_TIME_DAYS + SERVICE_FACTOR * spread * math.sqrt(LEAD_TIME_DAYS), 6))
+    return [Forecast(*values) for values in zip(resource_ids, numpy.round(burn, 3).tolist(),
+                                                numpy.round(spread, 3).tolist(), points.astype(int).tolist())]
+
+
+# --- Cache Maintenance ---
+
+def window_usage(cursor, resource_ids=None):
+    query, params = WINDOW_USAGE, [LONG_WINDOW]
+    if resource_ids is not None and len(resource_ids) <= IN_LIMIT:
+        query += f" AND resource_id IN ({', '.join(['%s'] * len(resource_ids))})"
+        params += list(resource_ids)
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+def apply_forecasts(cursor, resource_ids=None):
+    """Recomputes the forecasts of ``resource_ids`` (default: every resource) inside the caller's transaction.
+
+    Returns how many were written.
+    """
+    if resource_ids is None:
+        cursor.execute("SELECT resource_id FROM Resources")
+        resource_ids = [resource_id for resource_id, in cursor.fetchall()]
+        rows = window_usage(cursor)
+    else:
+        resource_ids = sorted(set(resource_ids))
+        rows = window_usage(cursor, resource_ids) if resource_ids else []
+    if not resource_ids:
+        return 0
+    cursor.executemany(UPSERT_FORECAST, compute_forecasts(resource_ids, rows))
+    return len(resource_ids)
+
+
+def refresh_forecasts(conn, resource_ids=None):
+    """Recomputes and commits the forecasts of ``resource_ids`` (default: every resource)."""
+    return run_transaction(conn, lambda cursor: apply_forecasts(cursor, resource_ids))
+
+
+def refresh_stale(conn):
+    """Recomputes only the forecasts missing or not yet computed today; returns how many."""
+    def work(cursor):
+        cursor.execute(STALE_RESOURCES)
+        stale = [resource_id for resource_id, in cursor.fetchall()]
+        return apply_forecasts(cursor, stale)
+    return run_transaction(conn, work)
+
+
+# --- Command Line ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute the per-resource burn rates and reorder points.")
+    parser.add_argument("--all", action="store_true", help="Recompute every resource, not just stale ones")
+    parser.add_argument("--resource", type=int, nargs="*", help="Recompute only these resource IDs")
+    args = parser.parse_args(argv)
+
+    connection = create_connection()
+    if connection is None:
+        return 1
+    try:
+        started = time.perf_counter()
+        if args.resource:
+            count = refresh_forecasts(connection, args.resource)
+        elif args.all:
+            count = refresh_forecasts(connection)
+        else:
+            count = refresh_stale(connection)
+        print(f"{count} forecast(s) recomputed in {time.perf_counter() - started:.2f}s"
+              + ("" if numpy is not None else " (numpy not installed; plain Python used)") + ".")
+        return 0
+    finally:
+        close_connection(connection)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
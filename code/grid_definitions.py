@@ -0,0 +1,45 @@
+from keyset_pager import KeysetPager
+
+# Grid and lookup queries used by the modules. Kept free of Tk imports so the headless
+# tools (explain_check, benchmark) can run exactly the same SQL.
+
+# Personnel grid, in personnel_id order
+PERSONNEL_GRID = KeysetPager(
+    "SELECT personnel_id, name, role, specialty, contact_number, assigned_unit FROM Personnel {where} ORDER BY {order}",
+    key=[("personnel_id", 0)], descending=False,
+)
+
+# Inventory grid, alphabetical
+RESOURCE_GRID = KeysetPager(
+    "SELECT resource_id, item_name, category, stock_level, unit_of_measure FROM Resources {where} ORDER BY {order}",
+    key=[("item_name", 1), ("resource_id", 0)], descending=False,
+)
+
+# Join Incidents with Personnel (P) on commander_id to display the commander's name.
+# Paged by (date_reported, incident_id) so only the visible window of incidents is fetched.
+# commander_id is a hidden column used to preselect the Commander picker by id.
+INCIDENT_GRID = KeysetPager("""
+    SELECT 
+        I.incident_id, I.incident_type, I.incident_location, I.date_reported, I.status, P.name,
+        I.commander_id
+    FROM 
+        ResponseIncidents AS I
+    JOIN 
+        Personnel AS P ON I.commander_id = P.personnel_id
+    {where}
+    ORDER BY
+        {order}
+""", key=[("I.date_reported", 3), ("I.incident_id", 0)], descending=True)
+
+# Year-to-date variant: a range on idx_incidents_date, so earlier years are never read
+INCIDENT_GRID_YTD = INCIDENT_GRID.with_filters(["I.date_reported >= %s"])
+
+# Lookup sets shared by the modules: query returning (id, ...) rows + the display label for a row
+LOOKUPS = {
+    "personnel": ("SELECT personnel_id, name FROM Personnel ORDER BY name",
+                  lambda row: row[1]),
+    "resources": ("SELECT resource_id, item_name FROM Resources ORDER BY item_name",
+                  lambda row: row[1]),
+    "incidents": ("SELECT incident_id, incident_type FROM ResponseIncidents ORDER BY incident_id DESC",
+                  lambda row: f"ID {row[0]}: {row[1]}"),
+}
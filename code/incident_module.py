@@ -1,21 +1,26 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from mysql.connector import Error
+from datetime import datetime
+from tkinter import ttk, messagebox, simpledialog
+from grid_definitions import INCIDENT_GRID, INCIDENT_GRID_YTD
+from paged_treeview import PagedTreeview
+from search_picker import SearchPicker
+from archive import archive_incidents
+from report_definitions import period_start
+from repositories import Incident, IncidentRepo
+from deployment_module import DeploymentModule
 
 class IncidentModule(tk.Toplevel):
-    def __init__(self, connection, master):
+    def __init__(self, master):
         super().__init__(master)
-        self.conn = connection
+        self.executor = master.executor # Runs queries off the Tk thread
+        self.cache = master.cache # Shared lookup data (personnel for the Commander dropdown)
+        self.feed = master.feed # Incidents changed elsewhere (other windows/workstations)
         self.title("Incident & Deployment Management")
         self.geometry("1100x650")
 
         self.transient(master)
         self.grab_set()
 
-        # Data holders for Commanders (for the dropdown)
-        self.personnel_map = {}
-        self.load_personnel_map()
-
         # --- Interface Setup ---
         main_frame = tk.Frame(self)
         main_frame.pack(fill='both', expand=True, padx=10, pady=10)
@@ -30,20 +35,17 @@ class IncidentModule(tk.Toplevel):
         self.view_frame.pack(side='right', fill='both', expand=True, padx=10, pady=5)
         self.create_data_view()
 
+        self.cache.subscribe("personnel", self.on_personnel_loaded, owner=self)
         self.load_incident_data()
+        self.feed.subscribe(("ResponseIncidents", "Personnel"), self.on_changes, owner=self)
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
-    def load_personnel_map(self):
-        """Loads personnel names and IDs for the Commander dropdown."""
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute("SELECT personnel_id, name FROM Personnel ORDER BY name")
-            # Map of {name: id}
-            self.personnel_map = {name: id for id, name in cursor.fetchall()}
-        except Error as e:
-            messagebox.showerror("DB Error", f"Could not load Personnel list: {e}")
-        finally:
-            cursor.close()
+    def on_personnel_loaded(self, personnel):
+        """Receives the cached personnel lookup (now and whenever personnel change)."""
+        self.commander_picker.set_lookup(personnel)
+        if self.commander_picker.get_id() is None:
+            # Set default commander to the first one alphabetically
+            self.commander_picker.select_first()
 
     def create_form_widgets(self):
         # Hidden ID field for editing
@@ -72,16 +74,10 @@ class IncidentModule(tk.Toplevel):
         status_options = ["Active", "Resolved", "Standby"]
         tk.OptionMenu(self.form_frame, self.status_var, *status_options).pack(pady=5, padx=5, fill='x')
 
-        # 5. Commander (Dropdown using loaded personnel map)
+        # 5. Commander (Type-ahead picker over the cached personnel list, keyed by personnel_id)
         tk.Label(self.form_frame, text="Incident Commander:").pack(pady=5, padx=5, anchor='w')
-        self.commander_var = tk.StringVar(self)
-        personnel_names = sorted(self.personnel_map.keys())
-        if personnel_names:
-            # Set default commander to the first one alphabetically
-            self.commander_var.set(personnel_names[0]) 
-            tk.OptionMenu(self.form_frame, self.commander_var, *personnel_names).pack(pady=5, padx=5, fill='x')
-        else:
-            tk.Label(self.form_frame, text="No Personnel Found").pack(pady=5, padx=5)
+        self.commander_picker = SearchPicker(self.form_frame, width=28)
+        self.commander_picker.pack(pady=5, padx=5, fill='x')
 
         # --- Action Buttons ---
         button_frame = tk.Frame(self.form_frame)
@@ -94,9 +90,17 @@ class IncidentModule(tk.Toplevel):
         tk.Button(self.form_frame, text="Clear Form", command=self.clear_form).pack(pady=5)
 
     def create_data_view(self):
+        # --- Period Filter ---
+        self.ytd_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.view_frame, text="Show this year's incidents only", variable=self.ytd_var,
+                       command=self.toggle_year_to_date).pack(anchor='w')
+
         # --- Treeview (Data Grid) ---
         columns = ("ID", "Type", "Location", "Date Reported", "Status", "Commander")
-        self.tree = ttk.Treeview(self.view_frame, columns=columns, show='headings')
+        # Rows are keyed by incident_id; a change to the incident or its commander bumps updated_at
+        self.tree = PagedTreeview(self.view_frame, INCIDENT_GRID, self.executor, self, columns,
+                                  format_row=self.format_incident_row, id_index=0,
+                                  version_columns=["I.updated_at", "P.updated_at"])
 
         # Column Headings
         self.tree.heading("ID", text="ID")
@@ -115,49 +119,55 @@ class IncidentModule(tk.Toplevel):
 
         vsb = ttk.Scrollbar(self.view_frame, orient="vertical", command=self.tree.yview)
         vsb.pack(side='right', fill='y')
-        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.scrollbar = vsb
         self.tree.pack(fill='both', expand=True)
 
         self.tree.bind('<<TreeviewSelect>>', self.select_incident)
 
         # --- Delete Button ---
         tk.Button(self.view_frame, text="Delete Selected Incident", command=self.delete_incident, bg='red', fg='white').pack(pady=10)
-        
-        # NOTE: Deployment management is complex and will be added later or managed via a separate button/window.
+        tk.Button(self.view_frame, text="Archive Old Resolved Incidents...", command=self.archive_old_incidents).pack(pady=(0, 10))
+
+        # --- Deployment ---
+        tk.Button(self.view_frame, text="Deploy Responders...", command=self.open_deployments).pack(pady=(0, 10))
+
+    def toggle_year_to_date(self):
+        """Switches the grid between all incidents and the current year's."""
+        if self.ytd_var.get():
+            self.tree.pager = INCIDENT_GRID_YTD
+            self.tree.reload((period_start("Year to Date"),))
+        else:
+            self.tree.pager = INCIDENT_GRID
+            self.tree.reload()
 
     # --- CRUD Methods ---
 
     def load_incident_data(self):
-        """CRUD - R (READ): Loads all incidents, joining with Personnel to show the Commander's name."""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        cursor = self.conn.cursor()
-        try:
-            # Join Incidents with Personnel (P) on commander_id to display the commander's name
-            query = """
-                SELECT 
-                    I.incident_id, I.incident_type, I.incident_location, I.date_reported, I.status, P.name
-                FROM 
-                    ResponseIncidents AS I
-                JOIN 
-                    Personnel AS P ON I.commander_id = P.personnel_id
-                ORDER BY
-                    I.date_reported DESC;
-            """
-            cursor.execute(query)
-            records = cursor.fetchall()
-            
-            for row in records:
-                # Format the date/time to a cleaner string for the display
-                row_list = list(row)
-                row_list[3] = row_list[3].strftime('%Y-%m-%d %H:%M:%S')
-                self.tree.insert('', tk.END, values=row_list)
-                
-        except Error as e:
-            messagebox.showerror("Database Error", f"Failed to load incident data: {e}")
-        finally:
-            cursor.close()
+        """CRUD - R (READ): Loads the newest page of incidents; older pages load as the user scrolls.
+
+        Once loaded, only incidents changed since the last load are fetched and updated in place.
+        """
+        self.tree.refresh()
+
+    def on_changes(self, changes):
+        """ChangeFeed subscriber: drops deleted incidents and refreshes only rows changed since the last load.
+
+        A renamed commander changes the grid too, so personnel updates count; new or deleted
+        personnel do not.
+        """
+        for change in changes:
+            if change.table == "ResponseIncidents" and change.operation == 'D':
+                self.tree.remove_id(change.row_id)
+        if any(change.operation == 'U' or (change.table == "ResponseIncidents" and change.operation == 'I')
+               for change in changes):
+            self.tree.refresh()
+
+    @staticmethod
+    def format_incident_row(row):
+        """Formats the date/time to a cleaner string for the display."""
+        row_list = list(row)
+        row_list[3] = row_list[3].strftime('%Y-%m-%d %H:%M:%S')
+        return row_list
 
     def add_incident(self):
         """CRUD - C (CREATE)"""
@@ -165,38 +175,31 @@ class IncidentModule(tk.Toplevel):
         location = self.location_entry.get()
         date_reported = self.date_entry.get()
         status = self.status_var.get()
-        commander_name = self.commander_var.get()
-        # Look up the ID from the name
-        commander_id = self.personnel_map.get(commander_name)
+        commander_id = self.commander_picker.get_id()
         
         if not all([incident_type, location, date_reported, status, commander_id]):
             messagebox.showwarning("Input Error", "All fields must be filled.")
             return
 
-        query = """
-            INSERT INTO ResponseIncidents 
-            (incident_type, incident_location, date_reported, status, commander_id) 
-            VALUES (%s, %s, %s, %s, %s)
-        """
-        values = (incident_type, location, date_reported, status, commander_id)
-        
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute(query, values)
-            self.conn.commit()
+        incident = Incident(None, incident_type, location, date_reported, status, commander_id)
+
+        def on_success(_):
+            self.cache.invalidate("incidents")
             messagebox.showinfo("Success", "New incident logged successfully!")
             self.load_incident_data()
             self.clear_form()
-        except Error as e:
-            messagebox.showerror("Database Error", f"Failed to log incident: {e}")
-            self.conn.rollback()
-        finally:
-            cursor.close()
+
+        self.executor.submit(
+            lambda conn: IncidentRepo(conn).add(incident),
+            on_success,
+            lambda e: messagebox.showerror("Database Error", f"Failed to log incident: {e}"),
+            owner=self,
+        )
 
     def select_incident(self, event):
         """Populates the form when a row is selected."""
         selected_item = self.tree.selection()
-        if selected_item:
+        if selected_item and self.tree.raw_row(selected_item[0]):
             values = self.tree.item(selected_item, 'values')
             
             self.clear_form(keep_selection=True) 
@@ -212,7 +215,7 @@ class IncidentModule(tk.Toplevel):
             
             # Set dropdowns
             self.status_var.set(values[4])
-            self.commander_var.set(values[5]) 
+            self.commander_picker.set_id(self.tree.raw_row(selected_item[0])[6])
 
     def update_incident(self):
         """CRUD - U (UPDATE)"""
@@ -225,28 +228,25 @@ class IncidentModule(tk.Toplevel):
         location = self.location_entry.get()
         date_reported = self.date_entry.get()
         status = self.status_var.get()
-        commander_name = self.commander_var.get()
-        commander_id = self.personnel_map.get(commander_name)
-        
-        query = """
-            UPDATE ResponseIncidents 
-            SET incident_type=%s, incident_location=%s, date_reported=%s, status=%s, commander_id=%s 
-            WHERE incident_id=%s
-        """
-        values = (incident_type, location, date_reported, status, commander_id, incident_id)
+        commander_id = self.commander_picker.get_id()
+        if commander_id is None:
+            messagebox.showwarning("Input Error", "Please pick an Incident Commander from the list.")
+            return
         
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute(query, values)
-            self.conn.commit()
+        incident = Incident(incident_id, incident_type, location, date_reported, status, commander_id)
+
+        def on_success(_):
+            self.cache.invalidate("incidents")
             messagebox.showinfo("Success", f"Incident ID {incident_id} updated successfully!")
             self.load_incident_data()
             self.clear_form()
-        except Error as e:
-            messagebox.showerror("Database Error", f"Failed to update incident: {e}")
-            self.conn.rollback()
-        finally:
-            cursor.close()
+
+        self.executor.submit(
+            lambda conn: IncidentRepo(conn).update(incident),
+            on_success,
+            lambda e: messagebox.showerror("Database Error", f"Failed to update incident: {e}"),
+            owner=self,
+        )
 
     def delete_incident(self):
         """CRUD - D (DELETE)"""
@@ -258,27 +258,50 @@ class IncidentModule(tk.Toplevel):
         incident_id = self.tree.item(selected_item, 'values')[0]
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete Incident ID {incident_id}? This will also delete related Deployment and Resource Usage records (due to cascading dependencies)."):
-            
-            cursor = self.conn.cursor()
-            try:
-                # IMPORTANT: Delete related records in bridge tables first due to Foreign Keys
-                # NOTE: You must disable foreign key checks or set ON DELETE CASCADE in the schema.
-                # Assuming ON DELETE CASCADE is NOT set, we must delete manually:
-                cursor.execute("DELETE FROM ResourceUsage WHERE incident_id = %s", (incident_id,))
-                cursor.execute("DELETE FROM Deployment WHERE incident_id = %s", (incident_id,))
-                
-                # Now delete the main incident record
-                cursor.execute("DELETE FROM ResponseIncidents WHERE incident_id = %s", (incident_id,))
-                
-                self.conn.commit()
+
+            def on_success(_):
+                self.cache.invalidate("incidents")
                 messagebox.showinfo("Success", "Incident record and related deployments/usage deleted.")
-                self.load_incident_data()
+                self.tree.remove_id(incident_id)
                 self.clear_form()
-            except Error as e:
-                messagebox.showerror("Database Error", f"Failed to delete incident: {e}")
-                self.conn.rollback()
-            finally:
-                cursor.close()
+
+            self.executor.submit(
+                lambda conn: IncidentRepo(conn).delete(incident_id),
+                on_success,
+                lambda e: messagebox.showerror("Database Error", f"Failed to delete incident: {e}"),
+                owner=self,
+            )
+
+    def open_deployments(self):
+        """Opens the Deployment window for the selected incident (or none)."""
+        incident_id = self.incident_id_var.get()
+        DeploymentModule(self, int(incident_id) if incident_id else None)
+
+    def archive_old_incidents(self):
+        """Moves resolved incidents reported before a cutoff date into the archive tables (see archive.py)."""
+        cutoff_text = simpledialog.askstring("Archive Incidents", "Archive resolved incidents reported before (YYYY-MM-DD):", parent=self)
+        if not cutoff_text:
+            return
+        try:
+            cutoff = datetime.strptime(cutoff_text.strip(), "%Y-%m-%d")
+        except ValueError:
+            messagebox.showwarning("Input Error", "Please enter the cutoff date as YYYY-MM-DD.")
+            return
+
+        if not messagebox.askyesno("Confirm Archive", f"Move every resolved incident reported before {cutoff:%Y-%m-%d} (with its deployments and resource usage) to the archive?"):
+            return
+
+        def on_success(total):
+            self.cache.invalidate("incidents")
+            messagebox.showinfo("Archive Complete", f"{total} incidents archived.")
+            self.tree.reload(self.tree.params) # Many rows left the grid at once; start the window over
+
+        self.executor.submit(
+            lambda conn: archive_incidents(conn, cutoff),
+            on_success,
+            lambda e: messagebox.showerror("Database Error", f"Archiving stopped: {e}"),
+            owner=self,
+        )
 
     def clear_form(self, keep_selection=False):
         """Resets all form entries and button states."""
@@ -290,8 +313,8 @@ class IncidentModule(tk.Toplevel):
             self.incident_id_var.set("")
             self.update_btn.config(state=tk.DISABLED)
         
-        if self.personnel_map and not keep_selection:
-            self.commander_var.set(sorted(self.personnel_map.keys())[0])
+        if not keep_selection:
+            self.commander_picker.select_first()
         if not keep_selection:
             self.status_var.set("Active")
 
@@ -300,5 +323,8 @@ class IncidentModule(tk.Toplevel):
 
     def on_close(self):
         """Handles closing the Toplevel window."""
+        self.executor.cancel(self) # Drop any queries still running for this window
+        self.cache.unsubscribe(self)
+        self.feed.unsubscribe(self)
         self.grab_release()
         self.destroy()
\ No newline at end of file
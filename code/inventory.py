@@ -0,0 +1,136 @@
+from db_connector import run_transaction, statement_cache
+from forecast import apply_forecasts
+
+# Check-and-decrement in one statement: the row lock taken by the UPDATE makes concurrent
+# dispatchers queue up instead of overselling. LAST_INSERT_ID(expr) hands the new stock
+# level back in the OK packet, so no extra SELECT is needed to report it.
+DECREMENT_STOCK = """
+    UPDATE Resources
+    SET stock_level = LAST_INSERT_ID(stock_level - %s)
+    WHERE resource_id = %s AND stock_level >= %s
+"""
+
+# Logging the same resource against the same incident again adds to the existing line
+# (the unique_usage key) instead of failing.
+UPSERT_USAGE = """
+    INSERT INTO ResourceUsage (incident_id, resource_id, quantity_used, date_used)
+    VALUES (%s, %s, %s, NOW())
+    ON DUPLICATE KEY UPDATE
+        quantity_used = quantity_used + VALUES(quantity_used),
+        date_used = VALUES(date_used)
+"""
+
+
+class InsufficientStockError(Exception):
+    """Raised when a usage would take a resource's stock below zero."""
+
+    def __init__(self, resource_id, requested, available):
+        super().__init__(f"Only {available} units of resource ID {resource_id} remaining ({requested} requested).")
+        self.resource_id = resource_id
+        self.requested = requested
+        self.available = available
+
+
+def current_stock(cursor, resource_id):
+    cursor.execute("SELECT stock_level FROM Resources WHERE resource_id = %s", (resource_id,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def apply_usage(cursor, incident_id, resource_id, quantity, execute=None):
+    """The statements of log_usage, run inside the caller's transaction; returns the new stock level.
+
+    ``execute(sql, params)`` must return the cursor that ran the statement
+    (log_usage passes its prepared statement cache); by default ``cursor`` runs them.
+    """
+    if execute is None:
+        def execute(sql, params):
+            cursor.execute(sql, params)
+            return cursor
+    decrement = execute(DECREMENT_STOCK, (quantity, resource_id, quantity))
+    if decrement.rowcount == 0:
+        raise InsufficientStockError(resource_id, quantity, current_stock(cursor, resource_id))
+    new_stock = decrement.lastrowid or 0
+    execute(UPSERT_USAGE, (incident_id, resource_id, quantity))
+    apply_forecasts(cursor, [resource_id]) # Its burn rate and reorder point move with the new usage
+    return new_stock
+
+
+def log_usage(conn, incident_id, resource_id, quantity):
+    """Records ``quantity`` of a resource as used by an incident and decrements its stock.
+
+    Both statements run in one transaction with the resource's forecast
+    refresh (four round trips plus the commit).
+    Returns the new stock level, or raises InsufficientStockError without
+    changing anything if there is not enough stock left.
+    """
+    if quantity <= 0:
+        raise ValueError("Quantity used must be a positive number.")
+
+    statements = statement_cache(conn) # Both statements are re-executed prepared, not re-parsed
+    return run_transaction(conn, lambda cursor: apply_usage(cursor, incident_id, resource_id, quantity,
+                                                            statements.execute))
+
+
+class BatchStockError(Exception):
+    """Raised when one or more lines of a batch exceed the stock on hand; nothing is logged."""
+
+    def __init__(self, shortages):
+        super().__init__("; ".join(str(shortage) for shortage in shortages))
+        self.shortages = shortages # List of InsufficientStockError, one per short resource
+
+
+def merge_lines(lines):
+    """Sums quantities per resource; returns [(resource_id, quantity)] sorted by resource_id.
+
+    The fixed order means concurrent batches lock Resources rows in the same
+    order, which keeps deadlocks between them rare.
+    """
+    totals = {}
+    for resource_id, quantity in lines:
+        if quantity <= 0:
+            raise ValueError("Quantity used must be a positive number.")
+        totals[resource_id] = totals.get(resource_id, 0) + quantity
+    return sorted(totals.items())
+
+
+def apply_usage_batch(conn, cursor, incident_id, lines):
+    """The statements of log_usage_batch for already merged ``lines``, inside the caller's transaction."""
+    ids = [resource_id for resource_id, _ in lines]
+    id_marks = ", ".join(["%s"] * len(ids))
+    batch = " UNION ALL ".join(["SELECT %s AS resource_id, %s AS quantity"] * len(lines))
+    batch_params = [value for line in lines for value in line]
+
+    cursor.execute(f"""
+        UPDATE Resources R
+        JOIN ({batch}) B ON B.resource_id = R.resource_id
+        SET R.stock_level = R.stock_level - B.quantity
+        WHERE R.stock_level >= B.quantity
+    """, batch_params)
+    if cursor.rowcount != len(lines):
+        # Some lines were short: undo the partial decrement and report them against current stock
+        conn.rollback()
+        cursor.execute(f"SELECT resource_id, stock_level FROM Resources WHERE resource_id IN ({id_marks})", ids)
+        stock = dict(cursor.fetchall())
+        raise BatchStockError([InsufficientStockError(resource_id, quantity, stock.get(resource_id, 0))
+                               for resource_id, quantity in lines if stock.get(resource_id, 0) < quantity])
+
+    cursor.executemany(UPSERT_USAGE, [(incident_id, resource_id, quantity) for resource_id, quantity in lines])
+    apply_forecasts(cursor, ids)
+    cursor.execute(f"SELECT resource_id, stock_level FROM Resources WHERE resource_id IN ({id_marks})", ids)
+    return dict(cursor.fetchall())
+
+
+def log_usage_batch(conn, incident_id, lines):
+    """Logs many (resource_id, quantity) lines for one incident, all or nothing.
+
+    Stock for every resource is checked and decremented by a single set-based
+    UPDATE joined against the batch, the usage rows go in with one executemany
+    (sent as a multi-row INSERT), and everything is committed once.  Returns
+    ``{resource_id: new_stock}``; raises BatchStockError listing every short
+    resource if any line cannot be covered.
+    """
+    lines = merge_lines(lines)
+    if not lines:
+        return {}
+    return run_transaction(conn, lambda cursor: apply_usage_batch(conn, cursor, incident_id, lines))
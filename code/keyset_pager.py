@@ -0,0 +1,82 @@
+from db_connector import fetch_all
+
+
+class KeysetPager:
+    """Builds keyset-paginated ("seek method") variants of a report/grid query.
+
+    ``template`` is a SELECT containing a ``{where}`` placeholder (before any
+    GROUP BY) and ending in ``ORDER BY {order}``.  ``key`` lists the ordering
+    columns as ``(sql_expression, row_index)`` pairs; together they must be
+    unique per row (end with the primary key).  Instead of OFFSET, each page
+    continues from the key of the last (or first) row already shown, so the
+    server only reads the rows it returns no matter how deep the user scrolls.
+    """
+
+    def __init__(self, template, key, descending=True, filters=()):
+        self.template = template
+        self.key = list(key)
+        self.descending = descending
+        self.filters = list(filters)
+
+    def with_filters(self, filters):
+        """Returns a copy of this pager with extra WHERE conditions (e.g. a date range)."""
+        return KeysetPager(self.template, self.key, self.descending, self.filters + list(filters))
+
+    def row_key(self, row):
+        """Extracts the keyset position of a fetched row."""
+        return tuple(row[index] for _, index in self.key)
+
+    def _seek_condition(self, forward):
+        """Returns the WHERE fragment for rows after (forward) or before the given key."""
+        # Walking forward in a descending grid means smaller keys, and vice versa
+        operator = '<' if forward == self.descending else '>'
+        clauses = []
+        for depth, (column, _) in enumerate(self.key):
+            equals = [f"{prior} = %s" for prior, _ in self.key[:depth]]
+            clauses.append("(" + " AND ".join(equals + [f"{column} {operator} %s"]) + ")")
+        return "(" + " OR ".join(clauses) + ")"
+
+    def _seek_params(self, key_values):
+        params = []
+        for depth in range(len(self.key)):
+            params.extend(key_values[:depth + 1])
+        return params
+
+    def render(self, conditions=(), reverse=False):
+        """Renders the template with the given extra conditions and sort direction."""
+        where = self.filters + list(conditions)
+        descending = self.descending != reverse
+        direction = "DESC" if descending else "ASC"
+        return self.template.format(
+            where=("WHERE " + " AND ".join(where)) if where else "",
+            order=", ".join(f"{column} {direction}" for column, _ in self.key),
+        )
+
+    def full_query(self):
+        """The unpaginated query (used when every row is genuinely needed)."""
+        return self.render()
+
+    def page_query(self, limit, after=None, before=None, params=()):
+        """Returns ``(query, params)`` for the page following ``after`` or preceding ``before``.
+
+        A page before ``before`` is selected in reverse order and must be
+        reversed by the caller (fetch_page does this).
+        """
+        params = list(params)
+        if before is not None:
+            query = self.render([self._seek_condition(forward=False)], reverse=True)
+            return query + " LIMIT %s", params + self._seek_params(before) + [limit]
+        if after is not None:
+            query = self.render([self._seek_condition(forward=True)])
+            return query + " LIMIT %s", params + self._seek_params(after) + [limit]
+        return self.render() + " LIMIT %s", params + [limit]
+
+    def fetch_page(self, conn, limit, after=None, before=None, params=()):
+        """Fetches up to ``limit`` rows following ``after`` or preceding ``before``.
+
+        Rows are always returned in display order.  ``params`` supplies values
+        for any ``%s`` placeholders used by ``filters``.
+        """
+        query, query_params = self.page_query(limit, after, before, params)
+        rows = fetch_all(conn, query, query_params)
+        return list(reversed(rows)) if before is not None else rows
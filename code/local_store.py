@@ -0,0 +1,670 @@
+import json
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from queue import LifoQueue, Empty
+from typing import NamedTuple
+
+from mysql.connector import errorcode
+from mysql.connector.errors import IntegrityError
+
+from db_connector import POOL_SIZE
+from dispatch import ACTIVE_STATUSES
+from inventory import BatchStockError, InsufficientStockError, merge_lines
+from query_stats import instrument
+
+# Offline replica of the central database. The modules read it through LocalPool (same
+# interface as db_connector.ConnectionPool) and their writes are applied locally and queued
+# in the Outbox; sync_engine pushes the queue to the server and pulls changes back.
+
+LOCAL_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "dreams_local.sqlite3")
+BUSY_TIMEOUT_SECONDS = 5 # The sync thread and the workers write to the same file
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f" # One fixed width, so stored values compare correctly as text
+
+
+class OfflineError(Exception):
+    """Raised for work that needs the central database (reports, imports, archiving) while offline."""
+
+    def __init__(self, action="This action"):
+        super().__init__(f"{action} needs the central database, which is not reachable. "
+                         "It will be available again once the connection is back.")
+
+
+# --- Replicated Tables ---
+
+class TableSpec(NamedTuple):
+    key: str              # Primary key column
+    columns: tuple        # Data columns, in repository row order
+    dates: tuple = ()     # DATETIME columns (validated and normalized on write)
+    unique: tuple = ()    # Natural key of a bridge table (one line per incident and person / resource)
+
+
+TABLES = {
+    "Personnel": TableSpec("personnel_id", ("name", "role", "specialty", "contact_number", "assigned_unit")),
+    "Resources": TableSpec("resource_id", ("item_name", "category", "stock_level", "unit_of_measure")),
+    "ResponseIncidents": TableSpec("incident_id", ("incident_type", "incident_location", "date_reported", "status",
+                                                  "commander_id"), ("date_reported",)),
+    "Deployment": TableSpec("deployment_id", ("incident_id", "personnel_id", "deployment_time",
+                                              "role_during_incident"), ("deployment_time",),
+                            ("incident_id", "personnel_id")),
+    "ResourceUsage": TableSpec("usage_id", ("incident_id", "resource_id", "quantity_used", "date_used"), ("date_used",),
+                               ("incident_id", "resource_id")),
+}
+
+# Foreign keys queued writes may carry: column -> referenced table (temporary ids are remapped on push)
+REFERENCES = {"commander_id": "Personnel", "incident_id": "ResponseIncidents", "personnel_id": "Personnel",
+              "resource_id": "Resources"}
+
+# Same tables as 01_schema_creation.sql. ``updated_at`` is the local change time (it drives the
+# grids' incremental refresh); ``server_updated_at`` is the server row version last pulled, the
+# base an offline edit is checked against on push. Rows created offline have negative ids until
+# pushed; ON UPDATE CASCADE carries the real id into their children.
+LOCAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Personnel (
+    personnel_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    role TEXT NOT NULL,
+    specialty TEXT,
+    contact_number TEXT,
+    assigned_unit TEXT,
+    updated_at DATETIME NOT NULL,
+    server_updated_at DATETIME
+);
+CREATE INDEX IF NOT EXISTS idx_personnel_updated_at ON Personnel(updated_at);
+CREATE INDEX IF NOT EXISTS idx_personnel_name ON Personnel(name);
+
+CREATE TABLE IF NOT EXISTS ResponseIncidents (
+    incident_id INTEGER PRIMARY KEY,
+    incident_type TEXT NOT NULL,
+    incident_location TEXT NOT NULL,
+    date_reported DATETIME NOT NULL,
+    status TEXT NOT NULL,
+    commander_id INTEGER REFERENCES Personnel(personnel_id) ON UPDATE CASCADE,
+    updated_at DATETIME NOT NULL,
+    server_updated_at DATETIME
+);
+CREATE INDEX IF NOT EXISTS idx_incidents_updated_at ON ResponseIncidents(updated_at);
+CREATE INDEX IF NOT EXISTS idx_incidents_date ON ResponseIncidents(date_reported, incident_id);
+CREATE INDEX IF NOT EXISTS idx_incidents_commander ON ResponseIncidents(commander_id);
+
+CREATE TABLE IF NOT EXISTS Resources (
+    resource_id INTEGER PRIMARY KEY,
+    item_name TEXT NOT NULL,
+    category TEXT,
+    stock_level INTEGER NOT NULL CHECK (stock_level >= 0),
+    unit_of_measure TEXT,
+    updated_at DATETIME NOT NULL,
+    server_updated_at DATETIME
+);
+CREATE INDEX IF NOT EXISTS idx_resources_updated_at ON Resources(updated_at);
+CREATE INDEX IF NOT EXISTS idx_resources_name ON Resources(item_name, resource_id);
+
+CREATE TABLE IF NOT EXISTS Deployment (
+    deployment_id INTEGER PRIMARY KEY,
+    incident_id INTEGER NOT NULL REFERENCES ResponseIncidents(incident_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    personnel_id INTEGER NOT NULL REFERENCES Personnel(personnel_id) ON UPDATE CASCADE,
+    deployment_time DATETIME NOT NULL,
+    role_during_incident TEXT,
+    UNIQUE (incident_id, personnel_id)
+);
+CREATE INDEX IF NOT EXISTS idx_deployment_personnel ON Deployment(personnel_id);
+
+CREATE TABLE IF NOT EXISTS ResourceUsage (
+    usage_id INTEGER PRIMARY KEY,
+    incident_id INTEGER NOT NULL REFERENCES ResponseIncidents(incident_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    resource_id INTEGER NOT NULL REFERENCES Resources(resource_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    quantity_used INTEGER NOT NULL,
+    date_used DATETIME NOT NULL,
+    UNIQUE (incident_id, resource_id)
+);
+CREATE INDEX IF NOT EXISTS idx_usage_resource ON ResourceUsage(resource_id);
+
+-- Forecasts are computed on the server and not replicated; offline, every item falls back to
+-- the fixed low-stock floor (forecast.py), so this table only has to exist for the same reads
+CREATE TABLE IF NOT EXISTS StockForecast (
+    resource_id INTEGER PRIMARY KEY,
+    reorder_level INTEGER,
+    daily_burn REAL,
+    reorder_point INTEGER
+);
+
+-- Writes made offline, in the order they must be replayed on the server
+CREATE TABLE IF NOT EXISTS Outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation TEXT NOT NULL,          -- insert / update / delete / log_usage(_batch) / dispatch / recall
+    table_name TEXT NOT NULL,
+    row_id INTEGER,
+    payload TEXT NOT NULL,            -- JSON column values
+    base_version DATETIME,            -- server_updated_at the edit was made against
+    created_at DATETIME NOT NULL
+);
+
+-- Temporary (negative) ids already replaced by the server's ids, for queued writes that still use them
+CREATE TABLE IF NOT EXISTS IdMap (
+    table_name TEXT NOT NULL,
+    local_id INTEGER NOT NULL,
+    server_id INTEGER NOT NULL,
+    PRIMARY KEY (table_name, local_id)
+);
+
+-- Queued writes the server refused (the server's version was kept)
+CREATE TABLE IF NOT EXISTS SyncConflicts (
+    conflict_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    seen_at DATETIME NOT NULL,
+    operation TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    row_id INTEGER,
+    payload TEXT NOT NULL,
+    reason TEXT NOT NULL
+);
+
+-- High-water marks, client id, last successful sync
+CREATE TABLE IF NOT EXISTS SyncState (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+# --- Connections ---
+
+def to_datetime(value):
+    """Parses a DATETIME entered or stored as text; raises ValueError for anything else."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).strip())
+
+
+sqlite3.register_adapter(datetime, lambda value: value.strftime(DATETIME_FORMAT))
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+
+
+def open_store(path=LOCAL_DB_PATH):
+    """Opens (creating if needed) the local replica in WAL mode and returns the sqlite3 connection."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False,
+                           detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+    conn.execute("PRAGMA journal_mode=WAL")   # Readers never block the writer (and vice versa)
+    conn.execute("PRAGMA synchronous=NORMAL") # Durable at each WAL checkpoint; far fewer fsyncs
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(LOCAL_SCHEMA)
+    return conn
+
+
+# MySQL-only spellings used by the shared grid SQL, and their SQLite equivalents
+_PLACEHOLDER = re.compile(r"%s")
+_REWRITES = [
+    (re.compile(r"CURRENT_TIMESTAMP\(6\)"),
+     "strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime') AS \"now [DATETIME]\""),
+    (re.compile(r"\bGREATEST\(", re.IGNORECASE), "MAX("), # SQLite's multi-argument MAX is MySQL's GREATEST
+]
+_READ_ONLY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_LOCKING_READ = re.compile(r"\bFOR\s+UPDATE\b|\bLOCK\s+IN\s+SHARE\s+MODE\b", re.IGNORECASE)
+
+
+def translate(sql):
+    """Rewrites a MySQL read for SQLite; anything that writes or locks is refused."""
+    if not _READ_ONLY.match(sql) or _LOCKING_READ.search(sql):
+        raise OfflineError()
+    sql = _PLACEHOLDER.sub("?", sql)
+    for pattern, replacement in _REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+class LocalCursor:
+    """The subset of the mysql-connector cursor API the repositories and grids use, over SQLite.
+
+    Only reads run through cursors; writes go through ``LocalConnection.store``
+    so they are queued for the server as well as applied locally.
+    """
+
+    arraysize = 100
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.rowcount = -1
+        self.lastrowid = None
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def with_rows(self):
+        return self._cursor.description is not None
+
+    def execute(self, operation, params=(), *args, **kwargs):
+        self._cursor.execute(translate(operation), tuple(params or ()))
+        return None
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        raise OfflineError()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self.arraysize)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._cursor.close()
+
+
+class LocalConnection:
+    """Stands in for a MySQL connection while offline; ``store`` takes the writes."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.store = LocalStore(raw)
+
+    def cursor(self, *args, **kwargs):
+        return LocalCursor(self.raw.cursor()) # buffered / prepared flags make no difference here
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    @property
+    def in_transaction(self):
+        return self.raw.in_transaction
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self.raw.close()
+
+
+class LocalPool:
+    """Drop-in for db_connector.ConnectionPool that hands out connections to the local replica."""
+
+    def __init__(self, path=LOCAL_DB_PATH, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = LifoQueue()
+        self._closed = False
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            return instrument(LocalConnection(open_store(self.path))) # Timed like server statements
+
+    def release(self, conn):
+        if self._closed: # Switched back to the server while this one was checked out
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                return
+
+
+def has_replica(path=LOCAL_DB_PATH):
+    """True once at least one sync has filled the local replica (offline mode is useless before that)."""
+    if not os.path.exists(path):
+        return False
+    conn = open_store(path)
+    try:
+        return LocalStore(conn).state("last_sync") is not None
+    finally:
+        conn.close()
+
+
+# --- Local Writes ---
+
+class OutboxEntry(NamedTuple):
+    seq: int
+    operation: str
+    table_name: str
+    row_id: int
+    payload: dict
+    base_version: datetime
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class LocalStore:
+    """Applies writes to the replica and queues them in the Outbox, in one SQLite transaction each.
+
+    Every method mirrors a repository write and keeps its contract (return
+    values and the errors the modules already handle), so a window cannot tell
+    whether it is working online or offline apart from the ids of new rows,
+    which stay negative until the sync engine has pushed them.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    # --- Sync bookkeeping ---
+
+    def state(self, name, default=None):
+        row = self.conn.execute("SELECT value FROM SyncState WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, name, value):
+        self.conn.execute("INSERT INTO SyncState (name, value) VALUES (?, ?) "
+                          "ON CONFLICT(name) DO UPDATE SET value = excluded.value", (name, value))
+
+    def pending_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM Outbox").fetchone()[0]
+
+    def pending(self, limit):
+        """The oldest ``limit`` queued writes, in the order they were made."""
+        rows = self.conn.execute("SELECT seq, operation, table_name, row_id, payload, base_version FROM Outbox "
+                                 "ORDER BY seq LIMIT ?", (limit,)).fetchall()
+        return [OutboxEntry(seq, operation, table, row_id, json.loads(payload), base)
+                for seq, operation, table, row_id, payload, base in rows]
+
+    def server_id(self, table, row_id):
+        """Maps a temporary id that has since been pushed to the server's id (other ids pass through)."""
+        if row_id is None or row_id >= 0:
+            return row_id
+        row = self.conn.execute("SELECT server_id FROM IdMap WHERE table_name = ? AND local_id = ?",
+                                (table, row_id)).fetchone()
+        return row[0] if row else row_id
+
+    def complete(self, entry, server_id=None, conflict=None, versions=None):
+        """Removes a pushed write from the queue; records the new row's id or the server's refusal.
+
+        ``versions`` (``{(table, server id): updated_at}``) are the row versions
+        the write left on the server; see rebase.
+        """
+        with self.conn:
+            if server_id is not None and entry.row_id is not None and entry.row_id < 0:
+                spec = TABLES[entry.table_name]
+                self.conn.execute(f"UPDATE {entry.table_name} SET {spec.key} = ? WHERE {spec.key} = ?",
+                                  (server_id, entry.row_id))
+                self.conn.execute("INSERT OR REPLACE INTO IdMap (table_name, local_id, server_id) VALUES (?, ?, ?)",
+                                  (entry.table_name, entry.row_id, server_id))
+            if entry.operation == "dispatch" and conflict is None:
+                self._discard_dispatched(entry)
+            if conflict is not None:
+                self._discard_refused(entry)
+                self.conn.execute("INSERT INTO SyncConflicts (seen_at, operation, table_name, row_id, payload, reason) "
+                                  "VALUES (?, ?, ?, ?, ?, ?)",
+                                  (datetime.now(), entry.operation, entry.table_name, entry.row_id,
+                                   json.dumps(entry.payload, default=_json_default), conflict))
+            for (table, row_id), version in (versions or {}).items():
+                self.rebase(table, row_id, version)
+            self.conn.execute("DELETE FROM Outbox WHERE seq = ?", (entry.seq,))
+
+    def rebase(self, table, row_id, version):
+        """Moves the row's server version, and that of its edits still queued, to what this client's push left.
+
+        Otherwise the next queued edit of the same row would find the server
+        newer than the version it was made against and be refused as a conflict.
+        """
+        local_ids = [row_id] + [local_id for local_id, in self.conn.execute(
+            "SELECT local_id FROM IdMap WHERE table_name = ? AND server_id = ?", (table, row_id))]
+        marks = ", ".join("?" * len(local_ids))
+        self.conn.execute(f"UPDATE Outbox SET base_version = ? WHERE operation = 'update' AND table_name = ? "
+                          f"AND row_id IN ({marks})", (version, table, *local_ids))
+        self.conn.execute(f"UPDATE {table} SET server_updated_at = ? WHERE {TABLES[table].key} = ?", (version, row_id))
+
+    def _discard_refused(self, entry):
+        """Removes rows that only ever existed offline because of a write the server refused."""
+        if entry.operation == "insert" and entry.row_id < 0:
+            spec = TABLES[entry.table_name]
+            try:
+                self.conn.execute(f"DELETE FROM {entry.table_name} WHERE {spec.key} = ?", (entry.row_id,))
+            except sqlite3.IntegrityError:
+                pass # Still referenced by another offline row; only this statement is undone
+        elif entry.operation == "dispatch":
+            self._discard_dispatched(entry)
+        elif entry.operation in ("log_usage", "log_usage_batch"):
+            lines = entry.payload.get("lines") or [(entry.payload["resource_id"], entry.payload["quantity"])]
+            self.conn.executemany("DELETE FROM ResourceUsage WHERE incident_id = ? AND resource_id = ? AND usage_id < 0",
+                                  [(entry.payload["incident_id"], resource_id) for resource_id, _ in lines])
+
+    def _discard_dispatched(self, entry):
+        # The server's Deployment rows (pulled next) replace the offline ones; anyone it skipped disappears
+        ids = entry.payload["personnel_ids"]
+        self.conn.execute(f"DELETE FROM Deployment WHERE incident_id = ? AND deployment_id < 0 "
+                          f"AND personnel_id IN ({', '.join('?' * len(ids))})", (entry.payload["incident_id"], *ids))
+
+    def conflicts_after(self, conflict_id):
+        """Conflicts recorded after ``conflict_id``: [(conflict_id, seen_at, operation, table, row_id, reason)]."""
+        return self.conn.execute("SELECT conflict_id, seen_at, operation, table_name, row_id, reason "
+                                 "FROM SyncConflicts WHERE conflict_id > ? ORDER BY conflict_id",
+                                 (conflict_id,)).fetchall()
+
+    # --- Pulled rows ---
+
+    def merge_rows(self, table, rows, versioned):
+        """Upserts rows pulled from the server: ``(id, *columns)`` plus ``updated_at`` when ``versioned``.
+
+        Pulled rows are stamped with the local clock so open grids pick them up
+        on their next incremental refresh.
+        """
+        spec = TABLES[table]
+        columns = (spec.key,) + spec.columns
+        if versioned:
+            columns += ("server_updated_at", "updated_at")
+            now = datetime.now()
+            rows = [(*row, now) for row in rows]
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+        with self.conn:
+            if spec.unique:
+                # The server's row wins over any other local row for the same pair: a line added offline
+                # (already included in it), or an old row the server replaced, e.g. a responder recalled
+                # and dispatched again, which reconcile would only remove later
+                positions = [columns.index(column) for column in spec.unique]
+                self.conn.executemany(f"DELETE FROM {table} WHERE {spec.unique[0]} = ? AND {spec.unique[1]} = ? "
+                                      f"AND {spec.key} <> ?", [[*(row[i] for i in positions), row[0]] for row in rows])
+            self.conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                                  f"ON CONFLICT({spec.key}) DO UPDATE SET {assignments}", rows)
+
+    def _scope(self, table):
+        """FROM and window condition (one ``?``) for ``table``, matching the server-side pull."""
+        if table == "ResponseIncidents":
+            return f"FROM {table} AS T", "T.date_reported >= ?"
+        if "incident_id" in TABLES[table].columns:
+            return f"FROM {table} AS T JOIN ResponseIncidents AS I ON I.incident_id = T.incident_id", "I.date_reported >= ?"
+        return f"FROM {table} AS T", None
+
+    def local_ids(self, table, cutoff):
+        """Ids of rows pulled from the server (not created offline) inside the replica window."""
+        source, condition = self._scope(table)
+        key = TABLES[table].key
+        query = f"SELECT T.{key} {source} WHERE T.{key} > 0" + (f" AND {condition}" if condition else "")
+        return {row[0] for row in self.conn.execute(query, (cutoff,) if condition else ())}
+
+    def remove_missing(self, table, server_ids, cutoff):
+        """Deletes local copies of rows the server no longer has; returns how many went."""
+        gone = sorted(self.local_ids(table, cutoff) - server_ids)
+        key = TABLES[table].key
+        removed = 0
+        with self.conn:
+            for row_id in gone:
+                try:
+                    removed += self.conn.execute(f"DELETE FROM {table} WHERE {key} = ?", (row_id,)).rowcount
+                except sqlite3.IntegrityError:
+                    pass # Still referenced by a row created offline; retried at the next reconcile
+        return removed
+
+    def prune_window(self, cutoff):
+        """Drops pulled incidents (and, by cascade, their children) that have aged out of the window."""
+        with self.conn:
+            return self.conn.execute("DELETE FROM ResponseIncidents WHERE date_reported < ? AND incident_id > 0",
+                                     (cutoff,)).rowcount
+
+    # --- Queued writes ---
+
+    def _queue(self, operation, table, row_id, payload, base_version=None):
+        self.conn.execute("INSERT INTO Outbox (operation, table_name, row_id, payload, base_version, created_at) "
+                          "VALUES (?, ?, ?, ?, ?, ?)",
+                          (operation, table, row_id, json.dumps(payload, default=_json_default), base_version,
+                           datetime.now()))
+
+    def _temp_id(self, table):
+        """Next temporary id for a row created offline; never reused, so queued writes can't mix two rows up."""
+        name = f"temp_id:{table}"
+        row_id = int(self.state(name, 0)) - 1
+        self.set_state(name, row_id)
+        return row_id
+
+    def _values(self, table, record):
+        """Column -> value for a repository row (NamedTuple, primary key first), with dates validated."""
+        spec = TABLES[table]
+        values = dict(zip(spec.columns, record[1:]))
+        for column in spec.dates:
+            try:
+                values[column] = to_datetime(values[column])
+            except ValueError:
+                raise ValueError(f"{column} must be a date and time like 2024-05-01 14:30:00.") from None
+        return values
+
+    def insert(self, table, record):
+        """Adds the row under a temporary negative id (returned) and queues its INSERT."""
+        spec = TABLES[table]
+        values = self._values(table, record)
+        with self.conn:
+            row_id = self._temp_id(table)
+            columns = (spec.key,) + tuple(values) + ("updated_at",)
+            self.conn.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                              (row_id, *values.values(), datetime.now()))
+            self._queue("insert", table, row_id, values)
+        return row_id
+
+    def update(self, table, record):
+        """Changes the row and queues the UPDATE against the server version it was read at; returns rowcount."""
+        spec = TABLES[table]
+        row_id = record[0]
+        values = self._values(table, record)
+        with self.conn:
+            row = self.conn.execute(f"SELECT server_updated_at FROM {table} WHERE {spec.key} = ?", (row_id,)).fetchone()
+            if row is None:
+                return 0
+            assignments = ", ".join(f"{column} = ?" for column in values)
+            self.conn.execute(f"UPDATE {table} SET {assignments}, updated_at = ? WHERE {spec.key} = ?",
+                              (*values.values(), datetime.now(), row_id))
+            self._queue("update", table, row_id, values, row[0])
+        return 1
+
+    def delete(self, table, row_id):
+        """Deletes the row (children cascade as on the server) and queues the DELETE; returns rowcount."""
+        spec = TABLES[table]
+        with self.conn:
+            try:
+                deleted = self.conn.execute(f"DELETE FROM {table} WHERE {spec.key} = ?", (row_id,)).rowcount
+            except sqlite3.IntegrityError as e:
+                # Same error the modules already handle for a row that is still referenced
+                raise IntegrityError(msg=f"Cannot delete or update a parent row: {e}",
+                                     errno=errorcode.ER_ROW_IS_REFERENCED_2) from e
+            if deleted:
+                self._queue("delete", table, row_id, {})
+        return deleted
+
+    def _use_stock(self, incident_id, lines):
+        """Decrements stock and upserts usage lines locally; returns {resource_id: new_stock} or the shortages."""
+        shortages = []
+        for resource_id, quantity in lines:
+            updated = self.conn.execute("UPDATE Resources SET stock_level = stock_level - ?, updated_at = ? "
+                                        "WHERE resource_id = ? AND stock_level >= ?",
+                                        (quantity, datetime.now(), resource_id, quantity)).rowcount
+            if not updated:
+                row = self.conn.execute("SELECT stock_level FROM Resources WHERE resource_id = ?",
+                                        (resource_id,)).fetchone()
+                shortages.append(InsufficientStockError(resource_id, quantity, row[0] if row else 0))
+        if shortages:
+            return None, shortages
+        now = datetime.now()
+        for resource_id, quantity in lines:
+            self.conn.execute("INSERT INTO ResourceUsage (usage_id, incident_id, resource_id, quantity_used, date_used) "
+                              "VALUES (?, ?, ?, ?, ?) ON CONFLICT (incident_id, resource_id) DO UPDATE SET "
+                              "quantity_used = quantity_used + excluded.quantity_used, date_used = excluded.date_used",
+                              (self._temp_id("ResourceUsage"), incident_id, resource_id, quantity, now))
+        ids = [resource_id for resource_id, _ in lines]
+        stock = self.conn.execute(f"SELECT resource_id, stock_level FROM Resources "
+                                  f"WHERE resource_id IN ({', '.join('?' * len(ids))})", ids).fetchall()
+        return dict(stock), []
+
+    def log_usage(self, incident_id, resource_id, quantity):
+        """Offline inventory.log_usage: same checks and errors; the server re-checks stock on push."""
+        if quantity <= 0:
+            raise ValueError("Quantity used must be a positive number.")
+        with self.conn:
+            stock, shortages = self._use_stock(incident_id, [(resource_id, quantity)])
+            if shortages:
+                raise shortages[0]
+            self._queue("log_usage", "Resources", resource_id,
+                        {"incident_id": incident_id, "resource_id": resource_id, "quantity": quantity})
+        return stock[resource_id]
+
+    def log_usage_batch(self, incident_id, lines):
+        """Offline inventory.log_usage_batch: all or nothing, queued as one batch."""
+        lines = merge_lines(lines)
+        if not lines:
+            return {}
+        with self.conn:
+            stock, shortages = self._use_stock(incident_id, lines)
+            if shortages:
+                raise BatchStockError(shortages) # Leaving the block rolls back the lines already applied
+            self._queue("log_usage_batch", "Resources", None, {"incident_id": incident_id, "lines": lines})
+        return stock
+
+    def dispatch(self, incident_id, personnel_ids, role=None):
+        """Offline dispatch.dispatch: skips anyone on an open incident here; the server re-checks on push."""
+        ids = sorted(set(personnel_ids))
+        marks = ", ".join("?" * len(ACTIVE_STATUSES))
+        now = datetime.now()
+        dispatched = 0
+        with self.conn:
+            for personnel_id in ids:
+                busy = self.conn.execute(f"SELECT 1 FROM Deployment AS D JOIN ResponseIncidents AS I "
+                                         f"ON D.incident_id = I.incident_id "
+                                         f"WHERE D.personnel_id = ? AND I.status IN ({marks})",
+                                         (personnel_id, *ACTIVE_STATUSES)).fetchone()
+                if busy:
+                    continue
+                dispatched += self.conn.execute(
+                    "INSERT INTO Deployment (deployment_id, incident_id, personnel_id, deployment_time, role_during_incident) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (incident_id, personnel_id) DO NOTHING",
+                    (self._temp_id("Deployment"), incident_id, personnel_id, now, role or None)).rowcount
+            if dispatched:
+                self._queue("dispatch", "Deployment", None,
+                            {"incident_id": incident_id, "personnel_ids": ids, "role": role or None})
+        return dispatched
+
+    def recall(self, incident_id, personnel_ids):
+        """Offline dispatch.recall."""
+        ids = sorted(set(personnel_ids))
+        if not ids:
+            return 0
+        with self.conn:
+            removed = self.conn.execute(f"DELETE FROM Deployment WHERE incident_id = ? "
+                                        f"AND personnel_id IN ({', '.join('?' * len(ids))})", (incident_id, *ids)).rowcount
+            if removed:
+                self._queue("recall", "Deployment", None, {"incident_id": incident_id, "personnel_ids": ids})
+        return removed
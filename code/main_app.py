@@ -1,10 +1,23 @@
 import tkinter as tk
 from tkinter import messagebox
-from db_connector import create_connection, close_connection
+from db_connector import create_pool
+from query_executor import QueryExecutor
+from reference_cache import LOOKUP_TABLES, ReferenceCache
 from personnel_module import PersonnelModule
 from incident_module import IncidentModule
 from resource_module import ResourceModule
 from report_module import ReportModule
+from performance_module import PerformanceModule
+from dashboard_module import DashboardModule
+from query_stats import configure_slow_log, watch_event_loop
+from grid_definitions import LOOKUPS
+from local_store import LocalPool, has_replica
+from sync_engine import SyncEngine
+from change_feed import ChangeFeed
+from forecast import refresh_stale
+
+SYNC_STATUS_MS = 2000 # How often the main window checks the sync engine (in-memory only)
+FORECAST_CHECK_MS = 3600 * 1000 # How often stock forecasts are checked for a new day's refresh
 
 class DreamsApp(tk.Tk):
     def __init__(self):
@@ -12,30 +25,77 @@ class DreamsApp(tk.Tk):
         self.title("MDRRMO DREAMS - Core Operations")
         self.geometry("800x600")
 
-        # Attempt to connect to the database
-        self.conn = create_connection()
-        if not self.conn:
-            messagebox.showerror("Database Error", "Failed to connect to the database. Check XAMPP and db_connector.py.")
-            self.destroy() # Close the app if connection fails
-            return
+        # Attempt to connect to the database (a shared pool; each module checks out connections per operation)
+        self.pool = create_pool()
+        self.offline = False
+        if not self.pool:
+            if not has_replica():
+                messagebox.showerror("Database Error", "Failed to connect to the database. Check XAMPP and db_connector.py.")
+                self.destroy() # Close the app if connection fails (and there is no local copy to fall back on)
+                return
+            # Work from the local replica; changes are queued and sent once the server is back (sync_engine.py)
+            messagebox.showwarning("Working Offline", "The central database cannot be reached.\n\n"
+                                   "You can keep working from this computer's copy of the records. Your changes are "
+                                   "saved locally and sent to the server automatically once the connection is back. "
+                                   "Reports are unavailable until then.")
+            self.pool = LocalPool()
+            self.offline = True
+
+        # Background worker threads for all DB work; results are delivered back on the Tk thread
+        self.executor = QueryExecutor(self.pool, self)
+        # Shared personnel/resource/incident lookups, invalidated by writes from any module
+        self.cache = ReferenceCache(self.executor)
+        # Slow statements, DB errors and UI stalls go to a rotating log (see query_stats.py)
+        self.slow_log_path = configure_slow_log()
+        watch_event_loop(self)
+        # Keeps the local replica current and pushes offline changes (background thread)
+        self.sync = SyncEngine()
+        self.sync.start()
+        # Tails the server's ChangeLog so open windows pick up each other's (and other workstations') writes
+        self.feed = ChangeFeed(self)
+        self.feed.subscribe(LOOKUP_TABLES.values(), self.cache.apply_changes, owner=self.cache)
+        self.feed.start()
 
         self.create_widgets()
+        self.after(SYNC_STATUS_MS, self.poll_sync)
+        self.refresh_forecasts()
+
+    def refresh_forecasts(self):
+        """Recomputes the stock forecasts not computed yet today (their usage window moves daily).
+
+        Usage entries refresh their own items as they are logged; this catches the rest.
+        """
+        if not self.offline:
+            # A failure is already in the slow-query log; the next check retries it
+            self.executor.submit(refresh_stale, on_error=lambda e: None, owner=self)
+        self.after(FORECAST_CHECK_MS, self.refresh_forecasts)
 
     def open_personnel_module(self):
         """Opens the Personnel Management window."""
-        PersonnelModule(self.conn, self)
+        PersonnelModule(self)
 
     def open_incident_module(self):
         """Opens the Incident Management window."""
-        IncidentModule(self.conn, self)
+        IncidentModule(self)
 
     def open_resource_module(self):
         """Opens the Resource Management window."""
-        ResourceModule(self.conn, self)
+        ResourceModule(self)
 
     def open_report_module(self):
-        """Opens the Resource Management window."""
-        ReportModule(self.conn, self)
+        """Opens the Reports window."""
+        if self.offline:
+            messagebox.showinfo("Working Offline", "Reports need the central database. They will be available again once the connection is back.")
+            return
+        ReportModule(self)
+
+    def open_dashboard(self):
+        """Opens the live operations dashboard (not modal; meant to stay open)."""
+        DashboardModule(self)
+
+    def open_performance_module(self):
+        """Opens the live query timing / slow-query window."""
+        PerformanceModule(self, self.slow_log_path)
 
     def create_widgets(self):
         # Placeholder for the main navigation area
@@ -58,10 +118,75 @@ class DreamsApp(tk.Tk):
         # 4. Reports Module (Queries)
         tk.Button(nav_frame, text="Generate Reports", width=25, command=self.open_report_module).pack(pady=15)
 
+        # 5. Live operations dashboard
+        tk.Button(nav_frame, text="Operations Dashboard", width=25, command=self.open_dashboard).pack(pady=5)
+
+        # 6. Performance diagnostics
+        tk.Button(nav_frame, text="Performance", width=25, command=self.open_performance_module).pack(pady=5)
+
+        # Connection / sync status line
+        status_frame = tk.Frame(self)
+        status_frame.pack(side='bottom', fill='x', padx=10, pady=5)
+        self.sync_status_var = tk.StringVar()
+        tk.Label(status_frame, textvariable=self.sync_status_var, anchor='w').pack(side='left', fill='x', expand=True)
+        tk.Button(status_frame, text="Sync Now", command=self.sync.sync_now).pack(side='right')
+
+    def use_pool(self, pool, offline):
+        """Points every module's queries at the server pool or the local replica."""
+        old_pool = self.pool
+        self.pool = self.executor.pool = pool # Jobs check out from executor.pool when they start
+        self.offline = offline
+        old_pool.close_all()
+        self.cache.invalidate(*LOOKUPS) # Re-read lookups from the new source
+        self.sync.sync_now()
+
+    def poll_sync(self):
+        """Follows the sync engine: switches between server and replica and shows the sync status."""
+        sync = self.sync
+        stranded = False # Server unreachable, but no replica to fall back on (same guard as at startup)
+        if self.offline and sync.online:
+            pool = create_pool()
+            if pool:
+                self.use_pool(pool, offline=False)
+        elif not self.offline and sync.online is False:
+            if has_replica():
+                self.use_pool(LocalPool(), offline=True)
+            else:
+                stranded = True
+
+        last_sync = f"last sync {sync.last_sync:%H:%M:%S}" if sync.last_sync else "not synced yet this session"
+        if self.offline:
+            status = f"Offline - {sync.pending} change(s) waiting to be sent ({last_sync})"
+        elif stranded:
+            status = (f"Error - the central database cannot be reached and there is no local copy to work from yet "
+                      f"(sync error: {sync.last_error})")
+        else:
+            status = f"Online - {last_sync}" + (f", {sync.pending} change(s) waiting" if sync.pending else "")
+            if sync.last_error:
+                status += f" (sync error: {sync.last_error})"
+            elif self.feed.online is False:
+                status += " - live updates paused"
+        self.sync_status_var.set(status)
+
+        conflicts = sync.take_conflicts()
+        if conflicts:
+            details = "\n".join(f"- {operation} on {table} ID {row_id}: {reason}"
+                                for _, _, operation, table, row_id, reason in conflicts[:10])
+            more = f"\n...and {len(conflicts) - 10} more." if len(conflicts) > 10 else ""
+            messagebox.showwarning("Sync Conflicts", f"{len(conflicts)} offline change(s) were not accepted by the "
+                                   f"server; the server's version was kept:\n\n{details}{more}")
+        self.after(SYNC_STATUS_MS, self.poll_sync)
+
     def on_closing(self):
-        """Cleanly closes the DB connection when the app is shut down."""
-        if self.conn:
-            close_connection(self.conn)
+        """Cleanly closes the DB connection pool when the app is shut down."""
+        if getattr(self, 'sync', None):
+            self.sync.stop()
+        if getattr(self, 'feed', None):
+            self.feed.stop()
+        if getattr(self, 'executor', None):
+            self.executor.shutdown()
+        if self.pool:
+            self.pool.close_all()
         self.destroy()
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+
+from db_connector import create_connection, close_connection, fetch_all, execute_write
+
+# Versioned schema changes live in database/migrations as NNN_description.sql and are
+# applied once each, in order, on top of 01_schema_creation.sql.
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database", "migrations")
+MIGRATION_NAME = re.compile(r"^(\d+)_.+\.sql$")
+
+# Base scripts the migrations build on, beyond 01_schema_creation.sql: a table each creates -> script
+# (002 and later add triggers that keep the summary tables correct)
+REQUIRED_SCRIPTS = {"IncidentSummary": "04_summary_tables.sql",
+                    "ResourceConsumptionSummary": "04_summary_tables.sql"}
+
+CREATE_HISTORY_TABLE = """
+    CREATE TABLE IF NOT EXISTS SchemaMigrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+class Migration:
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.version = int(MIGRATION_NAME.match(self.name).group(1))
+        with open(path, encoding="utf-8") as handle:
+            self.sql = handle.read()
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+    def statements(self):
+        return split_statements(self.sql)
+
+
+def split_statements(sql):
+    """Splits a script into statements, honouring DELIMITER lines (used around triggers) and -- comments."""
+    statements, current, delimiter = [], [], ";"
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if not current and (not stripped or stripped.startswith("--")):
+            continue
+        current.append(line)
+        if stripped.endswith(delimiter):
+            statement = "\n".join(current).rstrip()
+            statements.append(statement[:-len(delimiter)].strip())
+            current = []
+    if "".join(current).strip():
+        statements.append("\n".join(current).strip())
+    return statements
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Returns every migration file in version order."""
+    migrations = [Migration(os.path.join(directory, name))
+                  for name in sorted(os.listdir(directory)) if MIGRATION_NAME.match(name)]
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Two migration files share the same version number.")
+    return sorted(migrations, key=lambda migration: migration.version)
+
+
+def applied_migrations(conn):
+    """Maps version -> checksum for every migration already recorded in SchemaMigrations."""
+    execute_write(conn, CREATE_HISTORY_TABLE)
+    return dict(fetch_all(conn, "SELECT version, checksum FROM SchemaMigrations"))
+
+
+def pending_migrations(conn, migrations):
+    applied = applied_migrations(conn)
+    for migration in migrations:
+        if migration.version in applied and applied[migration.version] != migration.checksum:
+            print(f"Warning: {migration.name} was edited after it was applied; add a new migration instead.")
+    return [migration for migration in migrations if migration.version not in applied]
+
+
+def apply_migration(conn, migration):
+    """Runs one migration and records it. DDL commits implicitly in MySQL, so a failure part-way
+    leaves the earlier statements applied; fix the file's remaining statements and re-run."""
+    cursor = conn.cursor()
+    try:
+        for statement in migration.statements():
+            cursor.execute(statement)
+        cursor.execute("INSERT INTO SchemaMigrations (version, name, checksum) VALUES (%s, %s, %s)",
+                       (migration.version, migration.name, migration.checksum))
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def check_base_schema(conn):
+    """Raises RuntimeError naming the base scripts still to be imported before migrating."""
+    placeholders = ", ".join(["%s"] * len(REQUIRED_SCRIPTS))
+    present = {name.lower() for name, in fetch_all(
+        conn, f"SELECT table_name FROM information_schema.tables "
+              f"WHERE table_schema = DATABASE() AND table_name IN ({placeholders})", list(REQUIRED_SCRIPTS))}
+    missing = sorted({script for table, script in REQUIRED_SCRIPTS.items() if table.lower() not in present})
+    if missing:
+        raise RuntimeError(f"Import {', '.join(missing)} from the database folder before applying migrations.")
+
+
+def migrate(conn, migrations=None):
+    """Applies all pending migrations in order and returns the ones applied."""
+    migrations = load_migrations() if migrations is None else migrations
+    pending = pending_migrations(conn, migrations)
+    if pending:
+        check_base_schema(conn)
+    for migration in pending:
+        print(f"Applying {migration.name} ...")
+        apply_migration(conn, migration)
+    return pending
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations from database/migrations.")
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations without applying any")
+    args = parser.parse_args(argv)
+
+    connection = create_connection()
+    if connection is None:
+        return 1
+    try:
+        migrations = load_migrations()
+        if args.status:
+            applied = applied_migrations(connection)
+            for migration in migrations:
+                state = "applied" if migration.version in applied else "pending"
+                print(f"{migration.name:<40} {state}")
+            return 0
+        try:
+            applied = migrate(connection, migrations)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"{len(applied)} migration(s) applied; schema is up to date.")
+        return 0
+    finally:
+        close_connection(connection)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from db_connector import fetch_all
+from treeview_sync import fetch_changes, insertion_index, int_or_str, SYNC_MARGIN
+
+PAGE_SIZE = 100       # Rows fetched per round trip
+MAX_PAGES = 5         # Pages kept in the widget at once; older pages are dropped as the user scrolls
+PREFETCH_MARGIN = 0.2 # Fetch the next page once the view is within 20% of either edge
+
+
+class PagedTreeview(ttk.Treeview):
+    """A Treeview that only holds a sliding window of rows from a large table.
+
+    Rows are fetched in pages through a KeysetPager on the background
+    QueryExecutor.  When the user scrolls near the bottom (or top) of the
+    loaded window the next (or previous) page is fetched, and once more than
+    ``max_pages`` pages are loaded the page at the opposite end is dropped, so
+    memory use and insert time stay flat regardless of how big the table is.
+    It behaves like a normal Treeview otherwise (selection, item(), bindings).
+
+    With ``id_index`` set, item ids are the rows' primary keys and ``refresh()``
+    applies only rows whose ``version_columns`` (``updated_at``) changed since
+    the last load, updating or inserting them in place if they fall inside the
+    loaded window; ``remove_id()`` drops a row deleted by this window.
+    """
+
+    def __init__(self, parent, pager, executor, owner, columns, scrollbar=None,
+                 format_row=None, page_size=PAGE_SIZE, max_pages=MAX_PAGES, error_title="Database Error",
+                 id_index=None, version_columns=(), **kwargs):
+        super().__init__(parent, columns=columns, show='headings', **kwargs)
+        self.pager = pager
+        self.executor = executor
+        self.owner = owner
+        self.scrollbar = scrollbar
+        self.format_row = format_row
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.error_title = error_title
+        self.params = ()
+        self.id_index = id_index
+        self.version_columns = list(version_columns)
+        self.since = None     # High-water mark for incremental refresh()
+
+        self._pages = []      # List of pages, each a list of item ids in display order
+        self._keys = {}       # Maps item id -> keyset position of that row
+        self._rows = {}       # Maps item id -> raw row (including hidden columns)
+        self._at_start = True
+        self._at_end = False
+        self._loading = False
+        self._generation = 0  # Bumped on reload so results of stale fetches are ignored
+        self._placeholder = None
+
+        self.configure(yscrollcommand=self._on_scroll)
+
+    def reload(self, params=()):
+        """Discards the loaded window and fetches the first page again."""
+        self.params = tuple(params)
+        self._generation += 1
+        self._clear()
+        self._at_start = True
+        self._at_end = False
+        self._loading = False
+        self._fetch(after=None, before=None)
+
+    def _clear(self):
+        self.delete(*self.get_children())
+        self._pages = []
+        self._keys = {}
+        self._rows = {}
+        self._placeholder = None
+
+    # --- Scrolling / Prefetch ---
+
+    def _on_scroll(self, first, last):
+        """yscrollcommand hook: updates the scrollbar and prefetches near the edges."""
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        first, last = float(first), float(last)
+        if self._loading or not self._pages:
+            return
+        if last >= 1.0 - PREFETCH_MARGIN and not self._at_end:
+            self._fetch(after=self._edge_key(-1), before=None)
+        elif first <= PREFETCH_MARGIN and not self._at_start:
+            self._fetch(after=None, before=self._edge_key(0))
+
+    def _edge_key(self, page_index):
+        page = self._pages[page_index]
+        return self._keys[page[page_index]]
+
+    def _fetch(self, after, before):
+        self._loading = True
+        generation = self._generation
+        params = self.params
+        limit = self.page_size
+
+        def work(conn):
+            if after is None and before is None:
+                # First page: remember the server clock so refresh() only fetches later changes
+                server_time = fetch_all(conn, "SELECT CURRENT_TIMESTAMP(6)")[0][0]
+                return server_time - SYNC_MARGIN, self.pager.fetch_page(conn, limit, params=params)
+            return None, self.pager.fetch_page(conn, limit, after=after, before=before, params=params)
+
+        def on_success(result):
+            if generation != self._generation:
+                return
+            since, rows = result
+            if since is not None:
+                self.since = since
+            self._loading = False
+            if before is not None:
+                self._prepend_page(rows)
+            else:
+                self._append_page(rows, initial=after is None)
+
+        def on_error(e):
+            if generation != self._generation:
+                return
+            self._loading = False
+            messagebox.showerror(self.error_title, f"Failed to load data: {e}")
+
+        self.executor.submit(
+            work,
+            on_success,
+            on_error,
+            owner=self.owner,
+        )
+
+    # --- Window Management ---
+
+    def _insert_rows(self, rows, index):
+        page = []
+        for offset, row in enumerate(rows):
+            values = self.format_row(row) if self.format_row else row
+            iid = self._item_id(row)
+            if iid is not None and self.exists(iid):
+                self.remove_id(iid) # Already placed by an incremental refresh
+            iid = self.insert('', index if index == tk.END else index + offset, iid=iid,
+                              values=tuple(values)[:len(self['columns'])])
+            self._keys[iid] = self.pager.row_key(row)
+            self._rows[iid] = row
+            page.append(iid)
+        return page
+
+    def _append_page(self, rows, initial=False):
+        if len(rows) < self.page_size:
+            self._at_end = True
+        if not rows:
+            if initial:
+                self._placeholder = self.insert('', tk.END, values=("(No Data Available)",) * len(self['columns']))
+            return
+
+        self._pages.append(self._insert_rows(rows, tk.END))
+        if len(self._pages) > self.max_pages:
+            self._drop_page(0)
+            self._at_start = False
+
+    def _prepend_page(self, rows):
+        if len(rows) < self.page_size:
+            self._at_start = True
+        if not rows:
+            return
+
+        anchor = self._pages[0][0] if self._pages else None
+        self._pages.insert(0, self._insert_rows(rows, 0))
+        if len(self._pages) > self.max_pages:
+            self._drop_page(-1)
+            self._at_end = False
+        if anchor is not None:
+            self.see(anchor) # Keep the row the user was looking at in view
+
+    def _drop_page(self, page_index):
+        page = self._pages.pop(page_index)
+        for iid in page:
+            self._keys.pop(iid, None)
+            self._rows.pop(iid, None)
+        self.delete(*page)
+
+    # --- Incremental Refresh ---
+
+    def raw_row(self, iid):
+        """Returns the unformatted row behind an item, including hidden key/id columns."""
+        return self._rows.get(iid)
+
+    def _item_id(self, row):
+        return str(row[self.id_index]) if self.id_index is not None else None
+
+    def refresh(self):
+        """Fetches only rows changed since the last load/refresh and applies them to the window."""
+        if self.since is None or self._loading:
+            self.reload(self.params)
+            return
+        generation = self._generation
+        since, params = self.since, self.params
+
+        def on_success(result):
+            if generation != self._generation:
+                return
+            self.since, rows = result
+            self.apply_changes(rows)
+
+        self.executor.submit(
+            lambda conn: fetch_changes(conn, self.pager, self.version_columns, since, params),
+            on_success,
+            lambda e: messagebox.showerror(self.error_title, f"Failed to refresh data: {e}"),
+            owner=self.owner,
+        )
+
+    def apply_changes(self, rows):
+        """Updates or inserts changed rows that fall inside the loaded window."""
+        for row in rows:
+            iid = self._item_id(row)
+            key = self.pager.row_key(row)
+            values = tuple(self.format_row(row) if self.format_row else row)[:len(self['columns'])]
+            if self.exists(iid):
+                if self._keys[iid] == key:
+                    self.item(iid, values=values)
+                    self._rows[iid] = row
+                    continue
+                self.remove_id(iid) # Sort key changed: re-place it below
+
+            children = [child for page in self._pages for child in page]
+            index = insertion_index([self._keys[child] for child in children], key, self.pager.descending)
+            # Rows sorting before/after the loaded window are picked up when the user scrolls there
+            if (index == 0 and not self._at_start) or (index == len(children) and not self._at_end):
+                continue
+
+            if self._placeholder is not None:
+                self.delete(self._placeholder)
+                self._placeholder = None
+            self.insert('', index, iid=iid, values=values)
+            self._keys[iid] = key
+            self._rows[iid] = row
+            if not self._pages:
+                self._pages.append([iid])
+                continue
+            # Add the row to the page of its neighbour so page eviction stays consistent
+            neighbour = children[index - 1] if index > 0 else children[0]
+            for page in self._pages:
+                if neighbour in page:
+                    page.insert(page.index(neighbour) + (1 if index > 0 else 0), iid)
+                    break
+
+    def remove_id(self, pk):
+        """Removes a row (by primary key) from the window, e.g. after deleting it."""
+        iid = str(int_or_str(pk))
+        if not self.exists(iid):
+            return
+        self.delete(iid)
+        self._keys.pop(iid, None)
+        self._rows.pop(iid, None)
+        for page in self._pages:
+            if iid in page:
+                page.remove(iid)
+                if not page:
+                    self._pages.remove(page)
+                break
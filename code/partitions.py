@@ -0,0 +1,79 @@
+import argparse
+import re
+import sys
+from datetime import date
+
+from db_connector import create_connection, close_connection, fetch_all, execute_write
+
+# Year-partitioned tables (migration 002) and the catch-all partition new years are split from
+PARTITIONED_TABLES = ["ResponseIncidentsArchive", "DeploymentArchive", "ResourceUsageArchive"]
+FUTURE_PARTITION = "p_future"
+YEARS_AHEAD = 2 # Keep partitions ready for this many years past the current one
+
+YEAR_PARTITION = re.compile(r"^p(\d{4})$")
+
+LIST_PARTITIONS = """
+    SELECT PARTITION_NAME, TABLE_ROWS
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION
+"""
+
+
+def partition_years(conn, table):
+    """Returns the years that already have their own partition in ``table``."""
+    return {int(match.group(1)) for name, _ in fetch_all(conn, LIST_PARTITIONS, (table,))
+            if (match := YEAR_PARTITION.match(name))}
+
+
+def add_year_partitions(conn, table, through_year):
+    """Splits p_future so every year up to ``through_year`` gets its own partition.
+
+    p_future should be empty for future years, so the reorganize is cheap.
+    Returns the years added.
+    """
+    existing = partition_years(conn, table)
+    start = max(existing) + 1 if existing else date.today().year
+    years = list(range(start, through_year + 1))
+    if not years:
+        return []
+    partitions = ", ".join(f"PARTITION p{year} VALUES LESS THAN ({year + 1})" for year in years)
+    execute_write(conn, f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO "
+                        f"({partitions}, PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE)")
+    return years
+
+
+def ensure_future_partitions(conn, years_ahead=YEARS_AHEAD, tables=PARTITIONED_TABLES):
+    """Makes sure each partitioned table has yearly partitions through ``years_ahead`` years from now."""
+    through_year = date.today().year + years_ahead
+    return {table: add_year_partitions(conn, table, through_year) for table in tables}
+
+
+def main(argv=None):
+    """Partition maintenance, e.g. ``python partitions.py`` (schedule it yearly) or ``--list``."""
+    parser = argparse.ArgumentParser(description="Create upcoming yearly partitions for the archive tables.")
+    parser.add_argument("--years-ahead", type=int, default=YEARS_AHEAD,
+                        help=f"Years past the current one to prepare (default {YEARS_AHEAD})")
+    parser.add_argument("--list", action="store_true", help="Only list the existing partitions and their row estimates")
+    args = parser.parse_args(argv)
+
+    connection = create_connection()
+    if connection is None:
+        return 1
+    try:
+        if args.list:
+            for table in PARTITIONED_TABLES:
+                print(table)
+                for name, rows in fetch_all(connection, LIST_PARTITIONS, (table,)):
+                    print(f"  {name:<16} ~{rows} rows")
+            return 0
+        for table, years in ensure_future_partitions(connection, args.years_ahead).items():
+            added = ", ".join(str(year) for year in years) or "none needed"
+            print(f"{table}: partitions added for {added}")
+        return 0
+    finally:
+        close_connection(connection)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
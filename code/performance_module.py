@@ -0,0 +1,94 @@
+import tkinter as tk
+from tkinter import ttk
+from db_connector import statement_cache_stats
+from query_stats import MONITOR
+
+REFRESH_MS = 1000 # Reads in-memory counters only; never queries the database
+
+class PerformanceModule(tk.Toplevel):
+    """Live view of query timings, slow statements and UI stalls recorded by query_stats."""
+
+    def __init__(self, master, log_path=None):
+        super().__init__(master)
+        self.monitor = MONITOR
+        self.title("Performance")
+        self.geometry("1200x650")
+        # Not modal: it is meant to stay open next to the windows being diagnosed
+
+        self.summary_var = tk.StringVar()
+        tk.Label(self, textvariable=self.summary_var, anchor='w', justify='left').pack(fill='x', padx=10, pady=5)
+        if log_path:
+            tk.Label(self, text=f"Slow-query log: {log_path}", anchor='w', fg='grey').pack(fill='x', padx=10)
+
+        # --- Per-Statement Totals ---
+        stats_frame = tk.LabelFrame(self, text="Statements (by total time)")
+        stats_frame.pack(fill='both', expand=True, padx=10, pady=5)
+        columns = ("Statement", "Caller", "Calls", "Avg ms", "Max ms", "Total ms", "Rows", "Errors")
+        self.stats_tree = ttk.Treeview(stats_frame, columns=columns, show='headings')
+        widths = {"Statement": 430, "Caller": 260, "Calls": 60, "Avg ms": 70, "Max ms": 70, "Total ms": 80,
+                  "Rows": 70, "Errors": 60}
+        for col in columns:
+            self.stats_tree.heading(col, text=col)
+            self.stats_tree.column(col, width=widths[col], anchor='w' if col in ("Statement", "Caller") else 'e')
+        vsb = ttk.Scrollbar(stats_frame, orient="vertical", command=self.stats_tree.yview)
+        vsb.pack(side='right', fill='y')
+        self.stats_tree.configure(yscrollcommand=vsb.set)
+        self.stats_tree.pack(fill='both', expand=True)
+
+        # --- Recent Slow Statements and UI Stalls ---
+        slow_frame = tk.LabelFrame(self, text=f"Recent slow statements (>= {self.monitor.slow_ms} ms) and UI stalls")
+        slow_frame.pack(fill='both', expand=True, padx=10, pady=5)
+        columns = ("Time", "ms", "Rows", "Caller", "Statement")
+        self.slow_tree = ttk.Treeview(slow_frame, columns=columns, show='headings', height=8)
+        widths = {"Time": 140, "ms": 70, "Rows": 60, "Caller": 260, "Statement": 560}
+        for col in columns:
+            self.slow_tree.heading(col, text=col)
+            self.slow_tree.column(col, width=widths[col], anchor='e' if col in ("ms", "Rows") else 'w')
+        self.slow_tree.pack(fill='both', expand=True)
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(pady=5)
+        tk.Button(button_frame, text="Reset Statistics", command=self.reset_statistics).pack(side='left', padx=5)
+
+        self._job = None
+        self.refresh()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def refresh(self):
+        """Redraws both tables from the monitor and schedules the next refresh."""
+        totals = self.monitor.snapshot()
+        slow, stalls = self.monitor.recent_events()
+        cache = statement_cache_stats()
+        calls = sum(row["calls"] for row in totals)
+        errors = sum(row["errors"] for row in totals)
+        hit_rate = f"{cache['hit_rate']:.0%}" if cache['hit_rate'] is not None else "n/a"
+        self.summary_var.set(
+            f"Since {self.monitor.started:%Y-%m-%d %H:%M:%S}: {calls} statements, {len(totals)} distinct, "
+            f"{errors} errors, {len(slow)} slow, {len(stalls)} UI stalls   |   "
+            f"Prepared statement cache hit rate: {hit_rate} ({cache['hits']} reused / {cache['misses']} prepared)"
+        )
+
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for row in totals:
+            self.stats_tree.insert('', tk.END, values=(
+                row["fingerprint"], row["caller"], row["calls"], f"{row['avg_ms']:.1f}", f"{row['max_ms']:.1f}",
+                f"{row['total_ms']:.0f}", row["rows"], row["errors"]))
+
+        events = slow + [(when, ms, "", "(Tk event loop)", "UI stall") for when, ms in stalls]
+        self.slow_tree.delete(*self.slow_tree.get_children())
+        for when, ms, rows, caller, statement in sorted(events, key=lambda event: event[0], reverse=True):
+            self.slow_tree.insert('', tk.END, values=(f"{when:%Y-%m-%d %H:%M:%S}", f"{ms:.0f}", rows, caller, statement))
+
+        self._job = self.after(REFRESH_MS, self.refresh)
+
+    def reset_statistics(self):
+        self.monitor.reset()
+        if self._job is not None:
+            self.after_cancel(self._job)
+        self.refresh()
+
+    def on_close(self):
+        """Handles closing the Toplevel window."""
+        if self._job is not None:
+            self.after_cancel(self._job)
+        self.destroy()
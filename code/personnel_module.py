@@ -1,11 +1,16 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from mysql.connector import Error
+from tkinter import ttk, messagebox, filedialog
+from grid_definitions import PERSONNEL_GRID
+from treeview_sync import TreeviewSync
+from bulk_import import import_file
+from repositories import Personnel, PersonnelRepo
 
 class PersonnelModule(tk.Toplevel):
-    def __init__(self, connection, master):
+    def __init__(self, master):
         super().__init__(master)
-        self.conn = connection
+        self.executor = master.executor # Runs queries off the Tk thread
+        self.cache = master.cache # Shared lookups; invalidated after every personnel write
+        self.feed = master.feed # Personnel changed elsewhere (other windows/workstations)
         self.title("Personnel Management (CRUD)")
         self.geometry("1000x600")
         
@@ -27,8 +32,9 @@ class PersonnelModule(tk.Toplevel):
         self.view_frame.pack(side='right', fill='both', expand=True, padx=10, pady=5)
         self.create_data_view()
 
-        # Load data immediately
+        # Load data immediately, then apply changes as the change feed reports them
         self.load_personnel_data()
+        self.feed.subscribe(("Personnel",), self.on_changes, owner=self)
         
         # Set protocol for closing the window cleanly
         self.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -73,6 +79,7 @@ class PersonnelModule(tk.Toplevel):
         self.update_btn.pack(side='left', padx=5)
         
         tk.Button(self.form_frame, text="Clear Form", command=self.clear_form).pack(pady=5)
+        tk.Button(self.form_frame, text="Import from File...", command=self.import_personnel).pack(pady=5)
         
     def create_data_view(self):
         # --- Treeview (Data Grid) ---
@@ -103,6 +110,10 @@ class PersonnelModule(tk.Toplevel):
         
         self.tree.pack(fill='both', expand=True)
         
+        # Tracks rows by personnel_id so refreshes only touch rows that changed
+        self.sync = TreeviewSync(self.tree, PERSONNEL_GRID, self.executor, self, version_columns=["updated_at"],
+                                 id_query="SELECT personnel_id FROM Personnel")
+
         # Bind event: When a row is selected, populate the form for editing
         self.tree.bind('<<TreeviewSelect>>', self.select_personnel)
 
@@ -112,25 +123,16 @@ class PersonnelModule(tk.Toplevel):
     # --- CRUD Methods ---
 
     def load_personnel_data(self):
-        """CRUD - R (READ)"""
-        # Clear existing data in the Treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        cursor = self.conn.cursor()
-        try:
-            # Query to fetch all personnel data
-            cursor.execute("SELECT personnel_id, name, role, specialty, contact_number, assigned_unit FROM Personnel")
-            records = cursor.fetchall()
-            
-            # Insert data into the Treeview
-            for row in records:
-                self.tree.insert('', tk.END, values=row)
-                
-        except Error as e:
-            messagebox.showerror("Database Error", f"Failed to load personnel data: {e}")
-        finally:
-            cursor.close()
+        """CRUD - R (READ): Loads all personnel once, then only rows changed since the last load."""
+        self.sync.refresh()
+
+    def on_changes(self, changes):
+        """ChangeFeed subscriber: removes deleted rows and fetches only the rows changed since the last sync."""
+        for change in changes:
+            if change.operation == 'D':
+                self.sync.remove(change.row_id)
+        if any(change.operation != 'D' for change in changes):
+            self.sync.refresh()
 
     def add_personnel(self):
         """CRUD - C (CREATE)"""
@@ -145,21 +147,43 @@ class PersonnelModule(tk.Toplevel):
             messagebox.showwarning("Input Error", "All fields except Specialty must be filled.")
             return
 
-        query = "INSERT INTO Personnel (name, role, specialty, contact_number, assigned_unit) VALUES (%s, %s, %s, %s, %s)"
-        values = (name, role, specialty, contact, unit)
-        
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute(query, values)
-            self.conn.commit()
+        person = Personnel(None, name, role, specialty, contact, unit)
+
+        def on_success(_):
+            self.cache.invalidate("personnel")
             messagebox.showinfo("Success", "New personnel added successfully!")
             self.load_personnel_data() # Refresh table
             self.clear_form()
-        except Error as e:
-            messagebox.showerror("Database Error", f"Failed to add personnel: {e}")
-            self.conn.rollback()
-        finally:
-            cursor.close()
+
+        # Uncommitted work is rolled back automatically when the connection returns to the pool
+        self.executor.submit(
+            lambda conn: PersonnelRepo(conn).add(person),
+            on_success,
+            lambda e: messagebox.showerror("Database Error", f"Failed to add personnel: {e}"),
+            owner=self,
+        )
+
+    def import_personnel(self):
+        """Bulk loads personnel rows from a CSV or Excel file (see bulk_import)."""
+        path = filedialog.askopenfilename(parent=self, title="Import Personnel",
+                                          filetypes=[("CSV / Excel", "*.csv *.xlsx"), ("All Files", "*.*")])
+        if not path:
+            return
+
+        def on_success(result):
+            self.cache.invalidate("personnel")
+            message = f"{result.inserted} personnel rows imported."
+            if result.rejected:
+                message += f"\n{result.rejected} rows were rejected; see {result.reject_path}"
+            messagebox.showinfo("Import Complete", message)
+            self.load_personnel_data()
+
+        def on_error(e):
+            self.cache.invalidate("personnel") # Chunks committed before the failure are kept
+            messagebox.showerror("Import Error", f"Import stopped: {e}")
+            self.load_personnel_data()
+
+        self.executor.submit(lambda conn: import_file(conn, "personnel", path), on_success, on_error, owner=self)
 
     def select_personnel(self, event):
         """Populates the form when a row in the Treeview is selected."""
@@ -193,21 +217,20 @@ class PersonnelModule(tk.Toplevel):
         contact = self.contact_entry.get()
         unit = self.unit_entry.get()
         
-        query = "UPDATE Personnel SET name=%s, role=%s, specialty=%s, contact_number=%s, assigned_unit=%s WHERE personnel_id=%s"
-        values = (name, role, specialty, contact, unit, personnel_id)
-        
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute(query, values)
-            self.conn.commit()
+        person = Personnel(personnel_id, name, role, specialty, contact, unit)
+
+        def on_success(_):
+            self.cache.invalidate("personnel")
             messagebox.showinfo("Success", f"Personnel ID {personnel_id} updated successfully!")
             self.load_personnel_data()
             self.clear_form()
-        except Error as e:
-            messagebox.showerror("Database Error", f"Failed to update personnel: {e}")
-            self.conn.rollback()
-        finally:
-            cursor.close()
+
+        self.executor.submit(
+            lambda conn: PersonnelRepo(conn).update(person),
+            on_success,
+            lambda e: messagebox.showerror("Database Error", f"Failed to update personnel: {e}"),
+            owner=self,
+        )
 
     def delete_personnel(self):
         """CRUD - D (DELETE)"""
@@ -219,24 +242,22 @@ class PersonnelModule(tk.Toplevel):
         personnel_id = self.tree.item(selected_item, 'values')[0]
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete Personnel ID {personnel_id}?"):
-            query = "DELETE FROM Personnel WHERE personnel_id = %s"
-            cursor = self.conn.cursor()
-            try:
-                # Note: Deleting personnel might violate FK constraints in ResponseIncidents (commander_id) or Deployment. 
-                # For this project, assume personnel must not be deleted if they commanded an incident.
-                cursor.execute(query, (personnel_id,))
-                self.conn.commit()
+            # Note: Deleting personnel might violate FK constraints in ResponseIncidents (commander_id) or Deployment. 
+            # For this project, assume personnel must not be deleted if they commanded an incident.
+
+            def on_success(_):
+                self.cache.invalidate("personnel")
                 messagebox.showinfo("Success", "Personnel record deleted.")
-                self.load_personnel_data()
+                self.sync.remove(personnel_id)
                 self.clear_form()
-            except Error as e:
-                if e.errno == 1451: # MySQL error for Foreign Key constraint
+
+            def on_error(e):
+                if getattr(e, 'errno', None) == 1451: # MySQL error for Foreign Key constraint
                     messagebox.showerror("Constraint Error", f"Cannot delete Personnel ID {personnel_id}. They are linked as a Commander or deployed to an active incident.")
                 else:
                     messagebox.showerror("Database Error", f"Failed to delete personnel: {e}")
-                self.conn.rollback()
-            finally:
-                cursor.close()
+
+            self.executor.submit(lambda conn: PersonnelRepo(conn).delete(personnel_id), on_success, on_error, owner=self)
 
     def clear_form(self, keep_id=False):
         self.name_entry.delete(0, tk.END)
@@ -252,5 +273,7 @@ class PersonnelModule(tk.Toplevel):
 
     def on_close(self):
         """Handles closing the Toplevel window."""
+        self.executor.cancel(self) # Drop any queries still running for this window
+        self.feed.unsubscribe(self)
         self.grab_release()
         self.destroy()
\ No newline at end of file
@@ -0,0 +1,119 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# How often (in milliseconds) the Tk event loop checks for finished queries
+POLL_INTERVAL_MS = 50
+
+
+class QueryTask:
+    """Handle for one unit of database work submitted to the QueryExecutor."""
+
+    def __init__(self, work, on_success, on_error, owner):
+        self.work = work
+        self.on_success = on_success
+        self.on_error = on_error
+        self.owner = owner
+        self.future = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Stops the task if it has not started yet and drops its result otherwise."""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class QueryExecutor:
+    """Runs database work on background threads so the Tk mainloop never blocks.
+
+    ``work`` is a function that receives a pooled connection and returns a
+    result; it runs on a worker thread and must not touch any widgets.  The
+    result (or the exception raised) is queued and delivered on the Tk thread
+    by an ``after()`` polling loop to ``on_success`` / ``on_error``, which are
+    free to update widgets.  Tasks are tagged with an ``owner`` (usually the
+    Toplevel that submitted them) so everything a window started can be
+    cancelled when it is closed.
+    """
+
+    def __init__(self, pool, root, workers=None):
+        self.pool = pool
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=workers or pool.size, thread_name_prefix="dreams-db")
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._tasks = {}  # Maps owner -> set of pending QueryTasks
+        self._after_id = self.root.after(POLL_INTERVAL_MS, self._dispatch_results)
+
+    def submit(self, work, on_success=None, on_error=None, owner=None):
+        """Schedules ``work(conn)`` on a worker thread and returns its QueryTask."""
+        task = QueryTask(work, on_success, on_error, owner)
+        with self._lock:
+            self._tasks.setdefault(owner, set()).add(task)
+        task.future = self._executor.submit(self._run, task)
+        return task
+
+    def cancel(self, owner):
+        """Cancels every outstanding task submitted by ``owner`` (e.g. a window being closed)."""
+        with self._lock:
+            tasks = self._tasks.pop(owner, set())
+        for task in tasks:
+            task.cancel()
+
+    def shutdown(self):
+        """Stops the dispatcher and abandons any queued work (called on application shutdown)."""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        with self._lock:
+            tasks = [task for owner_tasks in self._tasks.values() for task in owner_tasks]
+            self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Worker Side ---
+
+    def _run(self, task):
+        """Executes a task on a worker thread with a connection checked out from the pool."""
+        if task.cancelled:
+            return
+        try:
+            with self.pool.connection() as conn:
+                result = task.work(conn)
+            self._results.put((task, result, None))
+        except Exception as e:
+            self._results.put((task, None, e))
+
+    # --- Tk Side ---
+
+    def _dispatch_results(self):
+        """Delivers finished results to their callbacks on the Tk thread."""
+        while True:
+            try:
+                task, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            with self._lock:
+                owner_tasks = self._tasks.get(task.owner)
+                if owner_tasks is not None:
+                    owner_tasks.discard(task)
+                    if not owner_tasks:
+                        del self._tasks[task.owner]
+
+            if task.cancelled:
+                continue
+            try:
+                if error is None:
+                    if task.on_success:
+                        task.on_success(result)
+                elif task.on_error:
+                    task.on_error(error)
+                else:
+                    raise error
+            except Exception as e:
+                # Surface callback failures the same way Tk reports errors in event handlers
+                self.root.report_callback_exception(type(e), e, e.__traceback__)
+
+        self._after_id = self.root.after(POLL_INTERVAL_MS, self._dispatch_results)
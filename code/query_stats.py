@@ -0,0 +1,260 @@
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+
+# Statements slower than this (execute + fetch) go to the slow-query log
+SLOW_QUERY_MS = 200
+# Tk event loop gaps longer than this are logged as UI stalls ("the app froze")
+UI_STALL_MS = 500
+UI_PROBE_MS = 100 # How often the event loop is probed
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "logs")
+SLOW_LOG_NAME = "slow_queries.log"
+LOG_MAX_BYTES = 1_000_000 # Rotated at ~1 MB, keeping LOG_BACKUPS old files
+LOG_BACKUPS = 5
+RECENT_EVENTS = 200 # Slow statements / stalls kept in memory for the Performance window
+MAX_FINGERPRINTS = 500 # Further distinct statements are counted under "(other)"
+
+# Frames from these modules are data-access plumbing; the reported caller is the first frame outside them
+PLUMBING_MODULES = {"db_connector", "query_stats", "repositories", "inventory", "keyset_pager", "treeview_sync",
+                    "query_executor", "report_export", "local_store", "dispatch", "forecast", "threading"}
+PLUMBING_PREFIXES = ("mysql.", "concurrent.")
+
+slow_log = logging.getLogger("dreams.slow_queries")
+slow_log.addHandler(logging.NullHandler()) # Silent until configure_slow_log() (the GUI) adds a file
+
+
+# --- Fingerprints ---
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_REPEATED_UNION = re.compile(r"(SELECT [^()]*?)(?: UNION ALL \1)+")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """Normalizes a statement so every call of the same query shape is counted together.
+
+    Literals and placeholders become ``?``, IN lists collapse to ``(?+)`` and
+    repeated ``UNION ALL`` batch rows (inventory.log_usage_batch) to one.
+    """
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode("utf-8", "replace")
+    text = _SPACE.sub(" ", sql).strip().rstrip(";")
+    text = _STRING.sub("?", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _VALUE_LIST.sub("(?+)", text)
+    return _REPEATED_UNION.sub(r"\1 UNION ALL ...", text)
+
+
+def calling_frame(depth=2):
+    """Returns ``module.Class.method`` of the code that issued the statement (skipping DB plumbing)."""
+    frame = sys._getframe(depth)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module not in PLUMBING_MODULES and not module.startswith(PLUMBING_PREFIXES):
+            name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+            return f"{module}.{name.split('.<locals>')[0]}"
+        frame = frame.f_back
+    return "(unknown)"
+
+
+# --- Aggregation ---
+
+class StatementTotals:
+    __slots__ = ("fingerprint", "calls", "total_ms", "max_ms", "rows", "errors", "caller")
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.caller = None
+
+
+class QueryMonitor:
+    """Thread-safe per-statement timings shared by every instrumented connection."""
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._totals = {}
+            self.slow = deque(maxlen=RECENT_EVENTS)   # (time, ms, rows, caller, fingerprint)
+            self.stalls = deque(maxlen=RECENT_EVENTS) # (time, ms)
+            self.started = datetime.now()
+
+    def record(self, sql, duration_ms, rows, caller, error=None):
+        key = fingerprint(sql)
+        with self._lock:
+            totals = self._totals.get(key)
+            if totals is None:
+                if len(self._totals) >= MAX_FINGERPRINTS:
+                    key = "(other)"
+                totals = self._totals.setdefault(key, StatementTotals(key))
+            totals.calls += 1
+            totals.total_ms += duration_ms
+            totals.max_ms = max(totals.max_ms, duration_ms)
+            totals.rows += rows
+            totals.caller = caller
+            if error is not None:
+                totals.errors += 1
+            slow = duration_ms >= self.slow_ms
+            if slow:
+                self.slow.append((datetime.now(), duration_ms, rows, caller, key))
+        if error is not None:
+            slow_log.warning("ERROR %.1f ms caller=%s error=%s | %s", duration_ms, caller, error, key)
+        elif slow:
+            slow_log.warning("SLOW %.1f ms rows=%d caller=%s | %s", duration_ms, rows, caller, key)
+
+    def record_stall(self, duration_ms):
+        with self._lock:
+            self.stalls.append((datetime.now(), duration_ms))
+        slow_log.warning("UI STALL %.0f ms (Tk event loop blocked)", duration_ms)
+
+    def recent_events(self):
+        """Copies of the recent slow statements and UI stalls (safe to iterate on the Tk thread)."""
+        with self._lock:
+            return list(self.slow), list(self.stalls)
+
+    def snapshot(self):
+        """Per-statement totals as dicts, most total time first."""
+        with self._lock:
+            rows = [{"fingerprint": t.fingerprint, "caller": t.caller, "calls": t.calls,
+                     "total_ms": t.total_ms, "avg_ms": t.total_ms / t.calls, "max_ms": t.max_ms,
+                     "rows": t.rows, "errors": t.errors} for t in self._totals.values()]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+
+MONITOR = QueryMonitor()
+
+
+def configure_slow_log(directory=LOG_DIR):
+    """Sends slow statements, errors and UI stalls to a rotating log file; returns its path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.abspath(os.path.join(directory, SLOW_LOG_NAME))
+    if not any(getattr(handler, "baseFilename", None) == path for handler in slow_log.handlers):
+        handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s [%(threadName)s] %(message)s"))
+        slow_log.addHandler(handler)
+        slow_log.setLevel(logging.WARNING)
+        slow_log.propagate = False
+    return path
+
+
+# --- Instrumented Cursors ---
+
+class InstrumentedCursor:
+    """Wraps a mysql-connector cursor and times every execute, plus the fetches that drain its result.
+
+    A statement is recorded once its rows are fully fetched (or right away when
+    it returns none), so unbuffered streaming reads are timed end to end.
+    """
+
+    def __init__(self, cursor, monitor):
+        self._cursor = cursor
+        self._monitor = monitor
+        self._pending = None # [sql, ms so far, rows so far, caller] while rows remain unread
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _finish(self):
+        if self._pending is not None:
+            self._monitor.record(*self._pending)
+            self._pending = None
+
+    def _timed(self, method, sql, *args, **kwargs):
+        self._finish()
+        caller = calling_frame(3)
+        started = time.perf_counter()
+        try:
+            result = method(sql, *args, **kwargs)
+        except Exception as e:
+            self._monitor.record(sql, (time.perf_counter() - started) * 1000, 0, caller, error=e)
+            raise
+        elapsed = (time.perf_counter() - started) * 1000
+        if self._cursor.with_rows:
+            self._pending = [sql, elapsed, 0, caller]
+        else:
+            self._monitor.record(sql, elapsed, max(self._cursor.rowcount, 0), caller)
+        return result
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.executemany, operation, *args, **kwargs)
+
+    def _fetched(self, started, count, done):
+        if self._pending is not None:
+            self._pending[1] += (time.perf_counter() - started) * 1000
+            self._pending[2] += count
+            if done:
+                self._finish()
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def fetchmany(self, size=None):
+        size = size or self._cursor.arraysize
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(size)
+        self._fetched(started, len(rows), len(rows) < size)
+        return rows
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(started, 0 if row is None else 1, row is None)
+        return row
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+
+def instrument(connection, monitor=MONITOR):
+    """Makes every cursor the connection hands out (plain or prepared) an InstrumentedCursor."""
+    make_cursor = connection.cursor
+    connection.cursor = lambda *args, **kwargs: InstrumentedCursor(make_cursor(*args, **kwargs), monitor)
+    return connection
+
+
+# --- UI Stall Watchdog ---
+
+def watch_event_loop(root, monitor=MONITOR, probe_ms=UI_PROBE_MS, stall_ms=UI_STALL_MS):
+    """Re-arms a short ``after()`` probe on the Tk loop and records every time it fires far too late."""
+    expected = [time.perf_counter() + probe_ms / 1000]
+
+    def probe():
+        now = time.perf_counter()
+        late_ms = (now - expected[0]) * 1000
+        if late_ms >= stall_ms:
+            monitor.record_stall(late_ms + probe_ms)
+        expected[0] = now + probe_ms / 1000
+        root.after(probe_ms, probe)
+
+    root.after(probe_ms, probe)
@@ -0,0 +1,182 @@
+import time
+from tkinter import messagebox
+from typing import Callable, NamedTuple
+
+from db_connector import fetch_all, fetch_prepared
+from grid_definitions import LOOKUPS
+
+# Cached lookups are re-read after this many seconds even without a local write,
+# so changes made from another workstation still show up eventually.
+CACHE_TTL_SECONDS = 300
+
+
+class LookupSource(NamedTuple):
+    table: str
+    key: str
+    order: Callable # Sort key for a row, matching the ORDER BY of the lookup query
+
+
+# Where each lookup comes from, so ChangeLog changes (change_feed.py) patch just the rows they name
+LOOKUP_SOURCES = {
+    "personnel": LookupSource("Personnel", "personnel_id", lambda row: (row[1].casefold(), row[0])),
+    "resources": LookupSource("Resources", "resource_id", lambda row: (row[1].casefold(), row[0])),
+    "incidents": LookupSource("ResponseIncidents", "incident_id", lambda row: -row[0]),
+}
+LOOKUP_TABLES = {name: source.table for name, source in LOOKUP_SOURCES.items()}
+
+
+class LookupTable:
+    """One loaded lookup set, indexed both by id and by display name."""
+
+    def __init__(self, version, rows, label):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.rows = rows
+        self.by_id = {}    # Maps id -> display name
+        self.by_name = {}  # Maps display name -> id (in query order)
+        for row in rows:
+            name = label(row)
+            self.by_id[row[0]] = name
+            self.by_name[name] = row[0]
+
+    def names(self):
+        return list(self.by_name)
+
+    def expired(self, ttl):
+        return time.monotonic() - self.loaded_at > ttl
+
+
+class ReferenceCache:
+    """Application-wide cache of personnel, resource and incident lookups, owned by DreamsApp.
+
+    Windows ask for a lookup with ``get()`` (or ``subscribe()`` to be re-fed
+    whenever it changes) instead of querying it themselves, so opening a window
+    costs no round trip once the data is cached.  Any module that writes to one
+    of the underlying tables calls ``invalidate()``; that bumps the lookup's
+    version, drops the cached copy and reloads it for current subscribers.
+    Changes from other workstations arrive through ``apply_changes()``, which
+    re-reads only the rows they name and notifies subscribers only when a
+    display name was added, changed or removed; entries older than ``ttl`` seconds are reloaded on the next request anyway.
+    All methods are called on the Tk thread; loading runs on the QueryExecutor.
+    """
+
+    def __init__(self, executor, ttl=CACHE_TTL_SECONDS):
+        self.executor = executor
+        self.ttl = ttl
+        self._entries = {}                              # Maps lookup name -> LookupTable
+        self._versions = {name: 0 for name in LOOKUPS}  # Bumped by invalidate()
+        self._waiting = {}                              # Maps lookup name -> callbacks waiting for a load
+        self._subscribers = {}                          # Maps lookup name -> list of (owner, callback)
+        self._patching = {}                             # Maps lookup name -> ids changed while a patch is in flight
+
+    def get(self, name, callback, on_error=None):
+        """Calls ``callback(LookupTable)`` now if cached and fresh, otherwise once it has loaded."""
+        entry = self._entries.get(name)
+        if entry is not None and entry.version == self._versions[name] and not entry.expired(self.ttl):
+            callback(entry)
+            return
+
+        waiting = self._waiting.setdefault(name, [])
+        waiting.append((callback, on_error))
+        if len(waiting) == 1: # Only one load per lookup in flight
+            self._load(name)
+
+    def subscribe(self, name, callback, owner):
+        """Feeds ``callback`` the lookup now and again every time it is invalidated."""
+        self._subscribers.setdefault(name, []).append((owner, callback))
+        self.get(name, callback)
+
+    def unsubscribe(self, owner):
+        """Removes every subscription made by ``owner`` (call when a window closes)."""
+        for name, subscribers in self._subscribers.items():
+            self._subscribers[name] = [(o, cb) for o, cb in subscribers if o is not owner]
+
+    def invalidate(self, *names):
+        """Marks lookups stale after a write and pushes fresh copies to subscribers."""
+        for name in names:
+            self._versions[name] += 1
+            self._entries.pop(name, None)
+            if self._subscribers.get(name):
+                self.get(name, lambda entry, name=name: self._notify(name, entry))
+
+    def apply_changes(self, changes):
+        """ChangeFeed subscriber: brings the cached lookups up to date with rows changed here or elsewhere.
+
+        Most changes (a stock decrement, an incident status) leave every display
+        name as it was, so instead of reloading a whole lookup only the changed
+        ids are re-read; a row that no longer comes back was deleted.
+        """
+        for name, source in LOOKUP_SOURCES.items():
+            ids = {change.row_id for change in changes if change.table == source.table}
+            if not ids:
+                continue
+            if name in self._waiting:
+                self.invalidate(name) # The load in flight may have read the rows before they changed
+            elif name in self._patching:
+                self._patching[name] |= ids # One patch per lookup at a time, so reads apply in order
+            elif name in self._entries:
+                self._patch(name, ids)
+
+    def _patch(self, name, ids):
+        query, label = LOOKUPS[name]
+        source = LOOKUP_SOURCES[name]
+        ids = sorted(ids)
+        select = query.rpartition(" ORDER BY ")[0]
+        changed_rows = f"{select} WHERE {source.key} IN ({', '.join(['%s'] * len(ids))})"
+        version = self._versions[name]
+        self._patching[name] = set()
+
+        def finish():
+            more = self._patching.pop(name)
+            if more and name in self._entries:
+                self._patch(name, more)
+
+        def on_success(rows):
+            entry = self._entries.get(name)
+            if entry is not None and entry.version == version:
+                found = {row[0]: row for row in rows}
+                changed = set(ids)
+                if any(entry.by_id.get(row_id) != (label(found[row_id]) if row_id in found else None)
+                       for row_id in ids):
+                    kept = [row for row in entry.rows if row[0] not in changed]
+                    patched = LookupTable(entry.version, sorted(kept + list(rows), key=source.order), label)
+                    patched.loaded_at = entry.loaded_at # Still re-read in full once the TTL runs out
+                    self._entries[name] = patched
+                    self._notify(name, patched)
+            finish()
+
+        def on_error(e):
+            self._entries.pop(name, None) # Reloaded in full on the next request
+            finish()
+
+        self.executor.submit(lambda conn: fetch_all(conn, changed_rows, ids), on_success, on_error, owner=self)
+
+    def _notify(self, name, entry):
+        for owner, callback in list(self._subscribers.get(name, [])):
+            callback(entry)
+
+    def _load(self, name):
+        query, label = LOOKUPS[name]
+        version = self._versions[name]
+
+        def on_success(rows):
+            entry = LookupTable(version, rows, label)
+            if version == self._versions[name]:
+                self._entries[name] = entry
+            for callback, _ in self._waiting.pop(name, []):
+                callback(entry)
+            if version != self._versions[name] and self._subscribers.get(name):
+                # Invalidated while loading: fetch again so subscribers end up current
+                self.get(name, lambda fresh: self._notify(name, fresh))
+
+        def on_error(e):
+            callbacks = self._waiting.pop(name, [])
+            handled = False
+            for _, errback in callbacks:
+                if errback:
+                    errback(e)
+                    handled = True
+            if not handled:
+                messagebox.showerror("DB Error", f"Could not load {name} list: {e}")
+
+        self.executor.submit(lambda conn: fetch_prepared(conn, query), on_success, on_error, owner=self)
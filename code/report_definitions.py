@@ -0,0 +1,197 @@
+from datetime import date, datetime
+
+from forecast import DAYS_OF_COVER, REORDER_AT
+from keyset_pager import KeysetPager
+
+# The queries saved in 03_reporting_queries.sql (reading the summary tables from
+# 04_summary_tables.sql where they aggregate), shared by the Reports window and the
+# export engine (no Tk imports here, so exports can also run headless).
+# Each query is a keyset-pagination template: {where} goes before any GROUP BY and
+# ORDER BY {order} is filled from "key" (ordering columns, unique per row, with their
+# position in the result row). Columns selected past "columns" are hidden key columns.
+# "sources" lists the tables whose changes make a loaded report stale (see VERSION_PROBES).
+# "date_column" (indexed) restricts the report to a period such as year-to-date; reports
+# without one always cover all data.
+REPORTS = {
+    "Incident Performance": {
+        # Deployment counts come pre-aggregated from IncidentSummary (04_summary_tables.sql)
+        "query": """
+            SELECT
+                S.incident_id, I.incident_type, P_Commander.name AS Commander, S.date_reported,
+                S.personnel_deployed AS Personnel_Deployed
+            FROM IncidentSummary AS S
+            JOIN ResponseIncidents AS I ON I.incident_id = S.incident_id
+            JOIN Personnel AS P_Commander ON I.commander_id = P_Commander.personnel_id
+            {where}
+            ORDER BY {order}
+        """,
+        "key": [("S.date_reported", 3), ("S.incident_id", 0)],
+        "descending": True,
+        "columns": ["ID", "Incident Type", "Commander", "Date Reported", "Deployed Count"],
+        "sources": ["IncidentSummary", "ResponseIncidents", "Personnel"],
+        "date_column": "S.date_reported"
+    },
+    "Personnel Utilization": {
+        "query": """
+            SELECT
+                P.name, P.specialty, I.incident_type, D.deployment_time, D.role_during_incident,
+                D.deployment_id
+            FROM Deployment AS D
+            JOIN Personnel AS P ON D.personnel_id = P.personnel_id
+            JOIN ResponseIncidents AS I ON D.incident_id = I.incident_id
+            {where}
+            ORDER BY {order}
+        """,
+        "key": [("D.deployment_time", 3), ("D.deployment_id", 5)],
+        "descending": True,
+        "columns": ["Personnel Name", "Specialty", "Incident Type", "Deployment Time", "Role"],
+        "sources": ["Deployment", "Personnel", "ResponseIncidents"],
+        "date_column": "D.deployment_time"
+    },
+    "Resource Consumption Detail": {
+        "query": """
+            SELECT
+                I.incident_id, I.incident_location, R.item_name, RU.quantity_used, R.unit_of_measure,
+                RU.usage_id
+            FROM ResourceUsage AS RU
+            JOIN ResponseIncidents AS I ON RU.incident_id = I.incident_id
+            JOIN Resources AS R ON RU.resource_id = R.resource_id
+            {where}
+            ORDER BY {order}
+        """,
+        "key": [("RU.incident_id", 0), ("RU.usage_id", 5)], # Served by idx_usage_incident (migration 001)
+        "descending": False,
+        "columns": ["Incident ID", "Location", "Resource", "Quantity Used", "Unit"],
+        "sources": ["ResourceUsage", "ResponseIncidents", "Resources"]
+    },
+    "Low-Stock Inventory Alert": {
+        # Each item's own threshold: manual reorder level, else forecast reorder point (forecast.py)
+        "query": f"""
+            SELECT R.item_name, R.category, R.stock_level, R.unit_of_measure, {REORDER_AT} AS reorder_at,
+                   F.daily_burn, {DAYS_OF_COVER} AS days_of_cover, R.resource_id
+            FROM Resources AS R
+            LEFT JOIN StockForecast AS F ON F.resource_id = R.resource_id
+            {{where}}
+            ORDER BY {{order}}
+        """,
+        "filters": [f"R.stock_level <= {REORDER_AT}"],
+        "key": [("R.stock_level", 2), ("R.resource_id", 7)],
+        "descending": False,
+        "columns": ["Item Name", "Category", "Stock Level", "Unit", "Reorder At", "Daily Use", "Days of Cover"],
+        "sources": ["Resources", "StockForecast"]
+    },
+    "Incidents Lacking Resource Logs": {
+        # The anti-join is replaced by the usage_lines counter kept in IncidentSummary
+        "query": """
+            SELECT S.incident_id, I.incident_type, S.date_reported, I.commander_id
+            FROM IncidentSummary AS S
+            JOIN ResponseIncidents AS I ON I.incident_id = S.incident_id
+            {where}
+            ORDER BY {order}
+        """,
+        "filters": ["S.usage_lines = 0"],
+        "key": [("S.date_reported", 2), ("S.incident_id", 0)],
+        "descending": True,
+        "columns": ["Incident ID", "Incident Type", "Date Reported", "Commander ID"],
+        "sources": ["IncidentSummary", "ResponseIncidents"],
+        "date_column": "S.date_reported"
+    },
+    "Resource Consumption Totals": {
+        "query": """
+            SELECT R.item_name, R.category, C.total_used, R.unit_of_measure, C.incidents_served, C.last_used,
+                   C.resource_id
+            FROM ResourceConsumptionSummary AS C
+            JOIN Resources AS R ON R.resource_id = C.resource_id
+            {where}
+            ORDER BY {order}
+        """,
+        "key": [("C.total_used", 2), ("C.resource_id", 6)],
+        "descending": True,
+        "columns": ["Item Name", "Category", "Total Used", "Unit", "Incidents Served", "Last Used"],
+        "sources": ["ResourceConsumptionSummary", "Resources"]
+    },
+    "Daily Incident Counts": {
+        "query": """
+            SELECT report_date, incident_count
+            FROM DailyIncidentCounts
+            {where}
+            ORDER BY {order}
+        """,
+        "filters": ["incident_count > 0"],
+        "key": [("report_date", 0)],
+        "descending": True,
+        "columns": ["Date", "Incidents Reported"],
+        "sources": ["DailyIncidentCounts"],
+        "date_column": "report_date"
+    }
+}
+
+
+# One cheap scalar per table that changes whenever its rows do: the newest updated_at row version
+# (read from its index; the bridge tables have one since migration 006, so in-place edits such as
+# a usage line logged again count too). Row counts catch deletes.
+VERSION_PROBES = {
+    "Personnel": "SELECT CONCAT_WS('/', MAX(updated_at), COUNT(*)) FROM Personnel",
+    "ResponseIncidents": "SELECT CONCAT_WS('/', MAX(updated_at), COUNT(*)) FROM ResponseIncidents",
+    "Resources": "SELECT CONCAT_WS('/', MAX(updated_at), COUNT(*)) FROM Resources",
+    "Deployment": "SELECT CONCAT_WS('/', MAX(updated_at), COUNT(*)) FROM Deployment",
+    "ResourceUsage": "SELECT CONCAT_WS('/', MAX(updated_at), COUNT(*)) FROM ResourceUsage",
+    "IncidentSummary": "SELECT CONCAT_WS('/', MAX(updated_at), COUNT(*)) FROM IncidentSummary",
+    "ResourceConsumptionSummary": "SELECT CONCAT_WS('/', MAX(updated_at), COUNT(*)) FROM ResourceConsumptionSummary",
+    "DailyIncidentCounts": "SELECT CONCAT_WS('/', MAX(updated_at), COUNT(*)) FROM DailyIncidentCounts",
+    "StockForecast": "SELECT CONCAT_WS('/', MAX(updated_at), COUNT(*)) FROM StockForecast",
+}
+
+
+def version_query(report):
+    """Builds a one-row query returning the report's data-version token (one column per source table)."""
+    return "SELECT " + ", ".join(f"({VERSION_PROBES[table]})" for table in report['sources'])
+
+
+def format_report_cell(item):
+    if isinstance(item, datetime):
+        return item.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(item, date):
+        return item.strftime('%Y-%m-%d')
+    return item
+
+
+def format_report_row(row):
+    """Formats date/datetime objects in a report row for display."""
+    return [format_report_cell(item) for item in row]
+
+
+# Report periods offered by the Reports window and the export command
+PERIODS = ["All Time", "Year to Date"]
+
+
+def period_start(period, today=None):
+    """Returns the first datetime covered by ``period`` (None for all time)."""
+    if period == "Year to Date":
+        today = today or date.today()
+        return datetime(today.year, 1, 1)
+    return None
+
+
+def report_pager(report, since=None, until=None):
+    """Builds the KeysetPager for a report definition.
+
+    With ``since`` (and/or ``until``, exclusive), reports that have a "date_column"
+    only read rows in that range (a range on the column's index); pass
+    ``report_params(report, since, until)`` as the query params.
+    """
+    pager = KeysetPager(report['query'], report['key'], report['descending'], report.get('filters', ()))
+    column = report.get('date_column')
+    if column:
+        bounds = [f"{column} >= %s"] if since is not None else []
+        bounds += [f"{column} < %s"] if until is not None else []
+        if bounds:
+            pager = pager.with_filters(bounds)
+    return pager
+
+
+def report_params(report, since=None, until=None):
+    """The query params matching ``report_pager(report, since, until)``."""
+    if not report.get('date_column'):
+        return ()
+    return tuple(bound for bound in (since, until) if bound is not None)
@@ -0,0 +1,212 @@
+import argparse
+import csv
+import os
+import sys
+
+from report_definitions import REPORTS, PERIODS, format_report_row, period_start, report_pager, report_params
+
+try:
+    import openpyxl # Optional: only needed for .xlsx exports
+except ImportError:
+    openpyxl = None
+
+try:
+    from reportlab.lib.pagesizes import A4, landscape # Optional: only needed for .pdf exports
+    from reportlab.pdfgen import canvas
+except ImportError:
+    canvas = None
+
+FETCH_SIZE = 500 # Rows pulled from the server per fetchmany() call
+
+
+# --- Writers ---
+# Each writer takes rows in batches and writes them straight out, so no format needs the whole report in memory.
+
+class CsvReportWriter:
+    def __init__(self, path, title, columns):
+        self.handle = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.handle)
+        self.writer.writerow(columns)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.handle.close()
+
+
+class XlsxReportWriter:
+    def __init__(self, path, title, columns):
+        if openpyxl is None:
+            raise RuntimeError("Excel export requires the 'openpyxl' package (pip install openpyxl).")
+        self.path = path
+        # write_only workbooks stream rows to a temp file instead of building the sheet in memory
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(title[:31]) # Excel caps sheet names at 31 characters
+        self.sheet.append(columns)
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+class PdfReportWriter:
+    """Draws the report as a plain landscape table, starting a new page whenever one fills up."""
+
+    MARGIN = 36
+    LINE_HEIGHT = 14
+    FONT_SIZE = 8
+
+    def __init__(self, path, title, columns):
+        if canvas is None:
+            raise RuntimeError("PDF export requires the 'reportlab' package (pip install reportlab).")
+        self.canvas = canvas.Canvas(path, pagesize=landscape(A4))
+        self.width, self.height = landscape(A4)
+        self.title = title
+        self.columns = columns
+        self.column_width = (self.width - 2 * self.MARGIN) / len(columns)
+        self.page_number = 0
+        self._start_page()
+
+    def _start_page(self):
+        self.page_number += 1
+        self.y = self.height - self.MARGIN
+        self.canvas.setFont("Helvetica-Bold", 12)
+        self.canvas.drawString(self.MARGIN, self.y, f"{self.title} (page {self.page_number})")
+        self.y -= 2 * self.LINE_HEIGHT
+        self.canvas.setFont("Helvetica-Bold", self.FONT_SIZE)
+        self._draw_line(self.columns)
+        self.canvas.setFont("Helvetica", self.FONT_SIZE)
+
+    def _draw_line(self, values):
+        characters = int(self.column_width / (self.FONT_SIZE * 0.5)) # Rough fit for Helvetica
+        for position, value in enumerate(values):
+            text = "" if value is None else str(value)
+            if len(text) > characters:
+                text = text[:characters - 1] + "…"
+            self.canvas.drawString(self.MARGIN + position * self.column_width, self.y, text)
+        self.y -= self.LINE_HEIGHT
+
+    def write_rows(self, rows):
+        for row in rows:
+            if self.y < self.MARGIN:
+                self.canvas.showPage()
+                self._start_page()
+            self._draw_line(row)
+
+    def close(self):
+        self.canvas.save()
+
+
+# Maps file extension -> writer class
+WRITERS = {
+    "csv": CsvReportWriter,
+    "xlsx": XlsxReportWriter,
+    "pdf": PdfReportWriter,
+}
+
+
+# --- Export Engine ---
+
+def stream_rows(conn, query, params=(), fetch_size=FETCH_SIZE):
+    """Yields batches of rows from an unbuffered cursor, so the client never holds the full result."""
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def export_format(path, fmt=None):
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format '{fmt}' (use {', '.join(WRITERS)}).")
+    return fmt
+
+
+def export_report(conn, report_name, path, fmt=None, progress=None, since=None, until=None):
+    """Streams every row of a report into a CSV/XLSX/PDF file and returns the row count.
+
+    ``progress(count)`` is called after each fetched batch.  Hidden key
+    columns are dropped and dates formatted exactly as in the Reports window.
+    ``since`` / ``until`` limit dated reports to rows in that range (see report_pager).
+    """
+    report = REPORTS[report_name]
+    writer_class = WRITERS[export_format(path, fmt)]
+    columns = report['columns']
+    writer = writer_class(path, report_name, columns)
+    count = 0
+    try:
+        query = report_pager(report, since, until).full_query()
+        for rows in stream_rows(conn, query, report_params(report, since, until)):
+            writer.write_rows([format_report_row(row)[:len(columns)] for row in rows])
+            count += len(rows)
+            if progress:
+                progress(count)
+    finally:
+        writer.close()
+    return count
+
+
+def export_query(conn, title, query, path, fmt=None, params=(), progress=None):
+    """Streams any SELECT into a CSV/XLSX/PDF file headed by its result columns; returns the row count.
+
+    Used for ad-hoc queries such as those saved in 03_reporting_queries.sql,
+    which have no report definition to take column titles from.
+    """
+    writer_class = WRITERS[export_format(path, fmt)]
+    cursor = conn.cursor(buffered=False)
+    count = 0
+    try:
+        cursor.execute(query, params)
+        writer = writer_class(path, title, [column[0] for column in cursor.description])
+        try:
+            while True:
+                rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    break
+                writer.write_rows([format_report_row(row) for row in rows])
+                count += len(rows)
+                if progress:
+                    progress(count)
+        finally:
+            writer.close()
+    finally:
+        cursor.close()
+    return count
+
+
+# --- Command Line ---
+
+def main(argv=None):
+    """Headless export, e.g. ``python report_export.py "Personnel Utilization" utilization.xlsx``."""
+    from db_connector import create_connection, close_connection
+
+    parser = argparse.ArgumentParser(description="Export a DREAMS report to CSV, XLSX or PDF.")
+    parser.add_argument("report", choices=list(REPORTS), help="Report name as shown on its tab")
+    parser.add_argument("output", help="Output file; the format is taken from its extension")
+    parser.add_argument("--format", choices=list(WRITERS), help="Override the format given by the extension")
+    parser.add_argument("--period", choices=PERIODS, default=PERIODS[0], help="Limit dated reports to a period")
+    args = parser.parse_args(argv)
+
+    connection = create_connection()
+    if connection is None:
+        return 1
+    try:
+        count = export_report(connection, args.report, args.output, args.format, since=period_start(args.period))
+    finally:
+        close_connection(connection)
+    print(f"Exported {count} rows of '{args.report}' to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,105 +1,140 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from mysql.connector import Error
+from tkinter import ttk, messagebox, filedialog
+from report_definitions import REPORTS, PERIODS, format_report_row, period_start, report_pager, report_params
+from paged_treeview import PagedTreeview
+from report_export import WRITERS
+from repositories import ReportRepo
+
+AUTO_REFRESH_MS = 60000 # While auto-refresh is on, the visible report is re-checked this often
 
 class ReportModule(tk.Toplevel):
-    def __init__(self, connection, master):
+    def __init__(self, master):
         super().__init__(master)
-        self.conn = connection
+        self.executor = master.executor # Runs report queries off the Tk thread
         self.title("DREAMS Reporting & Analytics")
         self.geometry("1200x700")
 
         self.transient(master)
         self.grab_set()
 
-        # Define the queries you saved in 03_reporting_queries.sql
-        self.reports = {
-            "Incident Performance": {
-                "query": """
-                    SELECT
-                        I.incident_id, I.incident_type, P_Commander.name AS Commander, I.date_reported, 
-                        COUNT(D.personnel_id) AS Personnel_Deployed
-                    FROM ResponseIncidents AS I
-                    JOIN Personnel AS P_Commander ON I.commander_id = P_Commander.personnel_id
-                    LEFT JOIN Deployment AS D ON I.incident_id = D.incident_id
-                    GROUP BY I.incident_id, I.incident_type, P_Commander.name, I.date_reported
-                    ORDER BY I.date_reported DESC;
-                """,
-                "columns": ["ID", "Incident Type", "Commander", "Date Reported", "Deployed Count"]
-            },
-            "Personnel Utilization": {
-                "query": """
-                    SELECT
-                        P.name, P.specialty, I.incident_type, D.deployment_time, D.role_during_incident
-                    FROM Deployment AS D
-                    JOIN Personnel AS P ON D.personnel_id = P.personnel_id
-                    JOIN ResponseIncidents AS I ON D.incident_id = I.incident_id
-                    ORDER BY D.deployment_time DESC;
-                """,
-                "columns": ["Personnel Name", "Specialty", "Incident Type", "Deployment Time", "Role"]
-            },
-            "Resource Consumption Detail": {
-                "query": """
-                    SELECT
-                        I.incident_id, I.incident_location, R.item_name, RU.quantity_used, R.unit_of_measure
-                    FROM ResourceUsage AS RU
-                    JOIN ResponseIncidents AS I ON RU.incident_id = I.incident_id
-                    JOIN Resources AS R ON RU.resource_id = R.resource_id
-                    ORDER BY I.incident_id, R.item_name;
-                """,
-                "columns": ["Incident ID", "Location", "Resource", "Quantity Used", "Unit"]
-            },
-            "Low-Stock Inventory Alert": {
-                "query": """
-                    SELECT item_name, category, stock_level, unit_of_measure
-                    FROM Resources
-                    WHERE stock_level <= 5
-                    ORDER BY stock_level ASC;
-                """,
-                "columns": ["Item Name", "Category", "Stock Level", "Unit"]
-            },
-            "Incidents Lacking Resource Logs": {
-                "query": """
-                    SELECT I.incident_id, I.incident_type, I.date_reported, I.commander_id
-                    FROM ResponseIncidents AS I
-                    LEFT JOIN ResourceUsage AS RU ON I.incident_id = RU.incident_id
-                    WHERE RU.usage_id IS NULL;
-                """,
-                "columns": ["Incident ID", "Incident Type", "Date Reported", "Commander ID"]
-            }
-        }
+        self.reports = REPORTS # See report_definitions.py
+        # Per-report state: tab frame, its PagedTreeview once built, and the data-version token it was loaded at
+        self.views = {}
+        self.auto_refresh = tk.BooleanVar(value=True)
+        self.period = tk.StringVar(value=PERIODS[0])
+        self._auto_job = None
 
         # --- Main Layout ---
         tk.Label(self, text="DREAMS Analytical Reports", font=("Arial", 16, 'bold')).pack(pady=10)
+
+        # Period: dated reports read only the selected range through their date index
+        period_frame = tk.Frame(self)
+        period_frame.pack(anchor='w', padx=10)
+        tk.Label(period_frame, text="Period:").pack(side='left')
+        period_menu = ttk.Combobox(period_frame, textvariable=self.period, values=PERIODS, state='readonly', width=15)
+        period_menu.pack(side='left', padx=5)
+        period_menu.bind('<<ComboboxSelected>>', self.on_period_changed)
         
         # Notebook for Tabs
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(pady=10, padx=10, fill='both', expand=True)
 
+        tk.Checkbutton(self, text="Auto-refresh reports when data changes", variable=self.auto_refresh,
+                       command=self.schedule_auto_refresh).pack(anchor='w', padx=10)
+
         self.create_report_tabs()
+        self.schedule_auto_refresh()
         
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def create_report_tabs(self):
-        """Creates a tab for each defined report."""
-        for name, data in self.reports.items():
+        """Creates an empty tab for each defined report; a report only runs once its tab is shown."""
+        for name in self.reports:
             frame = ttk.Frame(self.notebook, padding="10")
             self.notebook.add(frame, text=name)
-            self.create_report_view(frame, name, data['query'], data['columns'])
+            self.views[name] = {"frame": frame, "tree": None, "token": None, "checking": False}
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        self.show_report(self.current_report())
+
+    def current_report(self):
+        return self.notebook.tab(self.notebook.select(), 'text')
+
+    def on_tab_changed(self, event):
+        self.show_report(self.current_report())
+
+    def show_report(self, report_name):
+        """Builds a report's view the first time it is shown; afterwards reuses the loaded rows."""
+        view = self.views[report_name]
+        if view["tree"] is None:
+            view["tree"] = self.create_report_view(view["frame"], report_name, self.reports[report_name])
+            self.check_report_version(report_name)
+        elif self.auto_refresh.get() or view["token"] is None: # No token: the period changed while hidden
+            self.check_report_version(report_name)
+
+    def since(self):
+        return period_start(self.period.get())
+
+    def on_period_changed(self, event=None):
+        """Points every built report at the new period; the visible one reloads now, the rest when shown."""
+        since = self.since()
+        for name, view in self.views.items():
+            if view["tree"] is not None:
+                view["tree"].pager = report_pager(self.reports[name], since)
+                view["token"] = None
+        self.check_report_version(self.current_report(), force=True)
+
+    def check_report_version(self, report_name, force=False):
+        """Reloads a report if its data-version token moved since it was loaded (or always, with ``force``)."""
+        view = self.views[report_name]
+        if view["checking"]:
+            return
+        view["checking"] = True
 
-    def create_report_view(self, parent_frame, report_name, query, columns):
-        """Builds the Treeview and loads data for a specific report."""
+        def on_success(token):
+            view["checking"] = False
+            if force or token != view["token"]:
+                view["token"] = token
+                self.load_report_data(view["tree"], report_params(self.reports[report_name], self.since()))
+
+        def on_error(e):
+            view["checking"] = False
+            messagebox.showerror("Report Generation Error", f"Failed to check report data: {e}")
+
+        self.executor.submit(lambda conn: ReportRepo(conn).version(report_name), on_success, on_error, owner=self)
+
+    def schedule_auto_refresh(self):
+        if self._auto_job is not None:
+            self.after_cancel(self._auto_job)
+            self._auto_job = None
+        if self.auto_refresh.get():
+            self._auto_job = self.after(AUTO_REFRESH_MS, self._auto_refresh_tick)
+
+    def _auto_refresh_tick(self):
+        self._auto_job = None
+        self.check_report_version(self.current_report())
+        self.schedule_auto_refresh()
+
+    def create_report_view(self, parent_frame, report_name, report):
+        """Builds the paged Treeview for a specific report and returns it (rows are loaded separately)."""
+        columns = report['columns']
         
         # Label/Title
         tk.Label(parent_frame, text=report_name, font=("Arial", 12, 'underline')).pack(pady=5)
+        button_frame = tk.Frame(parent_frame)
+        button_frame.pack(anchor='e')
+        tk.Button(button_frame, text="Refresh", command=lambda: self.check_report_version(report_name, force=True)).pack(side='left', padx=5)
+        tk.Button(button_frame, text="Export...", command=lambda: self.export_report_file(report_name)).pack(side='left')
 
-        # Treeview Setup
-        tree = ttk.Treeview(parent_frame, columns=columns, show='headings')
+        # Treeview Setup (only a window of rows is fetched at a time, see paged_treeview.py)
+        pager = report_pager(report, self.since())
+        tree = PagedTreeview(parent_frame, pager, self.executor, self, columns,
+                             format_row=format_report_row, error_title="Report Generation Error")
         
         # Scrollbars
         vsb = ttk.Scrollbar(parent_frame, orient="vertical", command=tree.yview)
         hsb = ttk.Scrollbar(parent_frame, orient="horizontal", command=tree.xview)
-        tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        tree.scrollbar = vsb
+        tree.configure(xscrollcommand=hsb.set)
 
         # Headings
         for col in columns:
@@ -110,37 +145,33 @@ class ReportModule(tk.Toplevel):
         hsb.pack(side='bottom', fill='x')
         tree.pack(fill='both', expand=True)
 
-        # Load Data
-        self.load_report_data(tree, query)
-        
-    def load_report_data(self, tree_widget, query):
-        """Executes a SQL query and populates the given Treeview widget."""
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute(query)
-            records = cursor.fetchall()
-
-            if not records:
-                tree_widget.insert('', tk.END, values=("(No Data Available)",) * len(tree_widget["columns"]))
-                return
-
-            for row in records:
-                # Format datetime objects for display
-                formatted_row = []
-                for item in row:
-                    if hasattr(item, 'strftime'): # Check if it's a datetime object
-                        formatted_row.append(item.strftime('%Y-%m-%d %H:%M:%S'))
-                    else:
-                        formatted_row.append(item)
-                        
-                tree_widget.insert('', tk.END, values=tuple(formatted_row))
-
-        except Error as e:
-            messagebox.showerror("Report Generation Error", f"Failed to execute report query: {e}")
-        finally:
-            cursor.close()
+        return tree
+
+    def load_report_data(self, tree_widget, params=()):
+        """(Re)loads the first page of a report into its paged Treeview."""
+        tree_widget.reload(params)
+
+    def export_report_file(self, report_name):
+        """Exports the full report (not just the loaded pages) to CSV/XLSX/PDF in the background."""
+        path = filedialog.asksaveasfilename(
+            parent=self, title=f"Export {report_name}", defaultextension=".csv",
+            filetypes=[(fmt.upper(), f"*.{fmt}") for fmt in WRITERS],
+        )
+        if not path:
+            return
+
+        since = self.since()
+        self.executor.submit(
+            lambda conn: ReportRepo(conn).export(report_name, path, since=since),
+            lambda count: messagebox.showinfo("Export Complete", f"{count} rows exported to {path}"),
+            lambda e: messagebox.showerror("Export Error", f"Failed to export {report_name}: {e}"),
+            owner=self,
+        )
 
     def on_close(self):
         """Handles closing the Toplevel window."""
+        self.executor.cancel(self) # Drop any report queries still running for this window
+        if self._auto_job is not None:
+            self.after_cancel(self._auto_job)
         self.grab_release()
         self.destroy()
\ No newline at end of file
@@ -0,0 +1,240 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from db_connector import fetch_prepared, run_transaction, statement_cache
+from dispatch import ACTIVE_DEPLOYMENTS, ACTIVE_STATUSES, INCIDENT_TEAM, ROSTER, AvailabilityIndex, TeamMember, dispatch, recall
+from forecast import SET_REORDER_LEVEL, STOCK_OUTLOOK, StockOutlook
+from inventory import log_usage, log_usage_batch
+from report_definitions import REPORTS, report_pager, report_params, version_query
+from report_export import export_report
+
+# Data access for the modules, kept free of Tk so every query can be batched, profiled and
+# benchmarked headlessly. A repository wraps one pooled connection; create it inside the
+# executor job, e.g. ``executor.submit(lambda conn: PersonnelRepo(conn).delete(pk), ...)``.
+
+
+# --- Typed Rows ---
+# Field order matches the table columns, so fetched rows map straight onto them.
+
+class Personnel(NamedTuple):
+    personnel_id: Optional[int]
+    name: str
+    role: str
+    specialty: Optional[str]
+    contact_number: str
+    assigned_unit: str
+
+
+class Incident(NamedTuple):
+    incident_id: Optional[int]
+    incident_type: str
+    incident_location: str
+    date_reported: datetime
+    status: str
+    commander_id: int
+
+
+class Resource(NamedTuple):
+    resource_id: Optional[int]
+    item_name: str
+    category: str
+    stock_level: int
+    unit_of_measure: str
+
+
+class UsageRecord(NamedTuple):
+    usage_id: int
+    incident_id: int
+    item_name: str
+    quantity_used: int
+
+
+# --- Statements ---
+# Fixed, parameterized SQL only; values are never formatted into the text, so each one is
+# prepared once per connection and re-executed from the statement cache (db_connector).
+
+PERSONNEL_COLUMNS = "personnel_id, name, role, specialty, contact_number, assigned_unit"
+SELECT_PERSONNEL = f"SELECT {PERSONNEL_COLUMNS} FROM Personnel WHERE personnel_id = %s"
+INSERT_PERSONNEL = "INSERT INTO Personnel (name, role, specialty, contact_number, assigned_unit) VALUES (%s, %s, %s, %s, %s)"
+UPDATE_PERSONNEL = ("UPDATE Personnel SET name=%s, role=%s, specialty=%s, contact_number=%s, assigned_unit=%s "
+                    "WHERE personnel_id=%s")
+DELETE_PERSONNEL = "DELETE FROM Personnel WHERE personnel_id = %s"
+
+INCIDENT_COLUMNS = "incident_id, incident_type, incident_location, date_reported, status, commander_id"
+SELECT_INCIDENT = f"SELECT {INCIDENT_COLUMNS} FROM ResponseIncidents WHERE incident_id = %s"
+INSERT_INCIDENT = ("INSERT INTO ResponseIncidents (incident_type, incident_location, date_reported, status, commander_id) "
+                   "VALUES (%s, %s, %s, %s, %s)")
+UPDATE_INCIDENT = ("UPDATE ResponseIncidents SET incident_type=%s, incident_location=%s, date_reported=%s, status=%s, "
+                   "commander_id=%s WHERE incident_id=%s")
+# Deployment and ResourceUsage rows are removed by ON DELETE CASCADE (migration 002)
+DELETE_INCIDENT = "DELETE FROM ResponseIncidents WHERE incident_id = %s"
+
+RESOURCE_COLUMNS = "resource_id, item_name, category, stock_level, unit_of_measure"
+SELECT_RESOURCE = f"SELECT {RESOURCE_COLUMNS} FROM Resources WHERE resource_id = %s"
+INSERT_RESOURCE = "INSERT INTO Resources (item_name, category, stock_level, unit_of_measure) VALUES (%s, %s, %s, %s)"
+UPDATE_RESOURCE = "UPDATE Resources SET item_name=%s, category=%s, stock_level=%s, unit_of_measure=%s WHERE resource_id=%s"
+# Usage lines of the resource are removed by ON DELETE CASCADE (migration 002)
+DELETE_RESOURCE = "DELETE FROM Resources WHERE resource_id = %s"
+
+# Join ResourceUsage (RU) with Resources (R) and Incidents (I); newest lines first
+RECENT_USAGE = """
+    SELECT
+        RU.usage_id, I.incident_id, R.item_name, RU.quantity_used
+    FROM
+        ResourceUsage AS RU
+    JOIN
+        ResponseIncidents AS I ON RU.incident_id = I.incident_id
+    JOIN
+        Resources AS R ON RU.resource_id = R.resource_id
+    ORDER BY
+        RU.usage_id DESC LIMIT %s
+"""
+
+
+class Repository:
+    """Runs prepared statements on one connection; every write commits on its own.
+
+    On a local_store.LocalConnection (offline mode) the same SELECTs run against
+    the SQLite replica, and writes go through ``self.local`` so they are queued
+    for the sync engine as well as applied locally.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.local = getattr(conn, "store", None) # LocalStore while offline, otherwise None
+
+    def fetch(self, query, params=()):
+        return fetch_prepared(self.conn, query, params)
+
+    def fetch_one(self, query, params=()):
+        rows = self.fetch(query, params)
+        return rows[0] if rows else None
+
+    def write(self, query, params=()):
+        """Runs one INSERT/UPDATE/DELETE, commits it and returns the cursor (for rowcount / lastrowid)."""
+        cursor = statement_cache(self.conn).execute(query, params)
+        self.conn.commit()
+        return cursor
+
+
+class RecordRepo(Repository):
+    """get/add/update/delete for one table whose typed row has the primary key first."""
+
+    table = None
+    row_type = None
+    select_sql = insert_sql = update_sql = delete_sql = None
+
+    def get(self, row_id):
+        row = self.fetch_one(self.select_sql, (row_id,))
+        return self.row_type(*row) if row else None
+
+    def add(self, record):
+        """Inserts ``record`` (its id is ignored) and returns the new id (negative until synced when offline)."""
+        if self.local:
+            return self.local.insert(self.table, record)
+        return self.write(self.insert_sql, tuple(record[1:])).lastrowid
+
+    def update(self, record):
+        if self.local:
+            return self.local.update(self.table, record)
+        return self.write(self.update_sql, tuple(record[1:]) + (record[0],)).rowcount
+
+    def delete(self, row_id):
+        if self.local:
+            return self.local.delete(self.table, row_id)
+        return self.write(self.delete_sql, (row_id,)).rowcount
+
+
+class PersonnelRepo(RecordRepo):
+    """``delete`` raises the MySQL 1451 error while the person is still a commander or deployed."""
+
+    table, row_type = "Personnel", Personnel
+    select_sql, insert_sql, update_sql, delete_sql = SELECT_PERSONNEL, INSERT_PERSONNEL, UPDATE_PERSONNEL, DELETE_PERSONNEL
+
+
+class IncidentRepo(RecordRepo):
+    table, row_type = "ResponseIncidents", Incident
+    select_sql, insert_sql, update_sql, delete_sql = SELECT_INCIDENT, INSERT_INCIDENT, UPDATE_INCIDENT, DELETE_INCIDENT
+
+
+class ResourceRepo(RecordRepo):
+    table, row_type = "Resources", Resource
+    select_sql, insert_sql, update_sql, delete_sql = SELECT_RESOURCE, INSERT_RESOURCE, UPDATE_RESOURCE, DELETE_RESOURCE
+
+    def recent_usage(self, limit=10):
+        return [UsageRecord(*row) for row in self.fetch(RECENT_USAGE, (limit,))]
+
+    def log_usage(self, incident_id, resource_id, quantity):
+        """Atomic check-and-decrement (see inventory.log_usage); returns the new stock level."""
+        if self.local:
+            return self.local.log_usage(incident_id, resource_id, quantity)
+        return log_usage(self.conn, incident_id, resource_id, quantity)
+
+    def log_usage_batch(self, incident_id, lines):
+        """All-or-nothing batch of ``(resource_id, quantity)`` lines; returns ``{resource_id: new_stock}``."""
+        if self.local:
+            return self.local.log_usage_batch(incident_id, lines)
+        return log_usage_batch(self.conn, incident_id, lines)
+
+    def outlook(self, resource_id):
+        """Burn rate, reorder point and days of cover (see forecast.py), as a StockOutlook."""
+        row = self.fetch_one(STOCK_OUTLOOK, (resource_id,))
+        return StockOutlook(*row) if row else None
+
+    def save(self, resource, reorder_level=None, set_level=False):
+        """Adds (``resource_id`` None) or updates the resource and, with ``set_level``, its reorder level.
+
+        Both commit in one transaction. Returns ``(resource_id, level_saved)``:
+        offline the record is queued as usual, but the reorder level needs the
+        central database and is left out (``level_saved`` False).
+        """
+        if self.local:
+            if resource.resource_id is None:
+                return self.local.insert(self.table, resource), not set_level
+            self.local.update(self.table, resource)
+            return resource.resource_id, not set_level
+
+        def work(cursor):
+            if resource.resource_id is None:
+                cursor.execute(INSERT_RESOURCE, tuple(resource[1:]))
+                resource_id = cursor.lastrowid
+            else:
+                cursor.execute(UPDATE_RESOURCE, tuple(resource[1:]) + (resource.resource_id,))
+                resource_id = resource.resource_id
+            if set_level:
+                cursor.execute(SET_REORDER_LEVEL, (resource_id, reorder_level))
+            return resource_id, True
+        return run_transaction(self.conn, work)
+
+
+class DeploymentRepo(Repository):
+    def availability(self):
+        """Roster plus who is on an open incident, as an AvailabilityIndex (two reads)."""
+        return AvailabilityIndex(self.fetch(ROSTER), self.fetch(ACTIVE_DEPLOYMENTS, ACTIVE_STATUSES))
+
+    def team(self, incident_id):
+        return [TeamMember(*row) for row in self.fetch(INCIDENT_TEAM, (incident_id,))]
+
+    def dispatch(self, incident_id, personnel_ids, role=None):
+        """Deploys the available ones among ``personnel_ids`` in one statement; returns how many went."""
+        if self.local:
+            return self.local.dispatch(incident_id, personnel_ids, role)
+        return dispatch(self.conn, incident_id, personnel_ids, role)
+
+    def recall(self, incident_id, personnel_ids):
+        if self.local:
+            return self.local.recall(incident_id, personnel_ids)
+        return recall(self.conn, incident_id, personnel_ids)
+
+
+class ReportRepo(Repository):
+    def version(self, report_name):
+        """The report's data-version token; it changes whenever any of its source tables does."""
+        return tuple(self.fetch_one(version_query(REPORTS[report_name])))
+
+    def page(self, report_name, limit, after=None, since=None):
+        report = REPORTS[report_name]
+        return report_pager(report, since).fetch_page(self.conn, limit, after=after, params=report_params(report, since))
+
+    def export(self, report_name, path, fmt=None, progress=None, since=None):
+        return export_report(self.conn, report_name, path, fmt, progress, since)
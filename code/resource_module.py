@@ -1,20 +1,27 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from mysql.connector import Error
+from tkinter import ttk, messagebox, filedialog
+from grid_definitions import RESOURCE_GRID
+from treeview_sync import TreeviewSync
+from bulk_import import import_file
+from search_picker import SearchPicker
+from inventory import InsufficientStockError, BatchStockError
+from repositories import Resource, ResourceRepo
+
+# Shown when a record was saved offline: the reorder level needs the central database
+LEVEL_SKIPPED = "\n\nThe reorder level was not changed while offline; set it again once the connection is back."
 
 class ResourceModule(tk.Toplevel):
-    def __init__(self, connection, master):
+    def __init__(self, master):
         super().__init__(master)
-        self.conn = connection
+        self.executor = master.executor # Runs queries off the Tk thread
+        self.cache = master.cache # Shared resource/incident lookups for the usage dropdowns
+        self.feed = master.feed # Stock and usage changed elsewhere (other windows/workstations)
         self.title("Resources & Inventory Management")
-        self.geometry("1200x650")
+        self.geometry("1200x780")
 
         self.transient(master)
         self.grab_set()
 
-        # Data holders
-        self.resource_map = {} # Maps item_name to resource_id
-
         # --- Interface Setup ---
         main_pane = ttk.Panedwindow(self, orient=tk.HORIZONTAL)
         main_pane.pack(fill='both', expand=True, padx=10, pady=10)
@@ -30,7 +37,9 @@ class ResourceModule(tk.Toplevel):
         self.create_usage_log_widgets(usage_frame)
 
         self.load_resource_data()
-        self.load_incident_list()
+        self.cache.subscribe("resources", self.on_resources_loaded, owner=self)
+        self.cache.subscribe("incidents", self.on_incidents_loaded, owner=self)
+        self.feed.subscribe(("Resources", "ResourceUsage", "StockForecast"), self.on_changes, owner=self)
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
 
@@ -47,13 +56,19 @@ class ResourceModule(tk.Toplevel):
             ("Item Name:", "name_entry"),
             ("Category:", "category_entry"),
             ("Stock Level:", "stock_entry"),
-            ("Unit:", "unit_entry")
+            ("Unit:", "unit_entry"),
+            ("Reorder Level (blank = forecast):", "reorder_entry")
         ]
         
         for text, attr in inputs:
             tk.Label(self.master_form_frame, text=text, anchor='w').pack(pady=2, padx=5, fill='x')
             setattr(self, attr, tk.Entry(self.master_form_frame, width=30))
             getattr(self, attr).pack(pady=2, padx=5, fill='x')
+
+        # Burn rate and reorder point of the selected item (forecast.py)
+        self.loaded_reorder_level = None # Manual level of the selected item, so an unchanged one is not rewritten
+        self.outlook_var = tk.StringVar()
+        tk.Label(self.master_form_frame, textvariable=self.outlook_var, anchor='w', fg='gray25').pack(padx=5, fill='x')
         
         # Buttons
         button_frame = tk.Frame(self.master_form_frame)
@@ -62,6 +77,7 @@ class ResourceModule(tk.Toplevel):
         self.update_master_btn = tk.Button(button_frame, text="Update Item", state=tk.DISABLED, command=self.update_resource)
         self.update_master_btn.pack(side='left', padx=5)
         tk.Button(self.master_form_frame, text="Clear Form", command=self.clear_master_form).pack(pady=5)
+        tk.Button(self.master_form_frame, text="Import from File...", command=self.import_resources).pack(pady=5)
 
 
         # Bottom half: Data View
@@ -80,6 +96,10 @@ class ResourceModule(tk.Toplevel):
         self.master_tree.configure(yscrollcommand=vsb.set)
         self.master_tree.pack(fill='both', expand=True)
 
+        # Tracks rows by resource_id so a stock change only re-renders that one row
+        self.resource_sync = TreeviewSync(self.master_tree, RESOURCE_GRID, self.executor, self,
+                                          version_columns=["updated_at"], id_query="SELECT resource_id FROM Resources")
+
         self.master_tree.bind('<<TreeviewSelect>>', self.select_resource)
         tk.Button(self.master_view_frame, text="Delete Selected Item", command=self.delete_resource, bg='red', fg='white').pack(pady=5)
 
@@ -87,22 +107,17 @@ class ResourceModule(tk.Toplevel):
     # --- Resource Usage Log Panel (Right Side) ---
 
     def create_usage_log_widgets(self, usage_frame):
-        # Incident Selection (Dropdown)
+        # Incident Selection (Type-ahead picker over the cached incident list, keyed by incident_id)
         incident_label = tk.Label(usage_frame, text="Log Usage Against Incident:", font=('Arial', 12, 'bold'))
         incident_label.pack(pady=10)
+        self.incident_picker = SearchPicker(usage_frame)
+        self.incident_picker.pack(pady=5, padx=10, fill='x')
         
-        self.incident_var = tk.StringVar(self)
-        self.incident_options = []
-        self.incident_dropdown = tk.OptionMenu(usage_frame, self.incident_var, "")
-        self.incident_dropdown.pack(pady=5, padx=10, fill='x')
-        
-        # Resource Selection (Dropdown, updated dynamically)
+        # Resource Selection (Type-ahead picker over the cached resource list, keyed by resource_id)
         resource_label = tk.Label(usage_frame, text="Resource Consumed:", font=('Arial', 10))
         resource_label.pack(pady=5)
-        self.usage_resource_var = tk.StringVar(self)
-        self.usage_resource_var.set("Select Resource")
-        self.resource_dropdown = tk.OptionMenu(usage_frame, self.usage_resource_var, "")
-        self.resource_dropdown.pack(pady=5, padx=10, fill='x')
+        self.resource_picker = SearchPicker(usage_frame)
+        self.resource_picker.pack(pady=5, padx=10, fill='x')
         
         # Quantity Used
         tk.Label(usage_frame, text="Quantity Used:").pack(pady=5)
@@ -110,7 +125,22 @@ class ResourceModule(tk.Toplevel):
         self.quantity_entry.pack(pady=5)
 
         # Log Button
-        tk.Button(usage_frame, text="LOG RESOURCE USAGE", command=self.log_resource_usage, bg='blue', fg='white').pack(pady=20, padx=10, fill='x')
+        tk.Button(usage_frame, text="LOG RESOURCE USAGE", command=self.log_resource_usage, bg='blue', fg='white').pack(pady=(20, 5), padx=10, fill='x')
+
+        # Batch Mode: stage many (resource, quantity) lines for the incident and submit them together
+        batch_frame = tk.LabelFrame(usage_frame, text="Batch Entry")
+        batch_frame.pack(fill='x', padx=10, pady=5)
+        self.batch_lines = {} # Maps resource_id -> [resource name, staged quantity]
+        batch_buttons = tk.Frame(batch_frame)
+        batch_buttons.pack(fill='x')
+        tk.Button(batch_buttons, text="Add to Batch", command=self.add_batch_line).pack(side='left', padx=5, pady=2)
+        tk.Button(batch_buttons, text="Remove Line", command=self.remove_batch_line).pack(side='left', padx=5, pady=2)
+        tk.Button(batch_buttons, text="SUBMIT BATCH", command=self.submit_usage_batch, bg='blue', fg='white').pack(side='right', padx=5, pady=2)
+        self.batch_tree = ttk.Treeview(batch_frame, columns=("Resource", "Quantity"), show='headings', height=5)
+        self.batch_tree.heading("Resource", text="Resource")
+        self.batch_tree.heading("Quantity", text="Qty")
+        self.batch_tree.column("Quantity", width=60, anchor='center')
+        self.batch_tree.pack(fill='x', padx=5, pady=2)
 
         # Usage History View (To see what was logged)
         tk.Label(usage_frame, text="Resource Usage History", font=('Arial', 10, 'underline')).pack(pady=10)
@@ -128,99 +158,83 @@ class ResourceModule(tk.Toplevel):
     # --- Utility/Data Load Methods ---
 
     def load_resource_data(self):
-        """CRUD - R (READ) for Resources master list."""
-        for item in self.master_tree.get_children():
-            self.master_tree.delete(item)
-            
-        self.resource_map = {}
-        resource_names = []
-            
-        cursor = self.conn.cursor()
-        try:
-            query = "SELECT resource_id, item_name, category, stock_level, unit_of_measure FROM Resources ORDER BY item_name"
-            cursor.execute(query)
-            records = cursor.fetchall()
-            
-            for row in records:
-                self.master_tree.insert('', tk.END, values=row)
-                self.resource_map[row[1]] = row[0] # Map Name -> ID
-                resource_names.append(row[1])
-                
-        except Error as e:
-            messagebox.showerror("Database Error", f"Failed to load resource data: {e}")
-        finally:
-            cursor.close()
-            
-        # Update the usage dropdown list
-        self.update_resource_dropdown(resource_names)
-
-    def load_incident_list(self):
-        """Loads Active/Resolved incidents for the Usage dropdown."""
-        cursor = self.conn.cursor()
-        try:
-            # Show ID and Type for easy identification
-            cursor.execute("SELECT incident_id, incident_type FROM ResponseIncidents ORDER BY incident_id DESC")
-            records = cursor.fetchall()
-            
-            self.incident_options = [f"ID {id}: {type}" for id, type in records]
-            if not self.incident_options:
-                self.incident_options = ["(No Incidents Logged)"]
-
-            # Update OptionMenu options
-            menu = self.incident_dropdown["menu"]
-            menu.delete(0, "end")
-            for option in self.incident_options:
-                menu.add_command(label=option, command=lambda value=option: self.incident_var.set(value))
-            
-            self.incident_var.set(self.incident_options[0])
-
-        except Error as e:
-            messagebox.showerror("DB Error", f"Could not load Incident list: {e}")
-        finally:
-            cursor.close()
+        """CRUD - R (READ) for Resources master list: everything once, then only changed rows."""
+        self.resource_sync.refresh()
+
+    def on_changes(self, changes):
+        """ChangeFeed subscriber: updates only the inventory rows that changed and the usage history."""
+        for change in changes:
+            if change.table == "Resources" and change.operation == 'D':
+                self.resource_sync.remove(change.row_id)
+        if any(change.table == "Resources" and change.operation != 'D' for change in changes):
+            self.resource_sync.refresh()
+        if any(change.table == "ResourceUsage" for change in changes):
+            self.load_usage_history()
+        selected = self.resource_id_var.get()
+        if selected and any(change.table in ("Resources", "StockForecast") and str(change.row_id) == selected
+                            for change in changes):
+            self.load_outlook(selected, fill_form=False) # Keep any reorder level being typed
+
+    def on_resources_loaded(self, resources):
+        """Receives the cached resource lookup (now and whenever resources are added/renamed/deleted)."""
+        self.resource_picker.set_lookup(resources)
+
+    def on_incidents_loaded(self, incidents):
+        """Receives the cached incident lookup (shown as "ID X: Type") for the Usage picker."""
+        self.incident_picker.set_lookup(incidents)
+        if self.incident_picker.get_id() is None:
+            self.incident_picker.select_first() # Most recent incident
             
     def load_usage_history(self):
         """Loads the history of resource usage for the right panel."""
-        for item in self.usage_tree.get_children():
-            self.usage_tree.delete(item)
-            
-        cursor = self.conn.cursor()
-        try:
-            # Join ResourceUsage (RU) with Resources (R) and Incidents (I)
-            query = """
-                SELECT 
-                    RU.usage_id, I.incident_id, R.item_name, RU.quantity_used
-                FROM 
-                    ResourceUsage AS RU
-                JOIN 
-                    ResponseIncidents AS I ON RU.incident_id = I.incident_id
-                JOIN
-                    Resources AS R ON RU.resource_id = R.resource_id
-                ORDER BY
-                    RU.usage_id DESC LIMIT 10;
-            """
-            cursor.execute(query)
-            records = cursor.fetchall()
-            
+        def show_records(records):
+            for item in self.usage_tree.get_children():
+                self.usage_tree.delete(item)
+
             for row in records:
                 self.usage_tree.insert('', tk.END, values=row)
-                
-        except Error as e:
-            messagebox.showerror("Database Error", f"Failed to load usage history: {e}")
-        finally:
-            cursor.close()
-
-    def update_resource_dropdown(self, resource_names):
-        """Refreshes the Resource Selection dropdown."""
-        menu = self.resource_dropdown["menu"]
-        menu.delete(0, "end")
-        if not resource_names:
-            resource_names = ["(No Resources)"]
-        
-        for option in resource_names:
-            menu.add_command(label=option, command=lambda value=option: self.usage_resource_var.set(value))
-        
-        self.usage_resource_var.set(resource_names[0])
+
+        self.executor.submit(
+            lambda conn: ResourceRepo(conn).recent_usage(),
+            show_records,
+            lambda e: messagebox.showerror("Database Error", f"Failed to load usage history: {e}"),
+            owner=self,
+        )
+
+    def load_outlook(self, resource_id, fill_form=True):
+        """Shows the item's burn rate, days of cover and low-stock threshold under the form."""
+        def show(outlook):
+            if outlook is None or self.resource_id_var.get() != str(resource_id):
+                return # Another item was selected meanwhile
+            if fill_form:
+                self.loaded_reorder_level = outlook.reorder_level
+                self.reorder_entry.delete(0, tk.END)
+                if outlook.reorder_level is not None:
+                    self.reorder_entry.insert(0, outlook.reorder_level)
+            if outlook.daily_burn is None:
+                text = "No usage forecast yet"
+            else:
+                cover = f"{outlook.days_of_cover} days of cover" if outlook.days_of_cover is not None else "no recent use"
+                text = f"Uses {outlook.daily_burn}/day, {cover}"
+            source = "set by hand" if outlook.reorder_level is not None else "forecast"
+            self.outlook_var.set(f"{text} - low at {outlook.reorder_at} ({source})")
+
+        self.executor.submit(
+            lambda conn: ResourceRepo(conn).outlook(resource_id),
+            show,
+            lambda e: self.outlook_var.set(f"Forecast unavailable: {e}"),
+            owner=self,
+        )
+
+    def read_reorder_level(self):
+        """The typed reorder level as an int, None when blank; shows a warning and returns False if invalid."""
+        text = self.reorder_entry.get().strip()
+        if not text:
+            return None
+        if not text.isdigit():
+            messagebox.showwarning("Input Error", "Reorder level must be a whole number (or blank to use the forecast).")
+            return False
+        return int(text)
 
 
     # --- Master List CRUD Functions ---
@@ -235,22 +249,47 @@ class ResourceModule(tk.Toplevel):
         if not all([name, category, stock, unit]):
             messagebox.showwarning("Input Error", "All fields must be filled for the Master List.")
             return
+        reorder_level = self.read_reorder_level()
+        if reorder_level is False:
+            return
 
-        query = "INSERT INTO Resources (item_name, category, stock_level, unit_of_measure) VALUES (%s, %s, %s, %s)"
-        values = (name, category, stock, unit)
-        
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute(query, values)
-            self.conn.commit()
-            messagebox.showinfo("Success", "New resource added to inventory.")
+        resource = Resource(None, name, category, stock, unit)
+
+        def on_success(result):
+            _, level_saved = result
+            self.cache.invalidate("resources")
+            messagebox.showinfo("Success", "New resource added to inventory." + ("" if level_saved else LEVEL_SKIPPED))
             self.load_resource_data()
             self.clear_master_form()
-        except Error as e:
-            messagebox.showerror("Database Error", f"Failed to add resource: {e}")
-            self.conn.rollback()
-        finally:
-            cursor.close()
+
+        self.executor.submit(
+            lambda conn: ResourceRepo(conn).save(resource, reorder_level, set_level=reorder_level is not None),
+            on_success,
+            lambda e: messagebox.showerror("Database Error", f"Failed to add resource: {e}"),
+            owner=self,
+        )
+
+    def import_resources(self):
+        """Bulk loads resource rows from a CSV or Excel file (see bulk_import)."""
+        path = filedialog.askopenfilename(parent=self, title="Import Resources",
+                                          filetypes=[("CSV / Excel", "*.csv *.xlsx"), ("All Files", "*.*")])
+        if not path:
+            return
+
+        def on_success(result):
+            self.cache.invalidate("resources")
+            message = f"{result.inserted} resource rows imported."
+            if result.rejected:
+                message += f"\n{result.rejected} rows were rejected; see {result.reject_path}"
+            messagebox.showinfo("Import Complete", message)
+            self.load_resource_data()
+
+        def on_error(e):
+            self.cache.invalidate("resources") # Chunks committed before the failure are kept
+            messagebox.showerror("Import Error", f"Import stopped: {e}")
+            self.load_resource_data()
+
+        self.executor.submit(lambda conn: import_file(conn, "resources", path), on_success, on_error, owner=self)
 
     def select_resource(self, event):
         """Populates the form when a row in the Master Treeview is selected."""
@@ -268,6 +307,7 @@ class ResourceModule(tk.Toplevel):
             self.stock_entry.delete(0, tk.END) # Delete first since stock is a number
             self.stock_entry.insert(0, values[3])
             self.unit_entry.insert(0, values[4])
+            self.load_outlook(values[0])
 
     def update_resource(self):
         """CRUD - U (UPDATE) for Resources."""
@@ -281,21 +321,27 @@ class ResourceModule(tk.Toplevel):
         stock = self.stock_entry.get()
         unit = self.unit_entry.get()
         
-        query = "UPDATE Resources SET item_name=%s, category=%s, stock_level=%s, unit_of_measure=%s WHERE resource_id=%s"
-        values = (name, category, stock, unit, resource_id)
-        
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute(query, values)
-            self.conn.commit()
-            messagebox.showinfo("Success", f"Resource ID {resource_id} updated successfully!")
+        reorder_level = self.read_reorder_level()
+        if reorder_level is False:
+            return
+        level_changed = reorder_level != self.loaded_reorder_level
+
+        resource = Resource(resource_id, name, category, stock, unit)
+
+        def on_success(result):
+            _, level_saved = result
+            self.cache.invalidate("resources")
+            messagebox.showinfo("Success", f"Resource ID {resource_id} updated successfully!"
+                                + ("" if level_saved else LEVEL_SKIPPED))
             self.load_resource_data()
             self.clear_master_form()
-        except Error as e:
-            messagebox.showerror("Database Error", f"Failed to update resource: {e}")
-            self.conn.rollback()
-        finally:
-            cursor.close()
+
+        self.executor.submit(
+            lambda conn: ResourceRepo(conn).save(resource, reorder_level, set_level=level_changed),
+            on_success,
+            lambda e: messagebox.showerror("Database Error", f"Failed to update resource: {e}"),
+            owner=self,
+        )
             
     def delete_resource(self):
         """CRUD - D (DELETE) for Resources."""
@@ -307,27 +353,21 @@ class ResourceModule(tk.Toplevel):
         resource_id = self.master_tree.item(selected_item, 'values')[0]
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete Resource ID {resource_id}?"):
-            query = "DELETE FROM Resources WHERE resource_id = %s"
-            cursor = self.conn.cursor()
-            try:
-                # Deletion might fail if ResourceUsage records exist. 
-                # Assuming ON DELETE CASCADE is NOT set, you must manually delete usages first.
-                cursor.execute("DELETE FROM ResourceUsage WHERE resource_id = %s", (resource_id,))
-                
-                # Now delete the resource
-                cursor.execute(query, (resource_id,))
-                self.conn.commit()
+
+            def on_success(_):
+                self.cache.invalidate("resources")
                 messagebox.showinfo("Success", "Resource record deleted.")
-                self.load_resource_data()
+                self.resource_sync.remove(resource_id)
                 self.clear_master_form()
-            except Error as e:
-                if e.errno == 1451:
-                    messagebox.showerror("Constraint Error", f"Cannot delete Resource ID {resource_id}. It is still tracked in ResourceUsage.")
+
+            def on_error(e):
+                if getattr(e, 'errno', None) == 1451: # Usage lines and forecasts cascade; only an unmigrated schema blocks
+                    messagebox.showerror("Constraint Error", f"Cannot delete Resource ID {resource_id}. "
+                                         f"A record still refers to it:\n\n{getattr(e, 'msg', e)}")
                 else:
                     messagebox.showerror("Database Error", f"Failed to delete resource: {e}")
-                self.conn.rollback()
-            finally:
-                cursor.close()
+
+            self.executor.submit(lambda conn: ResourceRepo(conn).delete(resource_id), on_success, on_error, owner=self)
 
     def clear_master_form(self, keep_id=False):
         """Resets all master form entries and button states."""
@@ -335,6 +375,9 @@ class ResourceModule(tk.Toplevel):
         self.category_entry.delete(0, tk.END)
         self.stock_entry.delete(0, tk.END)
         self.unit_entry.delete(0, tk.END)
+        self.reorder_entry.delete(0, tk.END)
+        self.loaded_reorder_level = None
+        self.outlook_var.set("")
         
         if not keep_id:
             self.resource_id_var.set("")
@@ -345,58 +388,105 @@ class ResourceModule(tk.Toplevel):
     # --- Usage Log Function ---
 
     def log_resource_usage(self):
-        """Inserts a record into ResourceUsage and updates the stock level."""
-        incident_selection = self.incident_var.get()
-        resource_name = self.usage_resource_var.get()
+        """Records usage against an incident and decrements the resource's stock atomically."""
+        incident_id = self.incident_picker.get_id()
+        resource_id = self.resource_picker.get_id()
+        resource_name = self.resource_picker.get()
         quantity_str = self.quantity_entry.get()
 
-        if not incident_selection or resource_name == "Select Resource" or not quantity_str.isdigit():
+        if incident_id is None or resource_id is None or not quantity_str.isdigit() or int(quantity_str) == 0:
             messagebox.showwarning("Input Error", "Please select an incident, a resource, and enter a valid quantity.")
             return
 
-        try:
-            quantity_used = int(quantity_str)
-            resource_id = self.resource_map.get(resource_name)
-            # Incident ID is extracted from the string "ID X: Type..."
-            incident_id = int(incident_selection.split(':')[0].replace('ID ', '')) 
-        except Exception:
-            messagebox.showwarning("Error", "Invalid input format.")
-            return
-
-        cursor = self.conn.cursor()
-        try:
-            # 1. Get current stock
-            cursor.execute("SELECT stock_level FROM Resources WHERE resource_id = %s", (resource_id,))
-            current_stock = cursor.fetchone()[0]
-            
-            if quantity_used > current_stock:
-                messagebox.showwarning("Stock Warning", f"Usage denied. Only {current_stock} units of {resource_name} remaining.")
-                return
+        quantity_used = int(quantity_str)
 
-            # 2. Log usage (INSERT into ResourceUsage)
-            usage_query = "INSERT INTO ResourceUsage (incident_id, resource_id, quantity_used, date_used) VALUES (%s, %s, %s, NOW())"
-            cursor.execute(usage_query, (incident_id, resource_id, quantity_used))
-            
-            # 3. Update stock (UPDATE Resources)
-            new_stock = current_stock - quantity_used
-            stock_query = "UPDATE Resources SET stock_level = %s WHERE resource_id = %s"
-            cursor.execute(stock_query, (new_stock, resource_id))
-            
-            self.conn.commit()
-            messagebox.showinfo("Success", f"{quantity_used} units of {resource_name} logged for Incident ID {incident_id}. New stock: {new_stock}.")
+        def on_success(stock):
+            messagebox.showinfo("Success", f"{quantity_used} units of {resource_name} logged for Incident ID {incident_id}. New stock: {stock}.")
             
             # Refresh data views
             self.load_resource_data() # To show updated stock
             self.load_usage_history() # To show new log entry
             self.quantity_entry.delete(0, tk.END)
-            
-        except Error as e:
-            messagebox.showerror("Database Error", f"Failed to log resource usage: {e}")
-            self.conn.rollback()
-        finally:
-            cursor.close()
+
+        def on_error(e):
+            if isinstance(e, InsufficientStockError):
+                messagebox.showwarning("Stock Warning", f"Usage denied. Only {e.available} units of {resource_name} remaining.")
+            else:
+                messagebox.showerror("Database Error", f"Failed to log resource usage: {e}")
+
+        # Check-and-decrement happens in one conditional UPDATE (see inventory.log_usage)
+        self.executor.submit(
+            lambda conn: ResourceRepo(conn).log_usage(incident_id, resource_id, quantity_used),
+            on_success,
+            on_error,
+            owner=self,
+        )
+
+    # --- Batch Usage Entry ---
+
+    def add_batch_line(self):
+        """Stages the selected resource and quantity; staging a resource again adds to its line."""
+        resource_id = self.resource_picker.get_id()
+        quantity_str = self.quantity_entry.get()
+
+        if resource_id is None or not quantity_str.isdigit() or int(quantity_str) == 0:
+            messagebox.showwarning("Input Error", "Please select a resource and enter a valid quantity.")
+            return
+
+        line = self.batch_lines.setdefault(resource_id, [self.resource_picker.get(), 0])
+        line[1] += int(quantity_str)
+        iid = str(resource_id)
+        if self.batch_tree.exists(iid):
+            self.batch_tree.item(iid, values=line)
+        else:
+            self.batch_tree.insert('', tk.END, iid=iid, values=line)
+        self.quantity_entry.delete(0, tk.END)
+        self.resource_picker.set("")
+        self.resource_picker.focus_set()
+
+    def remove_batch_line(self):
+        for iid in self.batch_tree.selection():
+            self.batch_lines.pop(int(iid), None)
+            self.batch_tree.delete(iid)
+
+    def clear_batch(self):
+        self.batch_lines = {}
+        self.batch_tree.delete(*self.batch_tree.get_children())
+
+    def submit_usage_batch(self):
+        """Logs every staged line against the incident in one transaction (all or nothing)."""
+        incident_id = self.incident_picker.get_id()
+        if incident_id is None or not self.batch_lines:
+            messagebox.showwarning("Input Error", "Please select an incident and add at least one line to the batch.")
+            return
+
+        lines = [(resource_id, quantity) for resource_id, (_, quantity) in self.batch_lines.items()]
+
+        def on_success(stock):
+            messagebox.showinfo("Success", f"{len(lines)} resource lines logged for Incident ID {incident_id}.")
+            self.clear_batch()
+            self.load_resource_data()
+            self.load_usage_history()
+
+        def on_error(e):
+            if isinstance(e, BatchStockError):
+                short = "\n".join(f"{self.batch_lines[s.resource_id][0]}: {s.requested} requested, {s.available} remaining"
+                                  for s in e.shortages if s.resource_id in self.batch_lines)
+                messagebox.showwarning("Stock Warning", f"Batch denied, nothing was logged. Insufficient stock for:\n{short}")
+            else:
+                messagebox.showerror("Database Error", f"Failed to log resource usage: {e}")
+
+        self.executor.submit(
+            lambda conn: ResourceRepo(conn).log_usage_batch(incident_id, lines),
+            on_success,
+            on_error,
+            owner=self,
+        )
 
     def on_close(self):
         """Handles closing the Toplevel window."""
+        self.executor.cancel(self) # Drop any queries still running for this window
+        self.cache.unsubscribe(self)
+        self.feed.unsubscribe(self)
         self.grab_release()
         self.destroy()
\ No newline at end of file
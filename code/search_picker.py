@@ -0,0 +1,109 @@
+import bisect
+import re
+from tkinter import ttk
+
+MAX_MATCHES = 30 # Only this many matches are ever put into the dropdown list
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class SearchIndex:
+    """In-memory word-prefix index over a LookupTable (id -> display name).
+
+    Every word of every name is stored once in a sorted list, so a query is a
+    couple of binary searches per typed word instead of a scan over thousands
+    of names.  A name matches when each typed word is the prefix of one of its
+    words ("cru jo" finds "Cruz, John M.").
+    """
+
+    def __init__(self, lookup):
+        self.ids = list(lookup.by_id)
+        # Names shared by several rows get their id appended so every label is unique
+        counts = {}
+        for name in lookup.by_id.values():
+            counts[name] = counts.get(name, 0) + 1
+        self.labels = {pk: (name if counts[name] == 1 else f"{name} (#{pk})") for pk, name in lookup.by_id.items()}
+        self.ids_by_label = {label: pk for pk, label in self.labels.items()}
+        self.order = {pk: position for position, pk in enumerate(self.ids)} # Keeps the lookup's sort order
+
+        self.tokens = sorted((token, pk) for pk, name in lookup.by_id.items() for token in set(tokenize(name)))
+        self.token_keys = [token for token, _ in self.tokens]
+
+    def _prefix_ids(self, prefix):
+        start = bisect.bisect_left(self.token_keys, prefix)
+        end = bisect.bisect_left(self.token_keys, prefix + "\uffff")
+        return {pk for _, pk in self.tokens[start:end]}
+
+    def search(self, text, limit=MAX_MATCHES):
+        """Returns up to ``limit`` ids whose names match every word typed so far."""
+        words = tokenize(text)
+        if not words:
+            return self.ids[:limit]
+        matches = None
+        for word in words:
+            found = self._prefix_ids(word)
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+        return sorted(matches, key=self.order.get)[:limit]
+
+
+class SearchPicker(ttk.Combobox):
+    """A type-ahead combobox keyed by id, used for commander/resource/incident selection.
+
+    Feed it a cached LookupTable with ``set_lookup()``.  As the user types,
+    only the top MAX_MATCHES matching labels are placed in the dropdown, and
+    ``get_id()`` returns the id of the chosen row rather than its display name.
+    """
+
+    def __init__(self, parent, placeholder="Type to search...", **kwargs):
+        super().__init__(parent, **kwargs)
+        self.index = None
+        self.placeholder = placeholder
+        self.set(placeholder)
+        self.bind('<KeyRelease>', self._on_key)
+        self.bind('<FocusIn>', self._on_focus)
+
+    def set_lookup(self, lookup):
+        """Rebuilds the search index from a (re)loaded lookup, keeping the current selection if possible."""
+        selected = self.get_id()
+        self.index = SearchIndex(lookup)
+        if selected in self.index.labels:
+            self.set_id(selected)
+        self._show_matches(self.get() if selected in self.index.labels else "")
+
+    def _on_focus(self, event):
+        if self.get() == self.placeholder:
+            self.set("")
+
+    def _on_key(self, event):
+        if event.keysym in ('Up', 'Down', 'Return', 'Escape', 'Tab'):
+            return
+        self._show_matches(self.get())
+
+    def _show_matches(self, text):
+        if self.index is None:
+            return
+        self['values'] = [self.index.labels[pk] for pk in self.index.search(text)]
+
+    def get_id(self):
+        """Returns the id behind the current text, or None if it matches no row exactly."""
+        if self.index is None:
+            return None
+        return self.index.ids_by_label.get(self.get())
+
+    def set_id(self, pk):
+        """Selects the row with the given id (clears the picker if it is unknown)."""
+        if self.index is None or pk not in self.index.labels:
+            self.set("")
+            return
+        self.set(self.index.labels[pk])
+
+    def select_first(self):
+        """Selects the first row in lookup order (used as the form default)."""
+        if self.index is not None and self.index.ids:
+            self.set_id(self.index.ids[0])
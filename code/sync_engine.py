@@ -0,0 +1,456 @@
+import argparse
+import sys
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+import mysql.connector
+from mysql.connector import Error
+
+from db_connector import DB_CONFIG, run_transaction
+from dispatch import apply_dispatch, apply_recall
+from inventory import BatchStockError, InsufficientStockError, apply_usage, apply_usage_batch, merge_lines
+from local_store import LOCAL_DB_PATH, REFERENCES, TABLES, LocalStore, open_store
+from query_stats import instrument
+
+# Keeps the local replica (local_store) in step with the central database: queued offline
+# writes are pushed first, in the order they were made, then server changes are pulled.
+
+SYNC_INTERVAL_SECONDS = 30 # Between sync attempts (sync_now() starts one right away)
+CONNECT_TIMEOUT = 5        # Seconds; a flaky link should fail fast rather than stall a cycle
+PUSH_BATCH = 100           # Queued writes read from the Outbox at a time
+PULL_BATCH = 1000          # Rows fetched (and applied locally in one transaction) at a time
+RECONCILE_EVERY = 10       # Every Nth cycle also compares ids, to catch deletes and missed rows
+REPLICA_DAYS = 180         # Incidents (with their deployments and usage) reported this recently are kept offline
+SYNC_MARGIN = timedelta(seconds=5) # Re-read this far behind the last pull (same idea as treeview_sync)
+
+# Tables whose row version is kept locally, for checking offline edits; every table has an
+# updated_at that marks changes between pulls (the bridge tables since migration 006)
+VERSIONED = ("Personnel", "Resources", "ResponseIncidents")
+# Parents before children, so every pulled row's foreign keys are already present locally
+PULL_ORDER = ("Personnel", "Resources", "ResponseIncidents", "Deployment", "ResourceUsage")
+
+
+class SyncConflict(Exception):
+    """A queued write the server cannot accept as it stands; the server's version is kept."""
+
+
+# Errors meaning "the server refused this write", as opposed to "the link dropped" (retried later)
+REFUSED = (SyncConflict, InsufficientStockError, BatchStockError, mysql.connector.IntegrityError,
+           mysql.connector.DataError)
+
+
+def link_down(error):
+    """True for client-side errors (CR_* codes 2000-2999: cannot connect, server gone away, lost connection)."""
+    return error.errno is None or 2000 <= error.errno < 3000
+
+
+# --- Push ---
+
+def resolve(store, values):
+    """Replaces temporary ids in foreign key columns with the server ids they were pushed as."""
+    resolved = dict(values)
+    for column, table in REFERENCES.items():
+        if column in resolved:
+            resolved[column] = store.server_id(table, resolved[column])
+            if resolved[column] is not None and resolved[column] < 0:
+                raise SyncConflict(f"It refers to {table} ID {values[column]}, which the server never accepted.")
+    return resolved
+
+
+def server_row_id(store, entry):
+    row_id = store.server_id(entry.table_name, entry.row_id)
+    if row_id < 0:
+        raise SyncConflict("The record was created offline and never accepted by the server.")
+    return row_id
+
+
+def push_insert(server, cursor, store, entry):
+    values = resolve(store, entry.payload)
+    cursor.execute(f"INSERT INTO {entry.table_name} ({', '.join(values)}) VALUES ({', '.join(['%s'] * len(values))})",
+                   list(values.values()))
+    return cursor.lastrowid
+
+
+def push_update(server, cursor, store, entry):
+    spec = TABLES[entry.table_name]
+    row_id = server_row_id(store, entry)
+    values = resolve(store, entry.payload)
+    cursor.execute(f"SELECT updated_at FROM {entry.table_name} WHERE {spec.key} = %s FOR UPDATE", (row_id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise SyncConflict("It was deleted on the server.")
+    if entry.base_version is not None and row[0] > entry.base_version:
+        raise SyncConflict("It was changed on the server after it was edited offline; the server's version was kept.")
+    assignments = ", ".join(f"{column} = %s" for column in values)
+    cursor.execute(f"UPDATE {entry.table_name} SET {assignments} WHERE {spec.key} = %s", [*values.values(), row_id])
+    return None
+
+
+def push_delete(server, cursor, store, entry):
+    spec = TABLES[entry.table_name]
+    row_id = store.server_id(entry.table_name, entry.row_id)
+    if row_id >= 0: # A row created and deleted offline never reached the server
+        cursor.execute(f"DELETE FROM {entry.table_name} WHERE {spec.key} = %s", (row_id,))
+    return None
+
+
+def push_log_usage(server, cursor, store, entry):
+    values = resolve(store, entry.payload)
+    apply_usage(cursor, values["incident_id"], values["resource_id"], values["quantity"])
+    return None
+
+
+def push_log_usage_batch(server, cursor, store, entry):
+    incident_id = resolve(store, {"incident_id": entry.payload["incident_id"]})["incident_id"]
+    lines = merge_lines((resolve(store, {"resource_id": resource_id})["resource_id"], quantity)
+                        for resource_id, quantity in entry.payload["lines"])
+    apply_usage_batch(server, cursor, incident_id, lines) # Rolls back a short batch itself
+    return None
+
+
+def resolve_team(store, payload):
+    incident_id = resolve(store, {"incident_id": payload["incident_id"]})["incident_id"]
+    return incident_id, [resolve(store, {"personnel_id": pk})["personnel_id"] for pk in payload["personnel_ids"]]
+
+
+def push_dispatch(server, cursor, store, entry):
+    # Anyone dispatched elsewhere in the meantime is skipped, exactly as for an online dispatch
+    incident_id, personnel_ids = resolve_team(store, entry.payload)
+    apply_dispatch(cursor, incident_id, personnel_ids, entry.payload["role"])
+    return None
+
+
+def push_recall(server, cursor, store, entry):
+    apply_recall(cursor, *resolve_team(store, entry.payload))
+    return None
+
+
+PUSH_HANDLERS = {"insert": push_insert, "update": push_update, "delete": push_delete,
+                 "log_usage": push_log_usage, "log_usage_batch": push_log_usage_batch,
+                 "dispatch": push_dispatch, "recall": push_recall}
+
+
+def moved_rows(store, entry):
+    """``(table, server ids)`` of the versioned rows a pushed write moves to a new ``updated_at``."""
+    if entry.operation == "update" and entry.table_name in VERSIONED:
+        return entry.table_name, [server_row_id(store, entry)]
+    if entry.operation in ("log_usage", "log_usage_batch"): # The stock decrement moves the resource's version
+        lines = entry.payload.get("lines") or [(entry.payload["resource_id"], entry.payload["quantity"])]
+        return "Resources", sorted({store.server_id("Resources", resource_id) for resource_id, _ in lines})
+    return None, []
+
+
+def new_versions(cursor, store, entry):
+    """``{(table, server id): updated_at}`` after the write, read in its transaction.
+
+    Later queued edits of the same rows were made on top of this write, so
+    they are rebased onto these versions instead of being refused as changed
+    on the server by their own earlier push.
+    """
+    table, ids = moved_rows(store, entry)
+    ids = [row_id for row_id in ids if row_id is not None and row_id > 0]
+    if not ids:
+        return {}
+    key = TABLES[table].key
+    cursor.execute(f"SELECT {key}, updated_at FROM {table} WHERE {key} IN ({', '.join(['%s'] * len(ids))})", ids)
+    return {(table, row_id): version for row_id, version in cursor.fetchall()}
+
+
+def push(server, store, client_id, batch=PUSH_BATCH):
+    """Replays the Outbox on the server; returns ``(pushed, refused entries)``.
+
+    Each write commits in one transaction with its SyncReceipts row, so a write
+    whose acknowledgement was lost is recognised and skipped on the next push.
+    Connection errors propagate and leave the rest of the queue for next time.
+    """
+    pushed, refused = 0, []
+    while True:
+        entries = store.pending(batch)
+        if not entries:
+            return pushed, refused
+        for entry in entries:
+            def work(cursor):
+                cursor.execute("SELECT result_id FROM SyncReceipts WHERE client_id = %s AND seq = %s",
+                               (client_id, entry.seq))
+                receipt = cursor.fetchone()
+                if receipt is not None:
+                    # Applied before but never acknowledged; the versions are read as they stand now
+                    return receipt[0], new_versions(cursor, store, entry)
+                result_id = PUSH_HANDLERS[entry.operation](server, cursor, store, entry)
+                cursor.execute("INSERT INTO SyncReceipts (client_id, seq, result_id) VALUES (%s, %s, %s)",
+                               (client_id, entry.seq, result_id))
+                return result_id, new_versions(cursor, store, entry)
+
+            try:
+                result_id, versions = run_transaction(server, work)
+            except REFUSED as e:
+                store.complete(entry, conflict=str(e))
+                refused.append(entry)
+            else:
+                store.complete(entry, server_id=result_id, versions=versions)
+            pushed += 1
+
+
+def refetch_keys(store, refused):
+    """``{(table, column): ids}`` of server rows to re-read because a refused write changed their local copy."""
+    keys = {}
+    for entry in refused:
+        if entry.operation == "update":
+            keys.setdefault((entry.table_name, TABLES[entry.table_name].key), set()).add(
+                store.server_id(entry.table_name, entry.row_id))
+        elif entry.operation in ("log_usage", "log_usage_batch"):
+            lines = entry.payload.get("lines") or [(entry.payload["resource_id"], entry.payload["quantity"])]
+            keys.setdefault(("Resources", "resource_id"), set()).update(
+                store.server_id("Resources", resource_id) for resource_id, _ in lines)
+            keys.setdefault(("ResourceUsage", "incident_id"), set()).add(
+                store.server_id("ResponseIncidents", entry.payload["incident_id"]))
+    # Ids are the server's once pushed; refused inserts were never given one
+    return {key: sorted(row_id for row_id in ids if row_id > 0) for key, ids in keys.items()}
+
+
+# --- Pull ---
+
+def from_clause(table):
+    """``FROM`` of a table aliased T; bridge tables join their incident (I) for the window condition."""
+    if "incident_id" in TABLES[table].columns:
+        return f"FROM {table} AS T JOIN ResponseIncidents AS I ON I.incident_id = T.incident_id"
+    return f"FROM {table} AS T"
+
+
+def window_condition(table):
+    """Condition (one ``%s`` for the cutoff) keeping a table to the replica window; None for the master tables."""
+    if table == "ResponseIncidents":
+        return "T.date_reported >= %s"
+    if "incident_id" in TABLES[table].columns:
+        return "I.date_reported >= %s"
+    return None
+
+
+def pull_query(table):
+    """SELECT of a table's replicated columns, plus its row version where it has one."""
+    spec = TABLES[table]
+    columns = [f"T.{column}" for column in (spec.key,) + spec.columns]
+    if table in VERSIONED:
+        columns.append("T.updated_at")
+    return f"SELECT {', '.join(columns)} {from_clause(table)}"
+
+
+def stream(cursor, query, params, apply, batch=PULL_BATCH):
+    cursor.execute(query, params)
+    count = 0
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            return count
+        apply(rows)
+        count += len(rows)
+
+
+def pull(server, store, reconcile=False, refetch=None):
+    """Copies server changes into the replica; returns the number of rows applied.
+
+    All reads run in one consistent snapshot, so children never arrive before
+    their incident.  ``reconcile`` also compares primary keys in the window to
+    drop rows deleted on the server and fetch any the incremental pass missed;
+    ``refetch`` (see refetch_keys) re-reads rows whatever their version.
+    """
+    server.start_transaction(consistent_snapshot=True, readonly=True)
+    cursor = server.cursor()
+    try:
+        cursor.execute("SELECT CURRENT_TIMESTAMP(6)")
+        started = cursor.fetchone()[0]
+        cutoff = started - timedelta(days=REPLICA_DAYS)
+        since = store.state("pulled_at")
+        since = datetime.fromisoformat(since) if since else None
+        applied = 0
+        for table in PULL_ORDER:
+            conditions, params = [], []
+            if window_condition(table):
+                conditions.append(window_condition(table))
+                params.append(cutoff)
+            if since is not None:
+                conditions.append("T.updated_at >= %s")
+                params.append(since)
+            query = pull_query(table) + (" WHERE " + " AND ".join(conditions) if conditions else "")
+            applied += stream(cursor, query, params, lambda rows: store.merge_rows(table, rows, table in VERSIONED))
+        for (table, column), ids in (refetch or {}).items():
+            applied += fetch_by(cursor, store, table, column, ids)
+        if reconcile or since is None:
+            applied += reconcile_ids(cursor, store, cutoff)
+        server.commit()
+    finally:
+        cursor.close()
+    store.set_state("pulled_at", (started - SYNC_MARGIN).isoformat())
+    store.conn.commit()
+    return applied
+
+
+def reconcile_ids(cursor, store, cutoff):
+    """Drops local rows the server no longer has (or that left the window) and fetches missing ones."""
+    store.prune_window(cutoff)
+    applied = 0
+    server_ids = {}
+    for table in PULL_ORDER:
+        condition = window_condition(table)
+        cursor.execute(f"SELECT T.{TABLES[table].key} {from_clause(table)}" + (f" WHERE {condition}" if condition else ""),
+                       (cutoff,) if condition else ())
+        server_ids[table] = {row[0] for row in cursor.fetchall()}
+    # Children first when deleting, parents first when fetching
+    for table in reversed(PULL_ORDER):
+        store.remove_missing(table, server_ids[table], cutoff)
+    for table in PULL_ORDER:
+        missing = sorted(server_ids[table] - store.local_ids(table, cutoff))
+        applied += fetch_by(cursor, store, table, TABLES[table].key, missing)
+    return applied
+
+
+def fetch_by(cursor, store, table, column, ids):
+    """Pulls the rows of ``table`` whose ``column`` is one of ``ids``, in chunks."""
+    applied = 0
+    for start in range(0, len(ids), PULL_BATCH):
+        chunk = ids[start:start + PULL_BATCH]
+        query = f"{pull_query(table)} WHERE T.{column} IN ({', '.join(['%s'] * len(chunk))})"
+        applied += stream(cursor, query, chunk, lambda rows: store.merge_rows(table, rows, table in VERSIONED))
+    return applied
+
+
+# --- Background Engine ---
+
+class SyncEngine:
+    """Runs push-then-pull on a daemon thread every ``interval`` seconds.
+
+    The attributes below are written by the sync thread and only read (polled
+    with ``after()``) by the Tk thread: ``online`` is None until the first
+    attempt, then whether the last attempt reached the server; ``pending`` is
+    the number of queued offline writes; ``last_sync`` the time of the last
+    complete sync; ``last_error`` why the last attempt failed.  Writes the
+    server refused are collected for ``take_conflicts()``.
+    """
+
+    def __init__(self, path=LOCAL_DB_PATH, config=None, interval=SYNC_INTERVAL_SECONDS):
+        self.path = path
+        self.config = dict(config or DB_CONFIG, connection_timeout=CONNECT_TIMEOUT)
+        self.interval = interval
+        self.online = None
+        self.pending = 0
+        self.last_sync = None
+        self.last_error = None
+        self._store = None
+        self._cycles = 0
+        self._seen_conflict = None
+        self._conflicts = [] # Refused writes not yet taken by the UI
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock() # One cycle at a time (thread vs. sync_once() from a script)
+        self._lock_conflicts = threading.Lock()
+        self._thread = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = LocalStore(open_store(self.path))
+            self.pending = self._store.pending_count()
+        return self._store
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="dreams-sync", daemon=True)
+        self._thread.start()
+
+    def sync_now(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=CONNECT_TIMEOUT + 1)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+            except Exception as e: # Never let the thread die silently; the status line shows why
+                self.last_error = str(e)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def sync_once(self):
+        """One push-then-pull cycle; returns True if the server was reached and both completed."""
+        with self._lock:
+            store = self.store
+            try:
+                server = instrument(mysql.connector.connect(**self.config)) # Timed like the app's own statements
+            except Error as e:
+                self.online, self.last_error = False, str(e)
+                self.pending = store.pending_count()
+                return False
+            try:
+                client_id = store.state("client_id")
+                if client_id is None:
+                    client_id = str(uuid.uuid4())
+                    store.set_state("client_id", client_id)
+                    store.conn.commit()
+                _, refused = push(server, store, client_id)
+                self._collect_conflicts(store)
+                # Writes queued while pushing would be overwritten by the pull; they go up next cycle first
+                if store.pending_count() == 0:
+                    reconcile = bool(refused) or self._cycles % RECONCILE_EVERY == 0
+                    pull(server, store, reconcile, refetch_keys(store, refused))
+                    store.set_state("last_sync", datetime.now().isoformat())
+                    store.conn.commit()
+                    self.last_sync = datetime.now()
+                self._cycles += 1
+                self.online, self.last_error = True, None
+                return True
+            except Error as e:
+                # A refused statement (e.g. migration 003 not applied yet) is not a lost link
+                self.online, self.last_error = not link_down(e), str(e)
+                return False
+            except Exception as e:
+                # e.g. a sqlite3.Error applying pulled rows: the server was reached, the cycle is retried
+                store.conn.rollback()
+                self.last_error = str(e)
+                return False
+            finally:
+                self.pending = store.pending_count()
+                try:
+                    server.close()
+                except Error:
+                    pass
+
+    def _collect_conflicts(self, store):
+        if self._seen_conflict is None: # Conflicts from earlier sessions were already reported
+            self._seen_conflict = store.state("reported_conflict", 0)
+        rows = store.conflicts_after(int(self._seen_conflict))
+        if rows:
+            self._seen_conflict = rows[-1][0]
+            store.set_state("reported_conflict", self._seen_conflict)
+            store.conn.commit()
+            with self._lock_conflicts:
+                self._conflicts.extend(rows)
+
+    def take_conflicts(self):
+        """Refused writes since the previous call: [(conflict_id, seen_at, operation, table, row_id, reason)]."""
+        with self._lock_conflicts:
+            rows, self._conflicts = self._conflicts, []
+        return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run one sync of the offline replica with the central database.")
+    parser.add_argument("--path", default=LOCAL_DB_PATH, help="Local SQLite replica (default: data/dreams_local.sqlite3)")
+    args = parser.parse_args(argv)
+
+    engine = SyncEngine(args.path)
+    if not engine.sync_once():
+        print(f"Sync failed: {engine.last_error}")
+        return 1
+    print(f"Synced at {engine.last_sync:%Y-%m-%d %H:%M:%S}; {engine.pending} writes still queued.")
+    for _, seen_at, operation, table, row_id, reason in engine.store.conflicts_after(0):
+        print(f"Conflict {seen_at:%Y-%m-%d %H:%M}: {operation} {table} {row_id}: {reason}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import os
+import re
+import tempfile
+import unittest
+from datetime import datetime
+
+from local_store import LocalStore, open_store
+from sync_engine import pull
+
+# Regression tests for the offline sync, run against a scratch replica and a scripted server:
+#   python -m unittest test_sync_engine
+
+
+class ScriptedServer:
+    """Answers pull()'s SELECTs with fixed rows per table (``{table: [row, ...]}``)."""
+
+    def __init__(self, rows, now):
+        self.rows = rows
+        self.now = now
+
+    def start_transaction(self, **options):
+        pass
+
+    def commit(self):
+        pass
+
+    def cursor(self):
+        return ScriptedCursor(self)
+
+
+class ScriptedCursor:
+    def __init__(self, server):
+        self.server = server
+        self.result = []
+
+    def execute(self, query, params=()):
+        if "CURRENT_TIMESTAMP" in query:
+            self.result = [(self.server.now,)]
+        else:
+            self.result = list(self.server.rows.get(re.search(r"FROM (\w+)", query).group(1), []))
+
+    def fetchone(self):
+        return self.result.pop(0) if self.result else None
+
+    def fetchmany(self, size):
+        batch, self.result = self.result[:size], self.result[size:]
+        return batch
+
+    def fetchall(self):
+        return self.fetchmany(len(self.result))
+
+    def close(self):
+        pass
+
+
+class PullTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.conn = open_store(self.path)
+        self.store = LocalStore(self.conn)
+        self.now = datetime(2026, 5, 1, 12, 0)
+        pulled = datetime(2026, 5, 1, 11, 0)
+        self.store.merge_rows("Personnel", [(5, "Ana Cruz", "Medic", None, None, "Unit 1", pulled)], True)
+        self.store.merge_rows("ResponseIncidents", [(1, "Flood", "Riverside", pulled, "Active", 5, pulled)], True)
+        self.store.merge_rows("Deployment", [(10, 1, 5, pulled, "Medic")], False)
+        self.store.set_state("pulled_at", pulled.isoformat())
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_redispatch_replaces_old_deployment(self):
+        # Recalled and dispatched again on the server: same pair, new deployment_id, before any reconcile
+        server = ScriptedServer({"Deployment": [(11, 1, 5, self.now, "Driver")]}, self.now)
+        pull(server, self.store)
+        rows = self.conn.execute("SELECT deployment_id, role_during_incident FROM Deployment "
+                                 "WHERE incident_id = 1 AND personnel_id = 5").fetchall()
+        self.assertEqual(rows, [(11, "Driver")])
+
+    def test_same_row_is_updated_in_place(self):
+        server = ScriptedServer({"Deployment": [(10, 1, 5, self.now, "Driver")]}, self.now)
+        pull(server, self.store)
+        rows = self.conn.execute("SELECT deployment_id, role_during_incident FROM Deployment").fetchall()
+        self.assertEqual(rows, [(10, "Driver")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+import tkinter as tk
+from datetime import timedelta
+from tkinter import messagebox
+
+from db_connector import fetch_all
+
+# Rows are re-checked this far behind the last sync so writes from transactions that were
+# still open at sync time are not missed. Re-fetched rows that did not change are ignored.
+SYNC_MARGIN = timedelta(seconds=5)
+
+
+def fetch_changes(conn, pager, version_columns, since, params=()):
+    """Fetches rows whose ``updated_at`` version columns are at or after ``since``.
+
+    Returns ``(next_since, rows)``; ``next_since`` is the server clock at the
+    start of this sync minus SYNC_MARGIN and should be passed to the next call.
+    With ``since=None`` every row is returned (the initial load).
+    """
+    server_time = fetch_all(conn, "SELECT CURRENT_TIMESTAMP(6)")[0][0]
+    if since is None:
+        rows = fetch_all(conn, pager.full_query(), params)
+    else:
+        condition = "(" + " OR ".join(f"{column} >= %s" for column in version_columns) + ")"
+        rows = fetch_all(conn, pager.render([condition]), list(params) + [since] * len(version_columns))
+    return server_time - SYNC_MARGIN, rows
+
+
+def insertion_index(keys, new_key, descending):
+    """Returns where a row with ``new_key`` belongs among rows already sorted by ``keys``."""
+    low, high = 0, len(keys)
+    while low < high:
+        middle = (low + high) // 2
+        before = keys[middle] > new_key if descending else keys[middle] < new_key
+        if before:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class TreeviewSync:
+    """Keeps a plain Treeview in step with a table by primary key.
+
+    The first ``refresh()`` loads every row; later calls only fetch rows whose
+    ``updated_at`` changed since the previous sync and update, insert or move
+    just those items (the Treeview item id is the row's primary key).  Rows
+    deleted locally are removed with ``remove()``; ``refresh(detect_deletes=True)``
+    also compares primary keys with ``id_query`` to drop rows deleted elsewhere.
+    ``pager`` (a KeysetPager) supplies the SELECT and its sort order.
+    """
+
+    def __init__(self, tree, pager, executor, owner, version_columns, id_index=0, id_query=None,
+                 format_row=None, on_change=None, error_title="Database Error"):
+        self.tree = tree
+        self.pager = pager
+        self.executor = executor
+        self.owner = owner
+        self.version_columns = list(version_columns)
+        self.id_index = id_index
+        self.id_query = id_query
+        self.format_row = format_row
+        self.on_change = on_change
+        self.error_title = error_title
+
+        self.rows = {}       # Maps primary key -> latest raw row
+        self.since = None    # High-water mark for the next incremental sync
+        self._syncing = False
+        self._pending = False
+
+    def refresh(self, detect_deletes=False):
+        """Fetches rows changed since the last sync (or everything on first use) and applies them."""
+        if self._syncing:
+            # A sync is already running; run one more afterwards so nothing is missed
+            self._pending = True
+            return
+        self._syncing = True
+        since = self.since
+        id_query = self.id_query if detect_deletes and since is not None else None
+
+        def work(conn):
+            next_since, rows = fetch_changes(conn, self.pager, self.version_columns, since)
+            live_ids = {row[0] for row in fetch_all(conn, id_query)} if id_query else None
+            return next_since, rows, live_ids
+
+        def on_success(result):
+            next_since, rows, live_ids = result
+            if since is None:
+                self._clear()
+            self.since = next_since
+            changed = self.apply_rows(rows, initial=since is None)
+            if live_ids is not None:
+                for pk in [pk for pk in self.rows if pk not in live_ids]:
+                    self.remove(pk, notify=False)
+                    changed = True
+            self._finish(changed or since is None)
+
+        def on_error(e):
+            self._finish(False)
+            messagebox.showerror(self.error_title, f"Failed to refresh data: {e}")
+
+        self.executor.submit(work, on_success, on_error, owner=self.owner)
+
+    def _finish(self, changed):
+        self._syncing = False
+        if changed and self.on_change:
+            self.on_change(self)
+        if self._pending:
+            self._pending = False
+            self.refresh()
+
+    def _clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self.rows = {}
+
+    def apply_rows(self, rows, initial=False):
+        """Updates, inserts or repositions the Treeview items for the given rows.
+
+        ``initial`` rows arrive already sorted and are simply appended.
+        """
+        changed = False
+        children = keys = None
+        for row in rows:
+            pk = row[self.id_index]
+            previous = self.rows.get(pk)
+            if previous == tuple(row):
+                continue # Re-fetched inside the safety margin but unchanged
+            changed = True
+            iid = str(pk)
+            values = self.format_row(row) if self.format_row else row
+            values = tuple(values)[:len(self.tree['columns'])]
+            key = self.pager.row_key(row)
+            self.rows[pk] = tuple(row)
+
+            if initial:
+                self.tree.insert('', tk.END, iid=iid, values=values)
+                continue
+            if previous is not None and self.pager.row_key(previous) == key:
+                self.tree.item(iid, values=values) # Same position, new values
+                continue
+
+            # New row, or its sort key changed: (re)insert it at its sorted position
+            if children is None:
+                children = list(self.tree.get_children())
+                keys = [self.pager.row_key(self.rows[int_or_str(child)]) if child != iid else None for child in children]
+            if previous is not None:
+                position = children.index(iid)
+                del children[position], keys[position]
+                self.tree.delete(iid)
+            index = insertion_index(keys, key, self.pager.descending)
+            self.tree.insert('', index, iid=iid, values=values)
+            children.insert(index, iid)
+            keys.insert(index, key)
+        return changed
+
+    def remove(self, pk, notify=True):
+        """Removes a deleted row from the Treeview without re-querying anything."""
+        pk = int_or_str(pk)
+        if self.rows.pop(pk, None) is not None and self.tree.exists(str(pk)):
+            self.tree.delete(str(pk))
+            if notify and self.on_change:
+                self.on_change(self)
+
+
+def int_or_str(value):
+    """Treeview item ids and values come back as strings; numeric primary keys are stored as ints."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
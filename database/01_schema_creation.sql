@@ -10,7 +10,9 @@ CREATE TABLE Personnel (
     role VARCHAR(50) NOT NULL, -- e.g., 'Rescuer', 'Logistics', 'Commander'
     specialty VARCHAR(50), -- e.g., 'Medical', 'Search & Rescue', 'Communications'
     contact_number VARCHAR(15),
-    assigned_unit VARCHAR(50)
+    assigned_unit VARCHAR(50),
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6), -- Row version for incremental refresh
+    INDEX idx_personnel_updated_at (updated_at)
 );
 
 -- 2. ResponseIncidents Table (Manages Emergency Events)
@@ -22,7 +24,9 @@ CREATE TABLE ResponseIncidents (
     date_reported DATETIME NOT NULL,
     status VARCHAR(50) NOT NULL, -- e.g., 'Active', 'Resolved'
     commander_id INT, -- NEW FK: The designated leader for this incident
-    FOREIGN KEY (commander_id) REFERENCES Personnel(personnel_id)
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6), -- Row version for incremental refresh
+    FOREIGN KEY (commander_id) REFERENCES Personnel(personnel_id),
+    INDEX idx_incidents_updated_at (updated_at)
 );
 
 -- 3. Resources Table (Master Inventory List)
@@ -32,7 +36,9 @@ CREATE TABLE Resources (
     item_name VARCHAR(100) NOT NULL,
     category VARCHAR(50), -- e.g., 'Medical Supplies', 'Vehicle', 'Equipment'
     stock_level INT NOT NULL CHECK (stock_level >= 0),
-    unit_of_measure VARCHAR(20)
+    unit_of_measure VARCHAR(20),
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6), -- Row version for incremental refresh
+    INDEX idx_resources_updated_at (updated_at)
 );
 
 -- 4. Deployment Table (Bridge Table: Personnel <-> Incidents)
@@ -43,8 +49,8 @@ CREATE TABLE Deployment (
     personnel_id INT NOT NULL,
     deployment_time DATETIME NOT NULL,
     role_during_incident VARCHAR(50), -- Actual role assigned on site (e.g., 'Driver', 'Paramedic')
-    FOREIGN KEY (incident_id) REFERENCES ResponseIncidents(incident_id),
-    FOREIGN KEY (personnel_id) REFERENCES Personnel(personnel_id),
+    FOREIGN KEY (incident_id) REFERENCES ResponseIncidents(incident_id) ON DELETE CASCADE,
+    FOREIGN KEY (personnel_id) REFERENCES Personnel(personnel_id), -- RESTRICT: deployment history is never lost silently
     UNIQUE KEY unique_deployment (incident_id, personnel_id)
 );
 
@@ -56,7 +62,7 @@ CREATE TABLE ResourceUsage (
     resource_id INT NOT NULL,
     quantity_used INT NOT NULL,
     date_used DATETIME NOT NULL,
-    FOREIGN KEY (incident_id) REFERENCES ResponseIncidents(incident_id),
-    FOREIGN KEY (resource_id) REFERENCES Resources(resource_id),
+    FOREIGN KEY (incident_id) REFERENCES ResponseIncidents(incident_id) ON DELETE CASCADE,
+    FOREIGN KEY (resource_id) REFERENCES Resources(resource_id) ON DELETE CASCADE,
     UNIQUE KEY unique_usage (incident_id, resource_id)
 );
\ No newline at end of file
@@ -56,18 +56,24 @@ JOIN
 ORDER BY
     I.incident_id, R.item_name;
 
--- 4. Low-Stock Inventory Alert (Simple filter)
--- Objective: Identify items in the inventory that need immediate replenishment (e.g., stock level is 5 or below).
+-- 4. Low-Stock Inventory Alert (Per-item threshold)
+-- Objective: Identify items in the inventory that need immediate replenishment: stock at or below the
+-- item's manual reorder level, else its forecast reorder point (never below 5). Requires migration 005.
 SELECT
-    item_name,
-    category,
-    stock_level
+    R.item_name,
+    R.category,
+    R.stock_level,
+    COALESCE(F.reorder_level, GREATEST(COALESCE(F.reorder_point, 0), 5)) AS reorder_at,
+    F.daily_burn,
+    ROUND(R.stock_level / NULLIF(F.daily_burn, 0), 1) AS days_of_cover
 FROM
-    Resources
+    Resources AS R
+LEFT JOIN
+    StockForecast AS F ON F.resource_id = R.resource_id
 WHERE
-    stock_level <= 5
+    R.stock_level <= COALESCE(F.reorder_level, GREATEST(COALESCE(F.reorder_point, 0), 5))
 ORDER BY
-    stock_level ASC;
+    R.stock_level ASC;
 
 -- 5. Incidents Lacking Resources (Anti-Join Logic)
 -- Objective: Identify incidents that were logged but had *no* associated resource usage logged (potential auditing gap).
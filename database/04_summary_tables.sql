@@ -0,0 +1,199 @@
+-- 04_summary_tables.sql: MATERIALIZED SUMMARY LAYER FOR THE REPORTS
+-- The analytical reports read these pre-aggregated tables instead of re-aggregating
+-- Deployment / ResourceUsage on every run. Triggers on the base tables keep them current
+-- one row at a time, so report cost no longer grows with the years of history stored.
+-- Safe to re-run: tables are only created if missing and the backfill at the end recomputes every total.
+
+USE MDRRMO_DREAMS_DB;
+
+-- 1. IncidentSummary: one row per incident (deployment count, usage totals)
+-- date_reported is copied here so the reports can page through it with a single index.
+CREATE TABLE IF NOT EXISTS IncidentSummary (
+    incident_id INT PRIMARY KEY,
+    date_reported DATETIME NOT NULL,
+    personnel_deployed INT NOT NULL DEFAULT 0,
+    usage_lines INT NOT NULL DEFAULT 0, -- Number of ResourceUsage rows; 0 = no resources logged
+    total_quantity_used INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    INDEX idx_summary_date (date_reported, incident_id),
+    INDEX idx_summary_unlogged (usage_lines, date_reported, incident_id)
+);
+
+-- 2. ResourceConsumptionSummary: lifetime consumption per resource
+CREATE TABLE IF NOT EXISTS ResourceConsumptionSummary (
+    resource_id INT PRIMARY KEY,
+    total_used INT NOT NULL DEFAULT 0,
+    incidents_served INT NOT NULL DEFAULT 0, -- Number of ResourceUsage rows (one per incident)
+    last_used DATETIME,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    INDEX idx_consumption_total (total_used, resource_id)
+);
+
+-- 3. DailyIncidentCounts: incidents reported per calendar day
+CREATE TABLE IF NOT EXISTS DailyIncidentCounts (
+    report_date DATE PRIMARY KEY,
+    incident_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+);
+
+
+-- --- Maintenance Triggers ---
+
+DROP TRIGGER IF EXISTS trg_incident_summary_insert;
+DROP TRIGGER IF EXISTS trg_incident_summary_update;
+DROP TRIGGER IF EXISTS trg_incident_summary_delete;
+DROP TRIGGER IF EXISTS trg_deployment_summary_insert;
+DROP TRIGGER IF EXISTS trg_deployment_summary_update;
+DROP TRIGGER IF EXISTS trg_deployment_summary_delete;
+DROP TRIGGER IF EXISTS trg_usage_summary_insert;
+DROP TRIGGER IF EXISTS trg_usage_summary_update;
+DROP TRIGGER IF EXISTS trg_usage_summary_delete;
+DROP TRIGGER IF EXISTS trg_resource_summary_insert;
+DROP TRIGGER IF EXISTS trg_resource_summary_delete;
+
+DELIMITER $$
+
+-- ResponseIncidents: create/move/remove the incident's summary row and its day's count
+CREATE TRIGGER trg_incident_summary_insert AFTER INSERT ON ResponseIncidents
+FOR EACH ROW
+BEGIN
+    INSERT INTO IncidentSummary (incident_id, date_reported) VALUES (NEW.incident_id, NEW.date_reported);
+    INSERT INTO DailyIncidentCounts (report_date, incident_count) VALUES (DATE(NEW.date_reported), 1)
+        ON DUPLICATE KEY UPDATE incident_count = incident_count + 1;
+END$$
+
+CREATE TRIGGER trg_incident_summary_update AFTER UPDATE ON ResponseIncidents
+FOR EACH ROW
+BEGIN
+    IF NEW.date_reported <> OLD.date_reported THEN
+        UPDATE IncidentSummary SET date_reported = NEW.date_reported WHERE incident_id = NEW.incident_id;
+        IF DATE(NEW.date_reported) <> DATE(OLD.date_reported) THEN
+            UPDATE DailyIncidentCounts SET incident_count = incident_count - 1 WHERE report_date = DATE(OLD.date_reported);
+            INSERT INTO DailyIncidentCounts (report_date, incident_count) VALUES (DATE(NEW.date_reported), 1)
+                ON DUPLICATE KEY UPDATE incident_count = incident_count + 1;
+        END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_incident_summary_delete AFTER DELETE ON ResponseIncidents
+FOR EACH ROW
+BEGIN
+    DELETE FROM IncidentSummary WHERE incident_id = OLD.incident_id;
+    UPDATE DailyIncidentCounts SET incident_count = incident_count - 1 WHERE report_date = DATE(OLD.date_reported);
+END$$
+
+-- Deployment: keep personnel_deployed in step
+CREATE TRIGGER trg_deployment_summary_insert AFTER INSERT ON Deployment
+FOR EACH ROW
+BEGIN
+    UPDATE IncidentSummary SET personnel_deployed = personnel_deployed + 1 WHERE incident_id = NEW.incident_id;
+END$$
+
+CREATE TRIGGER trg_deployment_summary_update AFTER UPDATE ON Deployment
+FOR EACH ROW
+BEGIN
+    IF NEW.incident_id <> OLD.incident_id THEN
+        UPDATE IncidentSummary SET personnel_deployed = personnel_deployed - 1 WHERE incident_id = OLD.incident_id;
+        UPDATE IncidentSummary SET personnel_deployed = personnel_deployed + 1 WHERE incident_id = NEW.incident_id;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_deployment_summary_delete AFTER DELETE ON Deployment
+FOR EACH ROW
+BEGIN
+    UPDATE IncidentSummary SET personnel_deployed = personnel_deployed - 1 WHERE incident_id = OLD.incident_id;
+END$$
+
+-- ResourceUsage: per-incident and per-resource consumption totals
+-- (the usage upsert in inventory.py fires the UPDATE trigger when it adds to an existing line)
+CREATE TRIGGER trg_usage_summary_insert AFTER INSERT ON ResourceUsage
+FOR EACH ROW
+BEGIN
+    UPDATE IncidentSummary
+    SET usage_lines = usage_lines + 1, total_quantity_used = total_quantity_used + NEW.quantity_used
+    WHERE incident_id = NEW.incident_id;
+    INSERT INTO ResourceConsumptionSummary (resource_id, total_used, incidents_served, last_used)
+        VALUES (NEW.resource_id, NEW.quantity_used, 1, NEW.date_used)
+        ON DUPLICATE KEY UPDATE
+            total_used = total_used + NEW.quantity_used,
+            incidents_served = incidents_served + 1,
+            last_used = GREATEST(COALESCE(last_used, NEW.date_used), NEW.date_used);
+END$$
+
+CREATE TRIGGER trg_usage_summary_update AFTER UPDATE ON ResourceUsage
+FOR EACH ROW
+BEGIN
+    UPDATE IncidentSummary
+    SET usage_lines = usage_lines - 1, total_quantity_used = total_quantity_used - OLD.quantity_used
+    WHERE incident_id = OLD.incident_id;
+    UPDATE IncidentSummary
+    SET usage_lines = usage_lines + 1, total_quantity_used = total_quantity_used + NEW.quantity_used
+    WHERE incident_id = NEW.incident_id;
+    UPDATE ResourceConsumptionSummary
+    SET total_used = total_used - OLD.quantity_used, incidents_served = incidents_served - 1
+    WHERE resource_id = OLD.resource_id;
+    INSERT INTO ResourceConsumptionSummary (resource_id, total_used, incidents_served, last_used)
+        VALUES (NEW.resource_id, NEW.quantity_used, 1, NEW.date_used)
+        ON DUPLICATE KEY UPDATE
+            total_used = total_used + NEW.quantity_used,
+            incidents_served = incidents_served + 1,
+            last_used = GREATEST(COALESCE(last_used, NEW.date_used), NEW.date_used);
+END$$
+
+CREATE TRIGGER trg_usage_summary_delete AFTER DELETE ON ResourceUsage
+FOR EACH ROW
+BEGIN
+    UPDATE IncidentSummary
+    SET usage_lines = usage_lines - 1, total_quantity_used = total_quantity_used - OLD.quantity_used
+    WHERE incident_id = OLD.incident_id;
+    UPDATE ResourceConsumptionSummary
+    SET total_used = total_used - OLD.quantity_used, incidents_served = incidents_served - 1
+    WHERE resource_id = OLD.resource_id;
+END$$
+
+-- Resources: every item gets a (zero) consumption row so totals list unused stock too
+CREATE TRIGGER trg_resource_summary_insert AFTER INSERT ON Resources
+FOR EACH ROW
+BEGIN
+    INSERT IGNORE INTO ResourceConsumptionSummary (resource_id) VALUES (NEW.resource_id);
+END$$
+
+CREATE TRIGGER trg_resource_summary_delete AFTER DELETE ON Resources
+FOR EACH ROW
+BEGIN
+    DELETE FROM ResourceConsumptionSummary WHERE resource_id = OLD.resource_id;
+END$$
+
+DELIMITER ;
+
+
+-- --- Backfill (recomputes every summary from the base tables) ---
+
+INSERT INTO IncidentSummary (incident_id, date_reported, personnel_deployed, usage_lines, total_quantity_used)
+SELECT
+    I.incident_id, I.date_reported,
+    (SELECT COUNT(*) FROM Deployment AS D WHERE D.incident_id = I.incident_id),
+    (SELECT COUNT(*) FROM ResourceUsage AS RU WHERE RU.incident_id = I.incident_id),
+    (SELECT COALESCE(SUM(RU.quantity_used), 0) FROM ResourceUsage AS RU WHERE RU.incident_id = I.incident_id)
+FROM ResponseIncidents AS I
+ON DUPLICATE KEY UPDATE
+    date_reported = VALUES(date_reported),
+    personnel_deployed = VALUES(personnel_deployed),
+    usage_lines = VALUES(usage_lines),
+    total_quantity_used = VALUES(total_quantity_used);
+
+INSERT INTO ResourceConsumptionSummary (resource_id, total_used, incidents_served, last_used)
+SELECT R.resource_id, COALESCE(SUM(RU.quantity_used), 0), COUNT(RU.usage_id), MAX(RU.date_used)
+FROM Resources AS R
+LEFT JOIN ResourceUsage AS RU ON RU.resource_id = R.resource_id
+GROUP BY R.resource_id
+ON DUPLICATE KEY UPDATE
+    total_used = VALUES(total_used),
+    incidents_served = VALUES(incidents_served),
+    last_used = VALUES(last_used);
+
+DELETE FROM DailyIncidentCounts;
+INSERT INTO DailyIncidentCounts (report_date, incident_count)
+SELECT DATE(date_reported), COUNT(*)
+FROM ResponseIncidents
+GROUP BY DATE(date_reported);
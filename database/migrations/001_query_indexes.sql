@@ -0,0 +1,28 @@
+-- 001_query_indexes.sql: SECONDARY INDEXES FOR THE GRID, LOOKUP AND REPORT QUERIES
+-- Each index matches the WHERE / ORDER BY of a query the application issues, so the
+-- optimizer can read rows in order instead of scanning and sorting the whole table.
+-- InnoDB appends the primary key to every secondary index, which makes each of these
+-- cover the "(sort column, id)" keyset pagination order used by the grids.
+-- (ResourceUsage.resource_id already has the index MySQL creates for its foreign key.)
+
+-- Incident grid and Incidents report order: date_reported DESC, incident_id DESC
+ALTER TABLE ResponseIncidents ADD INDEX idx_incidents_date (date_reported);
+
+-- Status filters (active incident counts) in date order
+ALTER TABLE ResponseIncidents ADD INDEX idx_incidents_status (status, date_reported);
+
+-- Low-Stock Inventory Alert: WHERE stock_level <= 5 ORDER BY stock_level, resource_id
+ALTER TABLE Resources ADD INDEX idx_resources_stock (stock_level);
+
+-- Inventory grid and resource picker: ORDER BY item_name, resource_id
+ALTER TABLE Resources ADD INDEX idx_resources_name (item_name);
+
+-- Commander picker: ORDER BY name
+ALTER TABLE Personnel ADD INDEX idx_personnel_name (name);
+
+-- Personnel Utilization: ORDER BY deployment_time DESC, deployment_id DESC
+ALTER TABLE Deployment ADD INDEX idx_deployment_time (deployment_time);
+
+-- Resource Consumption Detail: ORDER BY incident_id, usage_id
+-- (unique_usage starts with incident_id but continues with resource_id, so it cannot supply this order)
+ALTER TABLE ResourceUsage ADD INDEX idx_usage_incident (incident_id);
@@ -0,0 +1,124 @@
+-- 002_cascades_and_archive.sql: SCHEMA-LEVEL CASCADES AND PARTITIONED ARCHIVE TABLES
+-- Requires 04_summary_tables.sql (the triggers below keep its summaries correct).
+
+-- --- 1. ON DELETE CASCADE for the bridge tables ---
+-- Deleting an incident removes its Deployment and ResourceUsage rows; deleting a resource
+-- removes its usage lines. Personnel stay RESTRICT so deployment history is never lost silently.
+-- The original constraints were unnamed, so they carry InnoDB's generated <table>_ibfk_<n> names.
+
+ALTER TABLE Deployment
+    DROP FOREIGN KEY Deployment_ibfk_1,
+    ADD CONSTRAINT fk_deployment_incident FOREIGN KEY (incident_id)
+        REFERENCES ResponseIncidents(incident_id) ON DELETE CASCADE;
+
+ALTER TABLE ResourceUsage
+    DROP FOREIGN KEY ResourceUsage_ibfk_1,
+    DROP FOREIGN KEY ResourceUsage_ibfk_2,
+    ADD CONSTRAINT fk_usage_incident FOREIGN KEY (incident_id)
+        REFERENCES ResponseIncidents(incident_id) ON DELETE CASCADE,
+    ADD CONSTRAINT fk_usage_resource FOREIGN KEY (resource_id)
+        REFERENCES Resources(resource_id) ON DELETE CASCADE;
+
+-- Rows removed by a cascade do not fire their own DELETE triggers, so the parent's
+-- BEFORE DELETE trigger takes the children's share out of the summaries first.
+-- (If the children were already deleted explicitly, these joins find nothing.)
+
+DROP TRIGGER IF EXISTS trg_incident_cascade_summary;
+DROP TRIGGER IF EXISTS trg_resource_cascade_summary;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_incident_cascade_summary BEFORE DELETE ON ResponseIncidents
+FOR EACH ROW
+BEGIN
+    UPDATE ResourceConsumptionSummary AS C
+    JOIN ResourceUsage AS RU ON RU.resource_id = C.resource_id
+    SET C.total_used = C.total_used - RU.quantity_used, C.incidents_served = C.incidents_served - 1
+    WHERE RU.incident_id = OLD.incident_id;
+END$$
+
+CREATE TRIGGER trg_resource_cascade_summary BEFORE DELETE ON Resources
+FOR EACH ROW
+BEGIN
+    UPDATE IncidentSummary AS S
+    JOIN ResourceUsage AS RU ON RU.incident_id = S.incident_id
+    SET S.usage_lines = S.usage_lines - 1, S.total_quantity_used = S.total_quantity_used - RU.quantity_used
+    WHERE RU.resource_id = OLD.resource_id;
+END$$
+
+DELIMITER ;
+
+
+-- --- 2. Archive tables ---
+-- Resolved incidents past the cutoff are moved here by archive.py. Each table is partitioned
+-- by the year of its incident, so a whole year can later be dropped or exported cheaply.
+-- Partitioned InnoDB tables cannot have foreign keys, and every unique key must include the
+-- partitioning column, hence the (id, incident_date) primary keys.
+
+CREATE TABLE IF NOT EXISTS ResponseIncidentsArchive (
+    incident_id INT NOT NULL,
+    incident_type VARCHAR(50) NOT NULL,
+    incident_location VARCHAR(255) NOT NULL,
+    date_reported DATETIME NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    commander_id INT,
+    archived_at DATETIME NOT NULL,
+    PRIMARY KEY (incident_id, date_reported),
+    INDEX idx_incidents_archive_date (date_reported)
+)
+PARTITION BY RANGE (YEAR(date_reported)) (
+    PARTITION p_before_2020 VALUES LESS THAN (2020),
+    PARTITION p2020 VALUES LESS THAN (2021),
+    PARTITION p2021 VALUES LESS THAN (2022),
+    PARTITION p2022 VALUES LESS THAN (2023),
+    PARTITION p2023 VALUES LESS THAN (2024),
+    PARTITION p2024 VALUES LESS THAN (2025),
+    PARTITION p2025 VALUES LESS THAN (2026),
+    PARTITION p2026 VALUES LESS THAN (2027),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+CREATE TABLE IF NOT EXISTS DeploymentArchive (
+    deployment_id INT NOT NULL,
+    incident_id INT NOT NULL,
+    personnel_id INT NOT NULL,
+    deployment_time DATETIME NOT NULL,
+    role_during_incident VARCHAR(50),
+    incident_date DATETIME NOT NULL, -- date_reported of the parent incident (partitioning key)
+    PRIMARY KEY (deployment_id, incident_date),
+    INDEX idx_deployment_archive_incident (incident_id)
+)
+PARTITION BY RANGE (YEAR(incident_date)) (
+    PARTITION p_before_2020 VALUES LESS THAN (2020),
+    PARTITION p2020 VALUES LESS THAN (2021),
+    PARTITION p2021 VALUES LESS THAN (2022),
+    PARTITION p2022 VALUES LESS THAN (2023),
+    PARTITION p2023 VALUES LESS THAN (2024),
+    PARTITION p2024 VALUES LESS THAN (2025),
+    PARTITION p2025 VALUES LESS THAN (2026),
+    PARTITION p2026 VALUES LESS THAN (2027),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+CREATE TABLE IF NOT EXISTS ResourceUsageArchive (
+    usage_id INT NOT NULL,
+    incident_id INT NOT NULL,
+    resource_id INT NOT NULL,
+    quantity_used INT NOT NULL,
+    date_used DATETIME NOT NULL,
+    incident_date DATETIME NOT NULL, -- date_reported of the parent incident (partitioning key)
+    PRIMARY KEY (usage_id, incident_date),
+    INDEX idx_usage_archive_incident (incident_id),
+    INDEX idx_usage_archive_resource (resource_id)
+)
+PARTITION BY RANGE (YEAR(incident_date)) (
+    PARTITION p_before_2020 VALUES LESS THAN (2020),
+    PARTITION p2020 VALUES LESS THAN (2021),
+    PARTITION p2021 VALUES LESS THAN (2022),
+    PARTITION p2022 VALUES LESS THAN (2023),
+    PARTITION p2023 VALUES LESS THAN (2024),
+    PARTITION p2024 VALUES LESS THAN (2025),
+    PARTITION p2025 VALUES LESS THAN (2026),
+    PARTITION p2026 VALUES LESS THAN (2027),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
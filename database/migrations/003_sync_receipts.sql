@@ -0,0 +1,13 @@
+-- 003_sync_receipts.sql: RECEIPTS FOR WRITES PUSHED BY OFFLINE WORKSTATIONS
+-- sync_engine.py replays each queued offline write in one transaction together with a
+-- receipt row keyed by (client_id, seq). If the link drops after the server committed but
+-- before the workstation heard back, the next push finds the receipt and skips the write
+-- instead of applying it twice (a second stock decrement, a duplicate incident).
+
+CREATE TABLE IF NOT EXISTS SyncReceipts (
+    client_id CHAR(36) NOT NULL,  -- Random id of the workstation's local store
+    seq BIGINT NOT NULL,          -- Outbox sequence number on that workstation
+    result_id INT NULL,           -- Server id of the row an insert created
+    applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (client_id, seq)
+);
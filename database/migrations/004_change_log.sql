@@ -0,0 +1,148 @@
+-- 004_change_log.sql: CHANGE FEED FOR LIVE WINDOWS
+-- Every insert, update and delete on the five core tables appends one row to ChangeLog.
+-- change_feed.py tails it by change_id (a high-water mark) and tells the open windows
+-- which rows changed, so they refresh just those rows instead of reloading or polling
+-- the tables themselves. Rows older than a day are pruned by the feed.
+-- Rows removed by ON DELETE CASCADE fire no triggers; the parent's own 'D' change
+-- (which carries its incident_id) stands for them.
+
+CREATE TABLE IF NOT EXISTS ChangeLog (
+    change_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    table_name VARCHAR(32) NOT NULL,
+    row_id INT NOT NULL,           -- Primary key of the changed row
+    incident_id INT NULL,          -- Incident the row belongs to (ResponseIncidents, Deployment, ResourceUsage)
+    related_id INT NULL,           -- Other side of a bridge row: personnel_id (Deployment), resource_id (ResourceUsage)
+    operation CHAR(1) NOT NULL,    -- 'I'nsert, 'U'pdate or 'D'elete
+    changed_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_changelog_changed_at (changed_at) -- Pruning
+);
+
+DROP TRIGGER IF EXISTS trg_personnel_changelog_insert;
+DROP TRIGGER IF EXISTS trg_personnel_changelog_update;
+DROP TRIGGER IF EXISTS trg_personnel_changelog_delete;
+DROP TRIGGER IF EXISTS trg_incident_changelog_insert;
+DROP TRIGGER IF EXISTS trg_incident_changelog_update;
+DROP TRIGGER IF EXISTS trg_incident_changelog_delete;
+DROP TRIGGER IF EXISTS trg_resource_changelog_insert;
+DROP TRIGGER IF EXISTS trg_resource_changelog_update;
+DROP TRIGGER IF EXISTS trg_resource_changelog_delete;
+DROP TRIGGER IF EXISTS trg_deployment_changelog_insert;
+DROP TRIGGER IF EXISTS trg_deployment_changelog_update;
+DROP TRIGGER IF EXISTS trg_deployment_changelog_delete;
+DROP TRIGGER IF EXISTS trg_usage_changelog_insert;
+DROP TRIGGER IF EXISTS trg_usage_changelog_update;
+DROP TRIGGER IF EXISTS trg_usage_changelog_delete;
+
+DELIMITER $$
+
+-- Personnel
+CREATE TRIGGER trg_personnel_changelog_insert AFTER INSERT ON Personnel
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('Personnel', NEW.personnel_id, NULL, NULL, 'I');
+END$$
+
+CREATE TRIGGER trg_personnel_changelog_update AFTER UPDATE ON Personnel
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('Personnel', NEW.personnel_id, NULL, NULL, 'U');
+END$$
+
+CREATE TRIGGER trg_personnel_changelog_delete AFTER DELETE ON Personnel
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('Personnel', OLD.personnel_id, NULL, NULL, 'D');
+END$$
+
+-- ResponseIncidents
+CREATE TRIGGER trg_incident_changelog_insert AFTER INSERT ON ResponseIncidents
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('ResponseIncidents', NEW.incident_id, NEW.incident_id, NULL, 'I');
+END$$
+
+CREATE TRIGGER trg_incident_changelog_update AFTER UPDATE ON ResponseIncidents
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('ResponseIncidents', NEW.incident_id, NEW.incident_id, NULL, 'U');
+END$$
+
+CREATE TRIGGER trg_incident_changelog_delete AFTER DELETE ON ResponseIncidents
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('ResponseIncidents', OLD.incident_id, OLD.incident_id, NULL, 'D');
+END$$
+
+-- Resources
+CREATE TRIGGER trg_resource_changelog_insert AFTER INSERT ON Resources
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('Resources', NEW.resource_id, NULL, NULL, 'I');
+END$$
+
+CREATE TRIGGER trg_resource_changelog_update AFTER UPDATE ON Resources
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('Resources', NEW.resource_id, NULL, NULL, 'U');
+END$$
+
+CREATE TRIGGER trg_resource_changelog_delete AFTER DELETE ON Resources
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('Resources', OLD.resource_id, NULL, NULL, 'D');
+END$$
+
+-- Deployment
+CREATE TRIGGER trg_deployment_changelog_insert AFTER INSERT ON Deployment
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('Deployment', NEW.deployment_id, NEW.incident_id, NEW.personnel_id, 'I');
+END$$
+
+CREATE TRIGGER trg_deployment_changelog_update AFTER UPDATE ON Deployment
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('Deployment', NEW.deployment_id, NEW.incident_id, NEW.personnel_id, 'U');
+END$$
+
+CREATE TRIGGER trg_deployment_changelog_delete AFTER DELETE ON Deployment
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('Deployment', OLD.deployment_id, OLD.incident_id, OLD.personnel_id, 'D');
+END$$
+
+-- ResourceUsage
+CREATE TRIGGER trg_usage_changelog_insert AFTER INSERT ON ResourceUsage
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('ResourceUsage', NEW.usage_id, NEW.incident_id, NEW.resource_id, 'I');
+END$$
+
+CREATE TRIGGER trg_usage_changelog_update AFTER UPDATE ON ResourceUsage
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('ResourceUsage', NEW.usage_id, NEW.incident_id, NEW.resource_id, 'U');
+END$$
+
+CREATE TRIGGER trg_usage_changelog_delete AFTER DELETE ON ResourceUsage
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('ResourceUsage', OLD.usage_id, OLD.incident_id, OLD.resource_id, 'D');
+END$$
+
+DELIMITER ;
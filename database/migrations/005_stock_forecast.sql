@@ -0,0 +1,109 @@
+-- 005_stock_forecast.sql: DAILY USAGE ROLLUP AND PER-RESOURCE REORDER POINTS
+-- forecast.py derives each resource's burn rate from the last few weeks of usage. Reading
+-- that from ResourceUsage would scan years of lines per refresh, so triggers keep one row
+-- per resource and day in DailyResourceUsage and the forecast reads a short range of it.
+-- The results are cached in StockForecast, next to an optional manual reorder level.
+
+CREATE TABLE IF NOT EXISTS DailyResourceUsage (
+    resource_id INT NOT NULL,
+    usage_date DATE NOT NULL,
+    quantity_used INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (resource_id, usage_date),      -- One resource's recent days (incremental refresh)
+    INDEX idx_daily_usage_date (usage_date),    -- Every resource's recent days (full refresh)
+    CONSTRAINT fk_daily_usage_resource FOREIGN KEY (resource_id)
+        REFERENCES Resources(resource_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS StockForecast (
+    resource_id INT PRIMARY KEY,
+    reorder_level INT NULL,                     -- Set by hand; overrides the forecast when not NULL
+    daily_burn DECIMAL(12, 3) NULL,             -- Units used per day
+    burn_stddev DECIMAL(12, 3) NULL,            -- Day-to-day spread of that use
+    reorder_point INT NULL,                     -- Stock that covers the lead time at the forecast burn
+    computed_at DATETIME(6) NULL,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    CONSTRAINT fk_forecast_resource FOREIGN KEY (resource_id)
+        REFERENCES Resources(resource_id) ON DELETE CASCADE
+);
+
+DROP TRIGGER IF EXISTS trg_usage_daily_insert;
+DROP TRIGGER IF EXISTS trg_usage_daily_update;
+DROP TRIGGER IF EXISTS trg_usage_daily_delete;
+DROP TRIGGER IF EXISTS trg_incident_cascade_daily;
+DROP TRIGGER IF EXISTS trg_forecast_changelog_insert;
+DROP TRIGGER IF EXISTS trg_forecast_changelog_update;
+
+DELIMITER $$
+
+-- A usage line logged again adds to its quantity and moves date_used to now (inventory.py),
+-- so an update books only the added quantity, on the new date; earlier days keep theirs.
+-- A deleted line comes off its last date as a whole; the forecast treats negative days as zero.
+CREATE TRIGGER trg_usage_daily_insert AFTER INSERT ON ResourceUsage
+FOR EACH ROW
+BEGIN
+    INSERT INTO DailyResourceUsage (resource_id, usage_date, quantity_used)
+        VALUES (NEW.resource_id, DATE(NEW.date_used), NEW.quantity_used)
+        ON DUPLICATE KEY UPDATE quantity_used = quantity_used + NEW.quantity_used;
+END$$
+
+CREATE TRIGGER trg_usage_daily_update AFTER UPDATE ON ResourceUsage
+FOR EACH ROW
+BEGIN
+    IF NEW.resource_id = OLD.resource_id THEN
+        INSERT INTO DailyResourceUsage (resource_id, usage_date, quantity_used)
+            VALUES (NEW.resource_id, DATE(NEW.date_used), NEW.quantity_used - OLD.quantity_used)
+            ON DUPLICATE KEY UPDATE quantity_used = quantity_used + NEW.quantity_used - OLD.quantity_used;
+    ELSE
+        UPDATE DailyResourceUsage SET quantity_used = quantity_used - OLD.quantity_used
+            WHERE resource_id = OLD.resource_id AND usage_date = DATE(OLD.date_used);
+        INSERT INTO DailyResourceUsage (resource_id, usage_date, quantity_used)
+            VALUES (NEW.resource_id, DATE(NEW.date_used), NEW.quantity_used)
+            ON DUPLICATE KEY UPDATE quantity_used = quantity_used + NEW.quantity_used;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_usage_daily_delete AFTER DELETE ON ResourceUsage
+FOR EACH ROW
+BEGIN
+    UPDATE DailyResourceUsage SET quantity_used = quantity_used - OLD.quantity_used
+        WHERE resource_id = OLD.resource_id AND usage_date = DATE(OLD.date_used);
+END$$
+
+-- Usage lines removed by the incident's cascade fire no triggers (see 002). A deleted
+-- resource needs nothing here: its DailyResourceUsage rows cascade with it.
+CREATE TRIGGER trg_incident_cascade_daily BEFORE DELETE ON ResponseIncidents
+FOR EACH ROW
+BEGIN
+    UPDATE DailyResourceUsage AS D
+    JOIN ResourceUsage AS RU ON RU.resource_id = D.resource_id AND DATE(RU.date_used) = D.usage_date
+    SET D.quantity_used = D.quantity_used - RU.quantity_used
+    WHERE RU.incident_id = OLD.incident_id;
+END$$
+
+-- Windows only care when the alert threshold moves, not about every recomputation
+CREATE TRIGGER trg_forecast_changelog_insert AFTER INSERT ON StockForecast
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+    VALUES ('StockForecast', NEW.resource_id, NULL, NULL, 'I');
+END$$
+
+CREATE TRIGGER trg_forecast_changelog_update AFTER UPDATE ON StockForecast
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.reorder_level <=> OLD.reorder_level AND NEW.reorder_point <=> OLD.reorder_point) THEN
+        INSERT INTO ChangeLog (table_name, row_id, incident_id, related_id, operation)
+        VALUES ('StockForecast', NEW.resource_id, NULL, NULL, 'U');
+    END IF;
+END$$
+
+DELIMITER ;
+
+
+-- --- Backfill (recomputes every day's total from the usage lines) ---
+
+INSERT INTO DailyResourceUsage (resource_id, usage_date, quantity_used)
+SELECT resource_id, DATE(date_used), SUM(quantity_used)
+FROM ResourceUsage
+GROUP BY resource_id, DATE(date_used)
+ON DUPLICATE KEY UPDATE quantity_used = VALUES(quantity_used);
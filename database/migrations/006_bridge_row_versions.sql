@@ -0,0 +1,15 @@
+-- 006_bridge_row_versions.sql: ROW VERSIONS FOR THE BRIDGE TABLES
+-- Deployment and ResourceUsage rows are also changed in place: logging a resource again for
+-- the same incident adds to its line (inventory.py), and a responder's role can be edited.
+-- Neither moves the newest id or the row count, so the Reports window's staleness probe
+-- (report_definitions.VERSION_PROBES) and the offline replica's incremental pull
+-- (sync_engine.py) missed them. An updated_at row version, as on the other tables, does not.
+-- Existing rows get the time of this migration, so each replica re-reads its window once.
+
+ALTER TABLE Deployment
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_deployment_updated_at (updated_at);
+
+ALTER TABLE ResourceUsage
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_usage_updated_at (updated_at);
@@ -0,0 +1,38 @@
+-- 007_daily_usage_clamp.sql: DELETED USAGE LINES NO LONGER ERASE OTHER INCIDENTS' USE
+-- DailyResourceUsage (005) only knows a usage line by its latest date: logging a resource again
+-- for the same incident adds to the line and moves date_used to now, so the line's quantity is
+-- spread over several days of the rollup. When the line goes (deleted, or cascaded with its
+-- incident) 005's triggers took its whole accumulated quantity off that last day. That day could
+-- go negative and cancel other incidents' real use of the resource on it, while the earlier days
+-- kept the deleted line's share.
+-- The subtraction now stops at zero, so one deletion can no longer erase another incident's use.
+-- What remains: the earlier days of a line logged on several days still count it after it is
+-- deleted (the rollup cannot tell which part was logged when), so the forecast can over-state
+-- recent use until those days leave its 28-day window. This replaces 005's note that the
+-- forecast treats negative days as zero.
+
+DROP TRIGGER IF EXISTS trg_usage_daily_delete;
+DROP TRIGGER IF EXISTS trg_incident_cascade_daily;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_usage_daily_delete AFTER DELETE ON ResourceUsage
+FOR EACH ROW
+BEGIN
+    UPDATE DailyResourceUsage SET quantity_used = GREATEST(quantity_used - OLD.quantity_used, 0)
+        WHERE resource_id = OLD.resource_id AND usage_date = DATE(OLD.date_used);
+END$$
+
+CREATE TRIGGER trg_incident_cascade_daily BEFORE DELETE ON ResponseIncidents
+FOR EACH ROW
+BEGIN
+    UPDATE DailyResourceUsage AS D
+    JOIN ResourceUsage AS RU ON RU.resource_id = D.resource_id AND DATE(RU.date_used) = D.usage_date
+    SET D.quantity_used = GREATEST(D.quantity_used - RU.quantity_used, 0)
+    WHERE RU.incident_id = OLD.incident_id;
+END$$
+
+DELIMITER ;
+
+-- Days already driven below zero by the old triggers
+UPDATE DailyResourceUsage SET quantity_used = 0 WHERE quantity_used < 0;